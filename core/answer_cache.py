@@ -0,0 +1,185 @@
+import copy
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from langchain_core.embeddings import Embeddings
+
+from .models import AnswerCacheEntry
+from .query_cache import normalize_question
+from .store_cache import store_version, vector_store_path
+
+
+def store_fingerprint(store_name: str) -> Optional[str]:
+    """Hash of the store's on-disk files; changes whenever the store is rebuilt"""
+    version = store_version(vector_store_path(store_name))
+    if version is None:
+        return None
+    return hashlib.sha256(repr(version).encode("utf-8")).hexdigest()
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class SemanticAnswerCache:
+    """Answers keyed by store identity plus an embedding of the question.
+
+    Entries live in the database so every worker shares them. A lookup first
+    tries an exact match on the normalized text (no embedding call), then the
+    most similar cached question at or above ``threshold`` cosine similarity.
+    The question is embedded as asked, so on a miss retrieval can search with
+    the same vector instead of embedding it again.
+    Entries expire after ``ttl`` and are ignored as soon as the store's files
+    change; ``invalidate`` drops a store's entries outright.
+    """
+
+    def __init__(self, threshold: float, ttl: timedelta, max_entries_per_store: int):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries_per_store = max_entries_per_store
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _fresh(self, store_name: str, version: str):
+        return AnswerCacheEntry.objects.filter(
+            store_name=store_name,
+            store_version=version,
+            created_at__gte=timezone.now() - self.ttl
+        )
+
+    def lookup(self, store_name: str, version: str, question: str,
+               embeddings: Embeddings) -> Tuple[Optional[Dict], Optional[np.ndarray], float]:
+        """(answer, question embedding, similarity); the embedding is None when the exact match hit.
+
+        The embedding is returned as the model produced it, ready to pass to retrieval.
+        """
+        normalized = normalize_question(question)
+        entries = self._fresh(store_name, version)
+        exact = entries.filter(question_hash=hashlib.sha256(normalized.encode("utf-8")).hexdigest()).first()
+        if exact is not None:
+            self._record_hit(exact.id, exact=True)
+            return exact.answer, None, 1.0
+
+        embedding = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+        candidates = list(entries.values_list("id", "embedding"))
+        if candidates:
+            matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in candidates])
+            similarities = matrix @ _unit(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                entry_id = candidates[best][0]
+                self._record_hit(entry_id, exact=False)
+                return AnswerCacheEntry.objects.get(id=entry_id).answer, embedding, float(similarities[best])
+
+        with self._lock:
+            self.misses += 1
+        return None, embedding, 0.0
+
+    def _record_hit(self, entry_id: int, exact: bool) -> None:
+        AnswerCacheEntry.objects.filter(id=entry_id).update(hits=F("hits") + 1)
+        with self._lock:
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+
+    def put(self, store_name: str, version: str, question: str, embedding: np.ndarray,
+            answer: Dict, created_at=None) -> None:
+        normalized = normalize_question(question)
+        try:
+            AnswerCacheEntry.objects.create(
+                store_name=store_name,
+                store_version=version,
+                question=normalized,
+                question_hash=hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+                embedding=_unit(embedding).tobytes(),
+                answer=answer,
+                created_at=created_at or timezone.now()
+            )
+        except IntegrityError:
+            return  # Another worker cached the same question first
+        # Drop entries from earlier builds of the store and anything past the per-store cap
+        AnswerCacheEntry.objects.filter(store_name=store_name).exclude(store_version=version).delete()
+        stale_ids = AnswerCacheEntry.objects.filter(store_name=store_name).order_by(
+            "-created_at"
+        ).values_list("id", flat=True)[self.max_entries_per_store:]
+        if stale_ids:
+            AnswerCacheEntry.objects.filter(id__in=list(stale_ids)).delete()
+
+    @staticmethod
+    def hit_result(cached: Dict, question: str, similarity: float) -> Dict:
+        """A cached answer as returned for ``question``"""
+        result = copy.deepcopy(cached)
+        result.update({"question": question, "cached": True, "cache_similarity": round(similarity, 4)})
+        return result
+
+    def get_or_answer(self, store_name: str, question: str, embeddings: Embeddings,
+                      answer: Callable[[Optional[np.ndarray]], Dict]) -> Dict:
+        """Cached answer for ``question`` on the store, or ``answer(embedding)`` cached for next time.
+
+        ``answer`` gets the question's embedding from the lookup (None if there was none) to search with.
+        """
+        version = store_fingerprint(store_name)
+        if version is None:
+            return answer(None)
+
+        cached, embedding, similarity = self.lookup(store_name, version, question, embeddings)
+        if cached is not None:
+            return self.hit_result(cached, question, similarity)
+
+        result = answer(embedding)
+        result["cached"] = False
+        self.put(store_name, version, question, embedding, result)
+        return result
+
+    def warm(self, store_name: str, history: Iterable[Tuple[str, Dict, object]], embeddings: Embeddings) -> int:
+        """Seed a store's entries from (question, answer, created_at) history within the TTL"""
+        version = store_fingerprint(store_name)
+        if version is None:
+            return 0
+        cutoff = timezone.now() - self.ttl
+        existing = set(self._fresh(store_name, version).values_list("question_hash", flat=True))
+        added = 0
+        for question, answer, created_at in history:
+            normalized = normalize_question(question)
+            question_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+            if created_at < cutoff or question_hash in existing:
+                continue
+            self.put(store_name, version, question, embeddings.embed_query(question), answer, created_at)
+            existing.add(question_hash)
+            added += 1
+        return added
+
+    def invalidate(self, store_name: str) -> None:
+        deleted, _ = AnswerCacheEntry.objects.filter(store_name=store_name).delete()
+        if deleted:
+            logging.info(f"Dropped {deleted} cached answer(s) for store '{store_name}'.")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": AnswerCacheEntry.objects.count(),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ttl=timedelta(seconds=settings.ANSWER_CACHE_TTL_SECONDS),
+    max_entries_per_store=settings.ANSWER_CACHE_MAX_ENTRIES_PER_STORE,
+)
@@ -0,0 +1,166 @@
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import http_pool
+from .answer_cache import answer_cache, store_fingerprint
+from .blocking_pool import run_blocking
+from .query_cache import normalize_question
+from .single_flight import answer_flight
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+NO_CONTEXT_ANSWER = {"answer": "No relevant context found.", "references": [], "thinking_process": ""}
+
+
+async def chat_completion_async(api_key: str, payload: Dict, timeout: float = 60) -> str:
+    """Content of a Groq chat completion, awaited on the pooled async client"""
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    response = await http_pool.apost(GROQ_CHAT_URL, json=payload, headers=headers, timeout=timeout)
+    if response.status_code != 200:
+        raise Exception(f"Groq LLM error: {response.status_code} - {response.text}")
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def stream_chat_completion(api_key: str, payload: Dict, timeout: float = 60) -> Iterator[str]:
+    """Content deltas of a Groq chat completion requested in streaming (SSE) mode"""
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    with http_pool.post(GROQ_CHAT_URL, json={**payload, "stream": True}, headers=headers,
+                        stream=True, timeout=timeout) as response:
+        if response.status_code != 200:
+            raise Exception(f"Groq LLM error: {response.status_code} - {response.text}")
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+class TaggedStreamSplitter:
+    """Splits a streamed ``<thinking>…</thinking><answer>…</answer>`` response as it arrives.
+
+    ``feed`` returns (section, text) pairs for "thinking" and "answer" text;
+    anything outside the two tags is dropped. A tag split across deltas is
+    held back until the next delta completes (or rules) it out.
+    """
+
+    TAGS = {"<thinking>": "thinking", "</thinking>": None, "<answer>": "answer", "</answer>": None}
+
+    def __init__(self):
+        self.section: Optional[str] = None
+        self._pending = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self._pending += text
+        events = []
+        while self._pending:
+            start = self._pending.find("<")
+            if start == -1:
+                self._emit(events, self._pending)
+                self._pending = ""
+                break
+            self._emit(events, self._pending[:start])
+            self._pending = self._pending[start:]
+            tag = next((tag for tag in self.TAGS if self._pending.startswith(tag)), None)
+            if tag is not None:
+                self.section = self.TAGS[tag]
+                self._pending = self._pending[len(tag):]
+            elif any(tag.startswith(self._pending) for tag in self.TAGS):
+                break  # Possibly a tag cut off by the delta boundary
+            else:
+                self._emit(events, "<")
+                self._pending = self._pending[1:]
+        return events
+
+    def flush(self) -> List[Tuple[str, str]]:
+        events = []
+        self._emit(events, self._pending)
+        self._pending = ""
+        return events
+
+    def _emit(self, events: List[Tuple[str, str]], text: str) -> None:
+        if text and self.section is not None:
+            events.append((self.section, text))
+
+
+def stream_answer(processor, vectorstore, question: str, store_name: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+    """Yield ("references" | "thinking" | "answer" | "done", data) events for a question.
+
+    References are sent as soon as retrieval finishes; thinking and answer text
+    follow as the LLM streams them; "done" carries the same dict
+    ``answer_question`` returns, which is also stored in the answer cache.
+    """
+    version = store_fingerprint(store_name) if store_name else None
+    embedding = None
+    if version is not None:
+        cached, embedding, similarity = answer_cache.lookup(store_name, version, question, processor.embedding_model)
+        if cached is not None:
+            result = answer_cache.hit_result(cached, question, similarity)
+            yield "references", result.get("references", [])
+            yield "thinking", result.get("thinking_process", "")
+            yield "answer", result.get("answer", "")
+            yield "done", result
+            return
+
+    expanded_query, similar_docs = processor.retrieve_context(vectorstore, question, embedding)
+    yield "references", processor.format_references(similar_docs)
+    if not similar_docs:
+        yield "done", dict(NO_CONTEXT_ANSWER)
+        return
+
+    splitter = TaggedStreamSplitter()
+    deltas = []
+    context = processor.build_context(similar_docs)
+    for delta in processor.stream_groq_llm(processor.answer_prompt(question, context)):
+        deltas.append(delta)
+        yield from splitter.feed(delta)
+    yield from splitter.flush()
+
+    result = processor.build_answer(question, expanded_query, similar_docs, "".join(deltas), context)
+    result["cached"] = False
+    if version is not None:
+        answer_cache.put(store_name, version, question, embedding, result)
+    yield "done", result
+
+
+async def answer_question_async(processor, vectorstore, question: str, store_name: Optional[str] = None) -> Dict:
+    """``answer_question`` for async views.
+
+    Cache lookups, the query embedding and the FAISS/BM25 search run on the
+    blocking pool; the Groq call is awaited on the async HTTP client, so no
+    thread is held while the LLM generates. Concurrent duplicates, sync or
+    async, share one computation.
+    """
+    if store_name is None:
+        return await _answer_question_async(processor, vectorstore, question, store_name)
+    return await answer_flight.do_async(
+        (store_name, normalize_question(question)),
+        lambda: _answer_question_async(processor, vectorstore, question, store_name)
+    )
+
+
+async def _answer_question_async(processor, vectorstore, question: str, store_name: Optional[str]) -> Dict:
+    version = await run_blocking(store_fingerprint, store_name) if store_name else None
+    embedding = None
+    if version is not None:
+        cached, embedding, similarity = await run_blocking(
+            answer_cache.lookup, store_name, version, question, processor.embedding_model
+        )
+        if cached is not None:
+            return answer_cache.hit_result(cached, question, similarity)
+
+    expanded_query, similar_docs = await run_blocking(processor.retrieve_context, vectorstore, question, embedding)
+    if not similar_docs:
+        return dict(NO_CONTEXT_ANSWER)
+
+    context = processor.build_context(similar_docs)
+    llm_response = await processor.call_groq_llm_async(processor.answer_prompt(question, context))
+    result = processor.build_answer(question, expanded_query, similar_docs, llm_response, context)
+    result["cached"] = False
+    if version is not None:
+        await run_blocking(answer_cache.put, store_name, version, question, embedding, result)
+    return result
@@ -6,22 +6,33 @@ from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny
 from django.middleware.csrf import get_token
 from rest_framework.decorators import api_view
-from django.http import JsonResponse
-from .pdf_processor import PDFProcessor
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 import os
+import shutil
+import uuid
 from django.conf import settings
-from .models import UserPDF, PDFConversation, ChapterGeneration
+from .models import UserPDF, PDFConversation, ChapterGeneration, PDFDocument
 import json
+import logging
 from .firebase_auth import FirebaseAuthentication
 from rest_framework.permissions import IsAuthenticated
+import time
 import traceback
 from django.contrib.auth import get_user_model
-from .utils import generate_chapter_names  
-from .yt_processor import YouTubeProcessor
-from .models import UserYouTubeVideo, YouTubeConversation,ChapterResource
-from .yt_processor import YouTubeProcessor
-from .models import ChapterVideoResource, ChapterWebResource
-from .utils import get_video_resources, get_web_resources   
+from .utils import generate_chapter_names, generate_chapter_names_batch
+from .models import UserYouTubeVideo, YouTubeConversation,ChapterResource, YouTubeVectorStore
+from .utils import get_video_resources, get_web_resources
+from .chapter_resources import (
+    claim_chapters, fetch_in_progress, load_chapters, prefetch_resources_on_commit,
+    resolve_chapter_resources, resource_prefetcher, wait_for_fetches
+)
+from .store_cache import vector_store_cache, vector_store_path
+from .answer_cache import answer_cache
+from .processors import get_pdf_processor, get_youtube_processor
+from .pagination import InvalidPageRequest, keyset_page
+from .single_flight import pdf_processing_flight
 from django.contrib.auth import get_user_model
 import cloudinary
 import cloudinary.uploader
@@ -115,13 +126,12 @@ class ChapterAPI(APIView):
                 grade=grade
             )
             
-            # Save chapters without resources
-            for i, chapter_name in enumerate(chapters):
-                ChapterResource.objects.create(
-                    generation=generation,
-                    name=chapter_name,
-                    position=i
-                )
+            # Save chapters without resources; the prefetch worker looks them up in the background
+            ChapterResource.objects.bulk_create([
+                ChapterResource(generation=generation, name=chapter_name, position=i)
+                for i, chapter_name in enumerate(chapters)
+            ])
+            prefetch_resources_on_commit(generation.id)
             
             return JsonResponse({
                 'status': True,
@@ -136,6 +146,69 @@ class ChapterAPI(APIView):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
         
+class ChapterBatchAPI(APIView):
+    """Chapter lists for many topics in one request, e.g. a whole syllabus.
+
+    Body: {"items": [{"topic": ..., "grade": ...}, ...]} or {"topics": [...], "grade": ...}.
+    With "save": true each generated list is also stored as a chapter generation
+    for the user, as ChapterAPI does.
+    """
+    authentication_classes = [FirebaseAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            items = request.data.get('items')
+            if items is None:
+                grade = request.data.get('grade')
+                topics = request.data.get('topics') or []
+                if not isinstance(topics, list):
+                    return JsonResponse({'error': 'topics must be a list'}, status=400)
+                items = [{'topic': topic, 'grade': grade} for topic in topics]
+            if not isinstance(items, list) or not items:
+                return JsonResponse({'error': 'Provide items [{topic, grade}] or topics with a grade'}, status=400)
+            if len(items) > settings.CHAPTER_BATCH_MAX_ITEMS:
+                return JsonResponse({
+                    'error': f'At most {settings.CHAPTER_BATCH_MAX_ITEMS} topics per request'
+                }, status=400)
+            pairs = []
+            for item in items:
+                if not isinstance(item, dict) or not item.get('topic') or not item.get('grade'):
+                    return JsonResponse({'error': 'Topic and grade are required for every item'}, status=400)
+                pairs.append((str(item['topic']), str(item['grade'])))
+
+            results = generate_chapter_names_batch(pairs)
+
+            if request.data.get('save'):
+                saved = [result for result in results if result['status'] == 'ok']
+                with transaction.atomic():
+                    generations = ChapterGeneration.objects.bulk_create([
+                        ChapterGeneration(user=request.user, topic=result['topic'], grade=result['grade'])
+                        for result in saved
+                    ])
+                    ChapterResource.objects.bulk_create([
+                        ChapterResource(generation=generation, name=name, position=i)
+                        for generation, result in zip(generations, saved)
+                        for i, name in enumerate(result['chapters'])
+                    ])
+                    for generation, result in zip(generations, saved):
+                        result['generation_id'] = generation.id
+                        prefetch_resources_on_commit(generation.id)
+
+            return JsonResponse({
+                'status': True,
+                'data': {
+                    'results': results,
+                    'total': len(results),
+                    'generated': sum(1 for r in results if r['status'] == 'ok' and not r['cached']),
+                    'cached': sum(1 for r in results if r['cached']),
+                    'failed': sum(1 for r in results if r['status'] != 'ok'),
+                }
+            })
+
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
 @api_view(['GET'])
 def get_csrf_token(request):
     return JsonResponse({'csrfToken': get_token(request)})
@@ -147,15 +220,21 @@ class ChapterGenerationHistoryAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        generations = ChapterGeneration.objects.filter(user=request.user).order_by('-created_at')
+        generations = ChapterGeneration.objects.filter(user=request.user).annotate(
+            chapter_count=Count('chapters')
+        )
+        try:
+            page = keyset_page(generations, request.query_params, 'created_at')
+        except InvalidPageRequest as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         data = [{
             'id': gen.id,
             'topic': gen.topic,
             'grade': gen.grade,
             'created_at': gen.created_at,
-            'chapter_count': gen.chapters.count()
-        } for gen in generations]
-        return JsonResponse({'data': data})
+            'chapter_count': gen.chapter_count
+        } for gen in page.rows]
+        return JsonResponse({'data': data, **page.meta()})
     
     
 class DeleteChapterGenerationAPI(APIView):
@@ -190,37 +269,30 @@ class ChapterResourcesAPI(APIView):
     def get(self, request, generation_id):
         try:
             generation = ChapterGeneration.objects.get(id=generation_id, user=request.user)
-            chapters = generation.chapters.all().order_by('position')
-            
+            # ?wait=false returns what is ready now and leaves the rest to the background prefetch
+            wait = request.query_params.get('wait', 'true').lower() != 'false'
+            chapters = load_chapters(generation)
+
+            unresolved = [chapter.id for chapter in chapters if chapter.resources_status != ChapterResource.RESOURCES_READY]
+            pending = {}
+            if unresolved and not wait:
+                # A poll while another worker holds the claim has nothing to add
+                if not fetch_in_progress(generation):
+                    resource_prefetcher.enqueue(generation.id)
+            elif unresolved:
+                # Search for chapters nobody is working on now; wait for the ones the prefetch already claimed.
+                # Both steps share one deadline so the request is bounded by RESOURCE_FETCH_TIMEOUT_SECONDS
+                deadline = time.monotonic() + settings.RESOURCE_FETCH_TIMEOUT_SECONDS
+                claimed = claim_chapters(unresolved)
+                if claimed:
+                    pending = resolve_chapter_resources(generation, [c for c in chapters if c.id in claimed],
+                                                        max(0.0, deadline - time.monotonic()))
+                if len(claimed) < len(unresolved):
+                    wait_for_fetches(generation, max(0.0, deadline - time.monotonic()))
+                chapters = load_chapters(generation)
+
             data = []
             for chapter in chapters:
-                # Check if chapter already has resources
-                has_resources = chapter.videos.exists() or chapter.websites.exists()
-                
-                if not has_resources:
-                    # Generate and save resources if none exist
-                    videos = get_video_resources(generation.topic, generation.grade, chapter.name)
-                    websites = get_web_resources(generation.topic, generation.grade, chapter.name)
-                    
-                    # Save videos
-                    for video in videos[:4]:  # Limit to 4 videos
-                        ChapterVideoResource.objects.create(
-                            chapter=chapter,
-                            title=video['title'],
-                            url=video['url'],
-                            channel=video['channel'],
-                            duration=video['duration']
-                        )
-                    
-                    # Save websites
-                    for website in websites[:4]:  # Limit to 4 websites
-                        ChapterWebResource.objects.create(
-                            chapter=chapter,
-                            title=website['title'],
-                            url=website['url'],
-                            source=website['source']
-                        )
-                
                 # Get all resources (either existing or newly created)
                 chapter_data = {
                     'id': chapter.id,
@@ -235,12 +307,18 @@ class ChapterResourcesAPI(APIView):
                         'title': w.title,
                         'url': w.url,
                         'source': w.source
-                    } for w in chapter.websites.all()]
+                    } for w in chapter.websites.all()],
+                    'status': chapter.resources_status,
+                    # Searches that failed or timed out; they are retried on the next request
+                    'pending': pending.get(chapter.id, [])
                 }
                 data.append(chapter_data)
-            
-            return JsonResponse({'data': data})
-            
+
+            return JsonResponse({
+                'data': data,
+                'partial': any(chapter.resources_status != ChapterResource.RESOURCES_READY for chapter in chapters)
+            })
+
         except ChapterGeneration.DoesNotExist:
             return JsonResponse({'error': 'Not found'}, status=404)
 
@@ -354,6 +432,96 @@ class WebResourcesAPI(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 
+def destroy_cloudinary_pdf(public_id):
+    try:
+        result = cloudinary.uploader.destroy(
+            public_id,
+            resource_type='raw',
+            invalidate=True  # Optional: purge CDN cache
+        )
+        if result.get('result') == 'ok':
+            print(f"Successfully deleted from Cloudinary: {public_id}")
+        else:
+            print(f"Cloudinary deletion failed: {result.get('result')}")
+    except Exception as e:
+        print(f"Error deleting from Cloudinary: {str(e)}")
+
+
+def delete_pdf_files(public_id, store_name):
+    """Remove an uploaded PDF and its vector store; call once no row references them"""
+    if public_id:
+        destroy_cloudinary_pdf(public_id)
+    delete_vector_store(store_name)
+
+
+def register_pdf_document(file_hash, size, cloudinary_url, public_id, store_name):
+    """The PDFDocument for ``file_hash`` after this worker built ``store_name`` for it.
+
+    Another worker may have ingested the same content at the same time. Under
+    the row lock, a document whose store still exists wins and this build's
+    upload and store are removed once the transaction commits; a document
+    whose store has gone is repointed at this build instead.
+    """
+    try:
+        with transaction.atomic():
+            document = PDFDocument.objects.select_for_update().filter(sha256=file_hash).first()
+            if document is None:
+                return PDFDocument.objects.create(
+                    sha256=file_hash,
+                    public_id=public_id,
+                    cloudinary_url=cloudinary_url,
+                    vector_store=store_name,
+                    size=size
+                )
+            if os.path.exists(vector_store_path(document.vector_store)):
+                transaction.on_commit(lambda: delete_pdf_files(public_id, store_name), robust=True)
+                return document
+
+            old_public_id, old_store_name = document.public_id, document.vector_store
+            document.public_id, document.cloudinary_url, document.vector_store = public_id, cloudinary_url, store_name
+            document.save(update_fields=['public_id', 'cloudinary_url', 'vector_store'])
+            document.user_pdfs.update(file=public_id, vector_store=store_name)
+            transaction.on_commit(lambda: delete_pdf_files(old_public_id, old_store_name), robust=True)
+            return document
+    except IntegrityError:
+        # Another worker inserted the row after the lookup above; settle against its row instead
+        return register_pdf_document(file_hash, size, cloudinary_url, public_id, store_name)
+
+
+def ingest_pdf(processor, pdf_file, file_hash, user):
+    """Upload, parse and embed a PDF, returning its registered PDFDocument"""
+    # Process the PDF with user ID for Cloudinary organization
+    chunks, cloudinary_url, public_id = processor.process_pdf(
+        pdf_file,
+        user_id=user.firebase_uid
+    )
+
+    # Named by content plus a per-build suffix, so concurrent builds of the same file never share a directory
+    store_name = f"book_{file_hash}_{uuid.uuid4().hex[:8]}"
+    try:
+        processor.create_vector_store(chunks, store_name)
+    except Exception:
+        delete_pdf_files(public_id, store_name)
+        raise
+
+    return register_pdf_document(file_hash, pdf_file.size, cloudinary_url, public_id, store_name)
+
+
+def attach_pdf_document(user, file_name, document):
+    """Save the user's upload of ``document``, or None if the document or its store was deleted meanwhile"""
+    with transaction.atomic():
+        document = PDFDocument.objects.select_for_update().filter(id=document.id).first()
+        if document is None or not os.path.exists(vector_store_path(document.vector_store)):
+            return None
+        return UserPDF.objects.create(
+            user=user,
+            file_name=file_name,
+            file=document.public_id,  # Cloudinary public_id
+            vector_store=document.vector_store,
+            document=document
+        )
+
+
 class PDFQAAPI(APIView):
     parser_classes = [MultiPartParser]
     authentication_classes = [FirebaseAuthentication]
@@ -391,25 +559,23 @@ class PDFQAAPI(APIView):
             # Ensure file pointer is at start
             pdf_file.seek(0)
             
-            processor = PDFProcessor()
-            
-            # Process the PDF with user ID for Cloudinary organization
-            chunks, cloudinary_url, public_id = processor.process_pdf(
-                pdf_file,
-                user_id=request.user.firebase_uid
-            )
+            processor = get_pdf_processor()
             
-            # Create unique store name
-            store_name = f"book_{request.user.firebase_uid}_{os.path.splitext(pdf_file.name)[0]}"
-            processor.create_vector_store(chunks, store_name)
+            # Identical content (from any user) is parsed, embedded and uploaded only once
+            file_hash = processor.compute_file_hash(pdf_file)
+            document = PDFDocument.objects.filter(sha256=file_hash).first()
+            reused = document is not None and os.path.exists(vector_store_path(document.vector_store))
+            user_pdf = attach_pdf_document(request.user, pdf_file.name, document) if reused else None
             
-            # Save to database
-            user_pdf = UserPDF.objects.create(
-                user=request.user,
-                file_name=pdf_file.name,
-                file=public_id,  # Cloudinary public_id
-                vector_store=store_name
-            )
+            if user_pdf is None:
+                reused = False
+                # Concurrent uploads of the same content in this worker share one ingestion
+                document = pdf_processing_flight.do(
+                    file_hash, lambda: ingest_pdf(processor, pdf_file, file_hash, request.user)
+                )
+                user_pdf = attach_pdf_document(request.user, pdf_file.name, document)
+                if user_pdf is None:
+                    raise RuntimeError("Vector store was deleted while the PDF was being processed")
             
             return JsonResponse({
                 'status': True,
@@ -417,9 +583,10 @@ class PDFQAAPI(APIView):
                 'data': {
                     'id': user_pdf.id,
                     'file_name': user_pdf.file_name,
-                    'cloudinary_url': cloudinary_url,
+                    'cloudinary_url': document.cloudinary_url,
                     'upload_time': user_pdf.upload_time,
-                    'size': pdf_file.size  # Return file size for reference
+                    'size': pdf_file.size,  # Return file size for reference
+                    'reused_document': reused
                 }
             }, status=status.HTTP_200_OK)
             
@@ -476,13 +643,13 @@ class QuestionAnswerAPI(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            processor = PDFProcessor()
+            processor = get_pdf_processor()
             print("!! DEBUG: Loading vector store...")
             vs = processor.load_vector_store(user_pdf.vector_store)
             print("!! DEBUG: Vector store loaded successfully")
             
             print("!! DEBUG: Generating answer...")
-            answer = processor.answer_question(vs, question)
+            answer = processor.answer_question(vs, question, store_name=user_pdf.vector_store)
             print("!! DEBUG: Answer generated:", answer)
             
             # Save conversation
@@ -516,21 +683,99 @@ class QuestionAnswerAPI(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 
+def sse_event(event, data):
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def answer_event_stream(processor, vectorstore, question, store_name, save_conversation):
+    """SSE frames for a streamed answer; the conversation is saved once the answer is complete"""
+    try:
+        for event, data in processor.stream_answer(vectorstore, question, store_name=store_name):
+            if event == "done":
+                save_conversation(data)
+            yield sse_event(event, data)
+    except Exception as e:
+        logging.exception("Streaming answer failed")
+        yield sse_event("error", {'error': str(e), 'message': 'Failed to answer question'})
+
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    return response
+
+
+class QuestionAnswerStreamAPI(APIView):
+    """Streaming variant of QuestionAnswerAPI: references, then thinking/answer tokens, over SSE"""
+    authentication_classes = [FirebaseAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        pdf_id = request.data.get('pdf_id')
+        question = request.data.get('question')
+        
+        if not pdf_id or not question:
+            return JsonResponse(
+                {'error': 'Both pdf_id and question are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            user_pdf = UserPDF.objects.get(id=pdf_id, user=request.user)
+            processor = get_pdf_processor()
+            vs = processor.load_vector_store(user_pdf.vector_store)
+        except UserPDF.DoesNotExist:
+            return JsonResponse({
+                'status': False,
+                'error': 'PDF not found',
+                'message': 'You do not have access to this PDF'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except FileNotFoundError:
+            return JsonResponse(
+                {'error': 'Vector store not found. Please re-upload the PDF.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def save_conversation(answer):
+            PDFConversation.objects.create(pdf=user_pdf, question=question, answer=json.dumps(answer))
+
+        return sse_response(answer_event_stream(processor, vs, question, user_pdf.vector_store, save_conversation))
+
+
 class UserPDFListAPI(APIView):
     authentication_classes = [FirebaseAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        pdfs = UserPDF.objects.filter(user=request.user).order_by('-upload_time')
+        pdfs = UserPDF.objects.filter(user=request.user).annotate(
+            conversation_count=Count('conversations')
+        )
+        try:
+            page = keyset_page(pdfs, request.query_params, 'upload_time')
+        except InvalidPageRequest as e:
+            return JsonResponse({'status': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         data = [{
             'id': pdf.id,
             'file_name': pdf.file_name,
             'cloudinary_url': pdf.get_file_url(),  # Use the helper method
             'upload_time': pdf.upload_time,
-            'conversation_count': pdf.conversations.count()
-        } for pdf in pdfs]
-        return JsonResponse({'status': True, 'data': data})
+            'conversation_count': pdf.conversation_count
+        } for pdf in page.rows]
+        return JsonResponse({'status': True, 'data': data, **page.meta()})
     
+def conversation_history_response(conversations, params):
+    """A page of question/answer history"""
+    page = keyset_page(conversations, params, 'created_at')
+    data = [{
+        'question': conv.question,
+        'answer': json.loads(conv.answer),
+        'created_at': conv.created_at
+    } for conv in page.rows]
+    return JsonResponse({'status': True, 'data': data, **page.meta()})
+
+
 class PDFConversationHistoryAPI(APIView):
     authentication_classes = [FirebaseAuthentication]
     permission_classes = [IsAuthenticated]
@@ -538,13 +783,9 @@ class PDFConversationHistoryAPI(APIView):
     def get(self, request, pdf_id):
         try:
             user_pdf = UserPDF.objects.get(id=pdf_id, user=request.user)
-            conversations = user_pdf.conversations.all().order_by('-created_at')[:50]
-            data = [{
-                'question': conv.question,
-                'answer': json.loads(conv.answer),
-                'created_at': conv.created_at
-            } for conv in conversations]
-            return JsonResponse({'status': True, 'data': data})
+            return conversation_history_response(user_pdf.conversations.all(), request.query_params)
+        except InvalidPageRequest as e:
+            return JsonResponse({'status': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except UserPDF.DoesNotExist:
             return JsonResponse({
                 'status': False,
@@ -559,37 +800,26 @@ class DeletePDFAPI(APIView):
         try:
             user_pdf = UserPDF.objects.get(id=pdf_id, user=request.user)
 
-            # Delete from Cloudinary
-            if user_pdf.file:  # This is the CloudinaryField
-                try:
-                    # Get the public_id from the Cloudinary resource
-                    public_id = user_pdf.file.public_id
-                    # Destroy using the public_id
-                    result = cloudinary.uploader.destroy(
-                        public_id,
-                        resource_type='raw',
-                        invalidate=True  # Optional: purge CDN cache
-                    )
-                    if result.get('result') == 'ok':
-                        print(f"Successfully deleted from Cloudinary: {public_id}")
-                    else:
-                        print(f"Cloudinary deletion failed: {result.get('result')}")
-                except Exception as e:
-                    print(f"Error deleting from Cloudinary: {str(e)}")
-                    # Continue with deletion even if Cloudinary fails
-
-            # Delete vector store
-            vectorstore_path = os.path.join(
-                settings.BASE_DIR, 
-                "vectorstores", 
-                user_pdf.vector_store
-            )
-            if os.path.exists(vectorstore_path):
-                import shutil
-                shutil.rmtree(vectorstore_path)
+            with transaction.atomic():
+                document_in_use = False
+                if user_pdf.document_id:
+                    # Shared document: only remove it once the last upload referencing it is gone
+                    document = PDFDocument.objects.select_for_update().get(id=user_pdf.document_id)
+                    document_in_use = document.user_pdfs.exclude(id=user_pdf.id).exists()
 
-            # Delete database record
-            user_pdf.delete()
+                # Delete database record
+                user_pdf.delete()
+
+                if not document_in_use:
+                    if user_pdf.document_id:
+                        document.delete()
+
+                    # Delete from Cloudinary and the vector store only once the rows are gone for good
+                    public_id = None
+                    if user_pdf.file:  # This is the CloudinaryField
+                        public_id = document.public_id if user_pdf.document_id else user_pdf.file.public_id
+                    store_name = user_pdf.vector_store
+                    transaction.on_commit(lambda: delete_pdf_files(public_id, store_name), robust=True)
 
             return JsonResponse({
                 'status': True,
@@ -610,6 +840,121 @@ class DeletePDFAPI(APIView):
 
 
 
+def find_shared_store(processor, video_id):
+    """(store another user already built for this video and chunking, whether it can be reused)"""
+    shared_store = YouTubeVectorStore.objects.find_existing(
+        video_id,
+        processor.supported_languages,
+        processor.chunk_size,
+        processor.chunk_overlap
+    )
+    return shared_store, shared_store is not None and os.path.exists(vector_store_path(shared_store.store_name))
+
+
+def register_shared_store(processor, video_id, processing_result):
+    """The YouTubeVectorStore for this video and chunking after this worker built a store for it.
+
+    As with ``register_pdf_document``: under the row lock, a registered store
+    whose files still exist wins and this build is removed once the
+    transaction commits; a registered store whose files have gone is
+    repointed at this build instead.
+    """
+    store_name = processing_result['store_name']
+    try:
+        with transaction.atomic():
+            shared_store = YouTubeVectorStore.objects.select_for_update().filter(
+                video_id=video_id,
+                language=processing_result['language'],
+                chunk_size=processor.chunk_size,
+                chunk_overlap=processor.chunk_overlap
+            ).first()
+            if shared_store is None:
+                return YouTubeVectorStore.objects.create(
+                    video_id=video_id,
+                    language=processing_result['language'],
+                    chunk_size=processor.chunk_size,
+                    chunk_overlap=processor.chunk_overlap,
+                    store_name=store_name,
+                    video_title=processing_result['video_info'].get('title', ''),
+                    thumbnail_url=processing_result['video_info'].get('thumbnail', '')
+                )
+            if os.path.exists(vector_store_path(shared_store.store_name)):
+                transaction.on_commit(lambda: delete_vector_store(store_name), robust=True)
+                return shared_store
+
+            old_store_name = shared_store.store_name
+            shared_store.store_name = store_name
+            shared_store.save(update_fields=['store_name'])
+            shared_store.videos.update(vector_store=store_name)
+            transaction.on_commit(lambda: delete_vector_store(old_store_name), robust=True)
+            return shared_store
+    except IntegrityError:
+        # Another worker inserted the row after the lookup above; settle against its row instead
+        return register_shared_store(processor, video_id, processing_result)
+
+
+def attach_shared_store(user, video_url, video_id, shared_store):
+    """Save the user's video on ``shared_store``, or None if the store was deleted meanwhile.
+
+    The store row is locked while its files are checked and the video row is
+    added, so a concurrent delete of the store's last video either sees this
+    reference or runs before it and is noticed here.
+    """
+    with transaction.atomic():
+        shared_store = YouTubeVectorStore.objects.select_for_update().filter(id=shared_store.id).first()
+        if shared_store is None or not os.path.exists(vector_store_path(shared_store.store_name)):
+            return None
+        return UserYouTubeVideo.objects.create(
+            user=user,
+            video_url=video_url,
+            video_id=video_id,
+            video_title=shared_store.video_title,
+            thumbnail_url=shared_store.thumbnail_url,
+            vector_store=shared_store.store_name,
+            store=shared_store
+        )
+
+
+def attach_or_process_video(processor, user, video_url, video_id):
+    """(user video, whether an existing store was reused), building the store first if there is none to reuse"""
+    shared_store, reused = find_shared_store(processor, video_id)
+    if reused:
+        user_video = attach_shared_store(user, video_url, video_id, shared_store)
+        if user_video is not None:
+            return user_video, True
+
+    # This handles transcript loading and vector store creation
+    processing_result = processor.process_video(video_url)
+    shared_store = register_shared_store(processor, video_id, processing_result)
+    user_video = attach_shared_store(user, video_url, video_id, shared_store)
+    if user_video is None:
+        raise RuntimeError("Vector store was deleted while the video was being processed")
+    return user_video, False
+
+
+def delete_vector_store(store_name):
+    """Remove a store's files and cached state; call once nothing references it"""
+    vectorstore_path = vector_store_path(store_name)
+    if os.path.exists(vectorstore_path):
+        shutil.rmtree(vectorstore_path)
+    vector_store_cache.invalidate(store_name)
+    answer_cache.invalidate(store_name)
+
+
+def youtube_video_response(user_video, reused):
+    return JsonResponse({
+        'status': True,
+        'message': 'YouTube video processed successfully',
+        'data': {
+            'id': user_video.id,
+            'video_title': user_video.video_title,
+            'thumbnail_url': user_video.thumbnail_url,
+            'upload_time': user_video.upload_time,
+            'reused_store': reused
+        }
+    })
+
+
 class YouTubeVideoAPI(APIView):
     authentication_classes = [FirebaseAuthentication]
     permission_classes = [IsAuthenticated]
@@ -623,35 +968,13 @@ class YouTubeVideoAPI(APIView):
             )
         
         try:
-            processor = YouTubeProcessor()
-            
-            # Process video
+            processor = get_youtube_processor()
             video_id = processor.extract_video_id(video_url)
-            store_name = f"yt_{request.user.firebase_uid}_{video_id}"
             
-            # This handles transcript loading and vector store creation
-            processing_result = processor.process_video(video_url, store_name)
-            
-            # Save to database
-            user_video = UserYouTubeVideo.objects.create(
-                user=request.user,
-                video_url=video_url,
-                video_id=video_id,
-                video_title=processing_result['video_info'].get('title', ''),
-                thumbnail_url=processing_result['video_info'].get('thumbnail', ''),
-                vector_store=store_name
-            )
+            # Reuse a store another user already built for this video and chunking
+            user_video, reused = attach_or_process_video(processor, request.user, video_url, video_id)
             
-            return JsonResponse({
-                'status': True,
-                'message': 'YouTube video processed successfully',
-                'data': {
-                    'id': user_video.id,
-                    'video_title': user_video.video_title,
-                    'thumbnail_url': user_video.thumbnail_url,
-                    'upload_time': user_video.upload_time
-                }
-            })
+            return youtube_video_response(user_video, reused)
             
         except Exception as e:
             return JsonResponse({
@@ -677,13 +1000,13 @@ class YouTubeQuestionAPI(APIView):
         try:
             # Verify video belongs to user
             user_video = UserYouTubeVideo.objects.get(id=video_id, user=request.user)
-            processor = YouTubeProcessor()
+            processor = get_youtube_processor()
             
             # Load vector store
             vs = processor.load_vector_store(user_video.vector_store)
             
             # Generate answer
-            answer = processor.answer_question(vs, question)
+            answer = processor.answer_question(vs, question, store_name=user_video.vector_store)
             
             # Save conversation
             YouTubeConversation.objects.create(
@@ -710,20 +1033,78 @@ class YouTubeQuestionAPI(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class YouTubeQuestionStreamAPI(APIView):
+    """Streaming variant of YouTubeQuestionAPI: references, then thinking/answer tokens, over SSE"""
+    authentication_classes = [FirebaseAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        video_id = request.data.get('video_id')
+        question = request.data.get('question')
+        
+        if not video_id or not question:
+            return JsonResponse(
+                {'error': 'Both video_id and question are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            user_video = UserYouTubeVideo.objects.get(id=video_id, user=request.user)
+            processor = get_youtube_processor()
+            vs = processor.load_vector_store(user_video.vector_store)
+        except UserYouTubeVideo.DoesNotExist:
+            return JsonResponse({
+                'status': False,
+                'error': 'Video not found or access denied'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except FileNotFoundError:
+            return JsonResponse({
+                'status': False,
+                'error': 'Vector store not found. Please re-process the video.'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        def save_conversation(answer):
+            YouTubeConversation.objects.create(video=user_video, question=question, answer=json.dumps(answer))
+
+        return sse_response(answer_event_stream(processor, vs, question, user_video.vector_store, save_conversation))
+
+
 class YouTubeVideoListAPI(APIView):
     authentication_classes = [FirebaseAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        videos = UserYouTubeVideo.objects.filter(user=request.user).order_by('-upload_time')
+        videos = UserYouTubeVideo.objects.filter(user=request.user).annotate(
+            conversation_count=Count('conversations')
+        )
+        try:
+            page = keyset_page(videos, request.query_params, 'upload_time')
+        except InvalidPageRequest as e:
+            return JsonResponse({'status': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         data = [{
             'id': video.id,
             'video_title': video.video_title,
             'thumbnail_url': video.thumbnail_url,
             'upload_time': video.upload_time,
-            'conversation_count': video.conversations.count()
-        } for video in videos]
-        return JsonResponse({'status': True, 'data': data})
+            'conversation_count': video.conversation_count
+        } for video in page.rows]
+        return JsonResponse({'status': True, 'data': data, **page.meta()})
+
+class YouTubeConversationHistoryAPI(APIView):
+    authentication_classes = [FirebaseAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, video_id):
+        try:
+            user_video = UserYouTubeVideo.objects.get(id=video_id, user=request.user)
+            return conversation_history_response(user_video.conversations.all(), request.query_params)
+        except InvalidPageRequest as e:
+            return JsonResponse({'status': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except UserYouTubeVideo.DoesNotExist:
+            return JsonResponse({
+                'status': False,
+                'error': 'Video not found or access denied'
+            }, status=status.HTTP_404_NOT_FOUND)
 
 class YouTubeVideoDeleteAPI(APIView):
     authentication_classes = [FirebaseAuthentication]
@@ -733,18 +1114,23 @@ class YouTubeVideoDeleteAPI(APIView):
         try:
             user_video = UserYouTubeVideo.objects.get(id=video_id, user=request.user)
             
-            # Delete vector store
-            vectorstore_path = os.path.join(
-                settings.BASE_DIR, 
-                "vectorstores", 
-                user_video.vector_store
-            )
-            if os.path.exists(vectorstore_path):
-                import shutil
-                shutil.rmtree(vectorstore_path)
-            
-            # Delete database record
-            user_video.delete()
+            with transaction.atomic():
+                store_in_use = False
+                if user_video.store_id:
+                    # Shared store: only remove it once the last reference is gone
+                    shared_store = YouTubeVectorStore.objects.select_for_update().get(id=user_video.store_id)
+                    store_in_use = shared_store.videos.exclude(id=user_video.id).exists()
+                
+                # Delete database record
+                user_video.delete()
+                
+                if not store_in_use:
+                    if user_video.store_id:
+                        shared_store.delete()
+                    
+                    # Delete vector store files only once the rows are gone for good
+                    store_name = user_video.vector_store
+                    transaction.on_commit(lambda: delete_vector_store(store_name), robust=True)
             
             return JsonResponse({
                 'status': True,
@@ -775,6 +1161,47 @@ from .utils import (
 )
 
 
+def combine_video_mcqs(all_mcqs):
+    """Up to 10 questions, taking 2/3/2/3 from the four videos and topping up from their extras"""
+    goal_distribution = [2, 3, 2, 3]
+
+    # Step 1: Try to assign original goal distribution
+    combined_questions = []
+    leftovers = []
+
+    for mcqs, goal in zip(all_mcqs, goal_distribution):
+        if mcqs:
+            to_add = mcqs[:goal]
+            combined_questions.extend(to_add)
+            if len(mcqs) > goal:
+                leftovers.extend(mcqs[goal:])
+        else:
+            # This video failed or returned empty
+            continue
+
+    # Step 2: Fill remaining questions from leftovers if total < 10
+    while len(combined_questions) < 10 and leftovers:
+        combined_questions.append(leftovers.pop(0))
+
+    # Step 3: If still not enough, just return what we have
+    return combined_questions[:10]
+
+
+def save_multi_mcqs(combined_questions):
+    # Save to JSON
+    save_path = os.path.join(settings.BASE_DIR, "transcripts", "multi_mcqs.json")
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    with open(save_path, "w", encoding="utf-8") as f:
+        json.dump(combined_questions, f, indent=4)
+
+    return JsonResponse({
+        "status": True,
+        "total_questions": len(combined_questions),
+        "questions": combined_questions,
+        "saved_to": "/transcripts/multi_mcqs.json"
+    }, status=200)
+
+
 class MultiVideoMCQAPI(APIView):
     permission_classes = [AllowAny]
 
@@ -783,8 +1210,6 @@ class MultiVideoMCQAPI(APIView):
         if not video_urls or len(video_urls) != 4:
             return JsonResponse({"error": "Provide exactly 4 video URLs"}, status=400)
 
-        goal_distribution = [2, 3, 2, 3]
-
         from .utils import get_transcript_chunks_from_youtube
 
         def process_video(video_url):
@@ -809,36 +1234,4 @@ class MultiVideoMCQAPI(APIView):
         with ThreadPoolExecutor(max_workers=4) as executor:
             all_mcqs = list(executor.map(process_video, video_urls))
 
-        # Step 1: Try to assign original goal distribution
-        combined_questions = []
-        leftovers = []
-
-        for mcqs, goal in zip(all_mcqs, goal_distribution):
-            if mcqs:
-                to_add = mcqs[:goal]
-                combined_questions.extend(to_add)
-                if len(mcqs) > goal:
-                    leftovers.extend(mcqs[goal:])
-            else:
-                # This video failed or returned empty
-                continue
-
-        # Step 2: Fill remaining questions from leftovers if total < 10
-        while len(combined_questions) < 10 and leftovers:
-            combined_questions.append(leftovers.pop(0))
-
-        # Step 3: If still not enough, just return what we have
-        combined_questions = combined_questions[:10]
-
-        # Save to JSON
-        save_path = os.path.join(settings.BASE_DIR, "transcripts", "multi_mcqs.json")
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(combined_questions, f, indent=4)
-
-        return JsonResponse({
-            "status": True,
-            "total_questions": len(combined_questions),
-            "questions": combined_questions,
-            "saved_to": "/transcripts/multi_mcqs.json"
-        }, status=200)
\ No newline at end of file
+        return save_multi_mcqs(combine_video_mcqs(all_mcqs))
\ No newline at end of file
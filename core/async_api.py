@@ -0,0 +1,210 @@
+import asyncio
+import json
+import traceback
+
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from .api import (
+    attach_shared_store, combine_video_mcqs, find_shared_store, register_shared_store, save_multi_mcqs,
+    youtube_video_response
+)
+from .blocking_pool import run_blocking
+from .firebase_auth import FirebaseAuthentication
+from .models import UserPDF, PDFConversation, UserYouTubeVideo, YouTubeConversation
+from .processors import get_pdf_processor, get_youtube_processor
+from .utils import get_video_id, get_transcript_chunks_from_youtube, generate_mcqs_from_transcript_async
+
+
+class AsyncAPIView(View):
+    """Base for the async (ASGI) counterparts of the DRF views.
+
+    Authenticates the Firebase bearer token like ``FirebaseAuthentication`` on
+    the blocking pool and exposes the JSON or form body as ``request.data``.
+    Under an ASGI server the handlers await upstream calls instead of parking
+    a worker thread for the whole request.
+    """
+    authentication = FirebaseAuthentication()
+    require_authentication = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.require_authentication:
+            try:
+                user_auth = await run_blocking(self.authentication.authenticate, request)
+            except AuthenticationFailed as e:
+                return JsonResponse({'detail': str(e.detail)}, status=status.HTTP_403_FORBIDDEN)
+            if user_auth is None:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            request.user = user_auth[0]
+
+        if request.content_type == 'application/json':
+            try:
+                request.data = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            request.data = request.POST
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncQuestionAnswerAPI(AsyncAPIView):
+    """QuestionAnswerAPI for ASGI workers"""
+
+    async def post(self, request):
+        pdf_id = request.data.get('pdf_id')
+        question = request.data.get('question')
+
+        if not pdf_id or not question:
+            return JsonResponse(
+                {'error': 'Both pdf_id and question are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            user_pdf = await UserPDF.objects.aget(id=pdf_id, user=request.user)
+            processor = await run_blocking(get_pdf_processor)
+            vs = await run_blocking(processor.load_vector_store, user_pdf.vector_store)
+            answer = await processor.answer_question_async(vs, question, store_name=user_pdf.vector_store)
+
+            await PDFConversation.objects.acreate(pdf=user_pdf, question=question, answer=json.dumps(answer))
+
+            return JsonResponse({
+                'status': True,
+                'data': answer
+            })
+
+        except UserPDF.DoesNotExist:
+            return JsonResponse({
+                'status': False,
+                'error': 'PDF not found',
+                'message': 'You do not have access to this PDF'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except FileNotFoundError:
+            return JsonResponse(
+                {'error': 'Vector store not found. Please re-upload the PDF.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            print(f"Async answer failed: {str(e)}")
+            print(traceback.format_exc())
+            return JsonResponse({
+                'status': False,
+                'error': str(e),
+                'message': 'Failed to answer question'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncYouTubeQuestionAPI(AsyncAPIView):
+    """YouTubeQuestionAPI for ASGI workers"""
+
+    async def post(self, request):
+        video_id = request.data.get('video_id')
+        question = request.data.get('question')
+
+        if not video_id or not question:
+            return JsonResponse(
+                {'error': 'Both video_id and question are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            user_video = await UserYouTubeVideo.objects.aget(id=video_id, user=request.user)
+            processor = await run_blocking(get_youtube_processor)
+            vs = await run_blocking(processor.load_vector_store, user_video.vector_store)
+            answer = await processor.answer_question_async(vs, question, store_name=user_video.vector_store)
+
+            await YouTubeConversation.objects.acreate(video=user_video, question=question, answer=json.dumps(answer))
+
+            return JsonResponse({
+                'status': True,
+                'data': answer
+            })
+
+        except UserYouTubeVideo.DoesNotExist:
+            return JsonResponse({
+                'status': False,
+                'error': 'Video not found or access denied'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return JsonResponse({
+                'status': False,
+                'error': str(e),
+                'message': 'Failed to answer question'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncYouTubeVideoAPI(AsyncAPIView):
+    """YouTubeVideoAPI for ASGI workers; the Data API lookup overlaps transcript fetching and embedding"""
+
+    async def post(self, request):
+        video_url = request.data.get('video_url')
+        if not video_url:
+            return JsonResponse(
+                {'error': 'YouTube video URL is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            processor = await run_blocking(get_youtube_processor)
+            video_id = processor.extract_video_id(video_url)
+
+            shared_store, reused = await run_blocking(find_shared_store, processor, video_id)
+            user_video = None
+            if reused:
+                user_video = await run_blocking(attach_shared_store, request.user, video_url, video_id, shared_store)
+            if user_video is None:
+                reused = False
+                processing_result = await processor.process_video_async(video_url)
+                shared_store = await run_blocking(register_shared_store, processor, video_id, processing_result)
+                user_video = await run_blocking(attach_shared_store, request.user, video_url, video_id, shared_store)
+                if user_video is None:
+                    raise RuntimeError("Vector store was deleted while the video was being processed")
+
+            return youtube_video_response(user_video, reused)
+
+        except Exception as e:
+            return JsonResponse({
+                'status': False,
+                'error': str(e),
+                'message': 'Failed to process YouTube video'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncMultiVideoMCQAPI(AsyncAPIView):
+    """MultiVideoMCQAPI for ASGI workers: the four videos are processed concurrently on one event loop"""
+    require_authentication = False
+
+    async def post(self, request):
+        video_urls = request.data.get("video_urls")
+        if not video_urls or len(video_urls) != 4:
+            return JsonResponse({"error": "Provide exactly 4 video URLs"}, status=400)
+
+        async def process_video(video_url):
+            try:
+                # Extract URL from dict if needed
+                video_url_str = video_url["url"] if isinstance(video_url, dict) else video_url
+
+                transcript_chunks = await run_blocking(get_transcript_chunks_from_youtube, video_url_str)
+                if not transcript_chunks:
+                    return []
+
+                video_id = await run_blocking(get_video_id, video_url_str)
+                _, mcqs = await generate_mcqs_from_transcript_async(transcript_chunks, video_id)
+                return mcqs or []
+
+            except Exception as e:
+                print(f"[ERROR] Processing failed for {video_url}: {str(e)}")
+                return []
+
+        all_mcqs = await asyncio.gather(*(process_video(video_url) for video_url in video_urls))
+        return await run_blocking(save_multi_mcqs, combine_video_mcqs(all_mcqs))
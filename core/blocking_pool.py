@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections
+
+T = TypeVar("T")
+
+
+class BlockingPool:
+    """Bounded thread pool that async views hand blocking work to.
+
+    FAISS searches, SDK calls without an async API and ORM queries run here so
+    the event loop keeps serving other requests; the pool size caps how many of
+    them run at once in this worker, and anything beyond it queues.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak_active = 0
+        self.completed = 0
+
+    def _call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            close_old_connections()
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._call, func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "peak_active": self.peak_active,
+                "completed": self.completed,
+            }
+
+
+blocking_pool = BlockingPool(settings.ASYNC_BLOCKING_POOL_WORKERS)
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    return await blocking_pool.run(func, *args, **kwargs)
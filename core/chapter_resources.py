@@ -0,0 +1,199 @@
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChapterGeneration, ChapterResource, ChapterVideoResource, ChapterWebResource
+from .utils import fetch_chapter_resources
+
+# A fetch claimed longer ago than this is assumed lost (worker restarted) and may be claimed again;
+# well above RESOURCE_FETCH_TIMEOUT_SECONDS, which bounds a fetch that is still alive
+CLAIM_TIMEOUT = timedelta(minutes=2)
+
+
+def load_chapters(generation: ChapterGeneration, chapter_ids: Iterable[int] = None) -> List[ChapterResource]:
+    chapters = generation.chapters.all().order_by('position').prefetch_related('videos', 'websites')
+    if chapter_ids is not None:
+        chapters = chapters.filter(id__in=list(chapter_ids))
+    return list(chapters)
+
+
+def claim_chapters(chapter_ids: Iterable[int]) -> List[int]:
+    """Mark chapters as being fetched and return the ones this caller won.
+
+    Pending and partial chapters, and fetches whose claim has timed out, can
+    be claimed. The claim time doubles as the claim token, so two workers
+    racing for the same chapters each get back only the rows they updated.
+    """
+    now = timezone.now()
+    claimable = (
+        Q(resources_status__in=[ChapterResource.RESOURCES_PENDING, ChapterResource.RESOURCES_PARTIAL])
+        | Q(resources_status=ChapterResource.RESOURCES_FETCHING, resources_status_at__lt=now - CLAIM_TIMEOUT)
+        | Q(resources_status=ChapterResource.RESOURCES_FETCHING, resources_status_at__isnull=True)
+    )
+    ChapterResource.objects.filter(id__in=list(chapter_ids)).filter(claimable).update(
+        resources_status=ChapterResource.RESOURCES_FETCHING, resources_status_at=now
+    )
+    return list(ChapterResource.objects.filter(
+        id__in=list(chapter_ids), resources_status=ChapterResource.RESOURCES_FETCHING, resources_status_at=now
+    ).values_list('id', flat=True))
+
+
+def resolve_chapter_resources(generation: ChapterGeneration, chapters: List[ChapterResource],
+                              timeout: float = None) -> Dict[int, List[str]]:
+    """Search for the videos/websites claimed ``chapters`` are missing, save them and update their status.
+
+    ``chapters`` must have ``videos`` and ``websites`` prefetched. Returns the
+    kinds still missing per chapter id (searches that failed or timed out);
+    those chapters are left partial so the next request or prefetch retries them.
+    """
+    wanted = []
+    for chapter in chapters:
+        if not chapter.videos.all():
+            wanted.append(('videos', chapter.name))
+        if not chapter.websites.all():
+            wanted.append(('websites', chapter.name))
+    fetched = fetch_chapter_resources(generation.topic, generation.grade, wanted, timeout) if wanted else {}
+
+    new_videos, new_websites, pending = [], [], {}
+    for chapter in chapters:
+        videos = fetched.get(('videos', chapter.name), [])
+        websites = fetched.get(('websites', chapter.name), [])
+        pending[chapter.id] = [kind for kind, found in (('videos', videos), ('websites', websites)) if found is None]
+        new_videos += [
+            ChapterVideoResource(
+                chapter=chapter,
+                title=video['title'],
+                url=video['url'],
+                channel=video['channel'],
+                duration=video['duration']
+            ) for video in (videos or [])[:4]  # Limit to 4 videos
+        ]
+        new_websites += [
+            ChapterWebResource(
+                chapter=chapter,
+                title=website['title'],
+                url=website['url'],
+                source=website['source']
+            ) for website in (websites or [])[:4]  # Limit to 4 websites
+        ]
+
+    now = timezone.now()
+    with transaction.atomic():
+        ChapterVideoResource.objects.bulk_create(new_videos)
+        ChapterWebResource.objects.bulk_create(new_websites)
+        ChapterResource.objects.filter(id__in=[chapter_id for chapter_id, kinds in pending.items() if not kinds]).update(
+            resources_status=ChapterResource.RESOURCES_READY, resources_status_at=now
+        )
+        ChapterResource.objects.filter(id__in=[chapter_id for chapter_id, kinds in pending.items() if kinds]).update(
+            resources_status=ChapterResource.RESOURCES_PARTIAL, resources_status_at=now
+        )
+    return pending
+
+
+def fetch_in_progress(generation: ChapterGeneration) -> bool:
+    """Whether a live claim exists on any chapter of ``generation``"""
+    return generation.chapters.filter(
+        resources_status=ChapterResource.RESOURCES_FETCHING,
+        resources_status_at__gte=timezone.now() - CLAIM_TIMEOUT
+    ).exists()
+
+
+def wait_for_fetches(generation: ChapterGeneration, timeout: float, interval: float = 0.25) -> None:
+    """Block until no chapter of ``generation`` is being fetched elsewhere, or ``timeout`` passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not fetch_in_progress(generation):
+            return
+        time.sleep(interval)
+
+
+class ResourcePrefetcher:
+    """In-process background worker that resolves chapter resources right after chapters are generated.
+
+    Jobs are generation ids on an in-memory queue served by one daemon
+    thread, started on first use; a generation already waiting in the queue
+    is not queued again. The queue is not durable: a job lost with
+    its worker leaves chapters pending (or with an expired claim), and the
+    resources endpoint resolves those itself.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._queued_ids = set()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+
+    def enqueue(self, generation_id: int) -> bool:
+        """Queue a prefetch of ``generation_id``; False if one is already waiting"""
+        with self._lock:
+            if generation_id in self._queued_ids:
+                self.deduplicated += 1
+                return False
+            self._queued_ids.add(generation_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="resource-prefetch", daemon=True)
+                self._thread.start()
+            self.enqueued += 1
+        self._queue.put(generation_id)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            generation_id = self._queue.get()
+            with self._lock:
+                # From here on a new request for this generation queues a fresh pass
+                self._queued_ids.discard(generation_id)
+            close_old_connections()
+            try:
+                self.prefetch(generation_id)
+                with self._lock:
+                    self.completed += 1
+            except Exception as e:
+                logging.warning(f"Prefetching resources for chapter generation {generation_id} failed: {e}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def prefetch(self, generation_id: int) -> Dict[int, List[str]]:
+        try:
+            generation = ChapterGeneration.objects.get(id=generation_id)
+        except ChapterGeneration.DoesNotExist:
+            return {}  # Deleted before its turn came
+        claimed = claim_chapters(generation.chapters.exclude(
+            resources_status=ChapterResource.RESOURCES_READY
+        ).values_list('id', flat=True))
+        if not claimed:
+            return {}
+        return resolve_chapter_resources(generation, load_chapters(generation, claimed))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "deduplicated": self.deduplicated,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+resource_prefetcher = ResourcePrefetcher()
+
+
+def prefetch_resources_on_commit(generation_id: int) -> None:
+    """Queue a resource prefetch once the transaction that created the chapters has committed"""
+    if settings.RESOURCE_PREFETCH_ENABLED:
+        transaction.on_commit(lambda: resource_prefetcher.enqueue(generation_id))
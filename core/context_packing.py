@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from langchain.schema import Document
+
+# (group, start, end): chunks in the same group whose ranges overlap or touch may share text
+Span = Tuple[Hashable, float, float]
+
+MIN_TEXT_OVERLAP = 10  # Shorter suffix/prefix matches are coincidence, not splitter overlap
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Llama-tokenizer count: ~4 characters per token, at least one per word"""
+    return max(len(text) // 4, len(text.split()))
+
+
+def pdf_span(doc: Document) -> Span:
+    """Character range of a PDF chunk within its (cleaned) page"""
+    position = doc.metadata["position"]
+    return ("page", doc.metadata.get("source"), doc.metadata["page"]), position["start"], position["end"] + 1
+
+
+def video_span(doc: Document) -> Span:
+    """Time range of a transcript chunk within its video"""
+    timestamp = doc.metadata["timestamp"]
+    return ("video", doc.metadata.get("video_id")), timestamp["start"], timestamp["end"]
+
+
+def join_overlapping(first: str, second: str) -> str:
+    """``first`` followed by ``second`` without the text they share at the seam"""
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for size in range(min(len(first), len(second)) - 1, MIN_TEXT_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + " " + second
+
+
+@dataclass
+class _Segment:
+    rank: int
+    group: Hashable
+    start: float
+    end: float
+    text: str
+    chunks: int = 1
+
+
+@dataclass
+class PackedContext:
+    text: str
+    raw_tokens: int  # The retrieved chunks joined as-is
+    tokens: int
+    chunks: int
+    segments: int
+    truncated: bool = False
+    dropped_segments: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+    def report(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "segments": self.segments,
+            "dropped_segments": self.dropped_segments,
+            "truncated": self.truncated,
+            "raw_tokens": self.raw_tokens,
+            "tokens": self.tokens,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def _merge(segments: List[_Segment]) -> List[_Segment]:
+    """Fold chunks of the same page/video whose ranges overlap or touch into one segment"""
+    merged: List[_Segment] = []
+    for segment in sorted(segments, key=lambda s: (repr(s.group), s.start, s.end)):
+        last = merged[-1] if merged else None
+        if last is not None and last.group == segment.group and segment.start <= last.end:
+            last.text = join_overlapping(last.text, segment.text)
+            last.end = max(last.end, segment.end)
+            last.rank = min(last.rank, segment.rank)
+            last.chunks += segment.chunks
+        else:
+            merged.append(segment)
+    return sorted(merged, key=lambda s: s.rank)
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Leading words of ``text`` within ``token_budget`` by ``estimate_tokens``"""
+    if len(text) > token_budget * 4:
+        text = text[:token_budget * 4].rsplit(" ", 1)[0]  # Don't end on a partial word
+    return " ".join(text.split()[:token_budget])
+
+
+def pack_context(docs: List[Document], token_budget: int, span: Optional[Callable[[Document], Span]] = None,
+                 separator: str = "\n\n") -> PackedContext:
+    """Prompt context for retrieved chunks, most relevant first, without repeated overlap text.
+
+    Chunks are split with an overlap, so neighbours retrieved together repeat
+    each other's edges; ``span`` locates a chunk so such neighbours are merged
+    into one passage. Passages are then added in retrieval order while they
+    fit ``token_budget`` (0 disables the budget); the first is cut down to the
+    budget rather than dropped so the prompt always has some context.
+    """
+    raw_tokens = estimate_tokens(separator.join(doc.page_content for doc in docs))
+    segments = []
+    for rank, doc in enumerate(docs):
+        try:
+            group, start, end = span(doc) if span else (rank, rank, rank)
+        except (KeyError, TypeError):
+            group, start, end = ("unplaced", rank), 0, 0  # Stores built before the metadata existed
+        segments.append(_Segment(rank, group, start, end, doc.page_content))
+    merged = _merge(segments)
+
+    passages, truncated = [], False
+    for segment in merged:
+        candidate = separator.join(passages + [segment.text])
+        if not token_budget or estimate_tokens(candidate) <= token_budget:
+            passages.append(segment.text)
+        elif not passages:
+            passages.append(_truncate(segment.text, token_budget))
+            truncated = True
+        else:
+            break
+
+    text = separator.join(passages)
+    return PackedContext(
+        text=text,
+        raw_tokens=raw_tokens,
+        tokens=estimate_tokens(text),
+        chunks=len(docs),
+        segments=len(merged),
+        truncated=truncated,
+        dropped_segments=len(merged) - len(passages),
+    )
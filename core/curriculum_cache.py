@@ -0,0 +1,88 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChapterNamesCacheEntry
+from .query_cache import normalize_question
+
+
+def curriculum_key(topic: str, grade: str) -> Tuple[str, str]:
+    """Normalized (topic, grade); "Python Programming" and "python programming " share chapters"""
+    return normalize_question(topic), normalize_question(grade)
+
+
+class ChapterNamesCache:
+    """Generated chapter lists by normalized (topic, grade), shared by every worker through the database.
+
+    Entries expire after ``ttl`` and are then regenerated on the next request;
+    empty lists (a malformed LLM reply) are never stored.
+    """
+
+    def __init__(self, ttl: timedelta):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, topic: str, grade: str) -> Optional[List[str]]:
+        normalized_topic, normalized_grade = curriculum_key(topic, grade)
+        entry = ChapterNamesCacheEntry.objects.filter(
+            topic=normalized_topic, grade=normalized_grade, created_at__gte=timezone.now() - self.ttl
+        ).first()
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        ChapterNamesCacheEntry.objects.filter(id=entry.id).update(hits=F("hits") + 1)
+        return entry.chapters
+
+    def put(self, topic: str, grade: str, chapters: List[str]) -> None:
+        if not chapters:
+            return
+        normalized_topic, normalized_grade = curriculum_key(topic, grade)
+        # Plain UPDATE then INSERT rather than update_or_create: no transaction holding a read lock
+        # while it waits to write, which SQLite rejects outright when batch threads store together
+        fields = {"chapters": chapters, "hits": 0, "created_at": timezone.now()}
+        entries = ChapterNamesCacheEntry.objects.filter(topic=normalized_topic, grade=normalized_grade)
+        if entries.update(**fields):
+            return
+        try:
+            ChapterNamesCacheEntry.objects.create(topic=normalized_topic, grade=normalized_grade, **fields)
+        except IntegrityError:
+            entries.update(**fields)  # Another worker stored the same pair first
+
+    def get_or_generate(self, topic: str, grade: str, generate: Callable[[], List[str]]) -> Tuple[List[str], bool]:
+        """(chapters, whether they came from the cache)"""
+        chapters = self.get(topic, grade)
+        if chapters is not None:
+            return chapters, True
+        chapters = generate()
+        try:
+            self.put(topic, grade, chapters)
+        except DatabaseError as e:
+            logging.warning(f"Could not cache chapters for {topic!r} ({grade!r}): {e}")
+        return chapters, False
+
+    def purge_expired(self) -> int:
+        deleted, _ = ChapterNamesCacheEntry.objects.filter(created_at__lt=timezone.now() - self.ttl).delete()
+        return deleted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": ChapterNamesCacheEntry.objects.count(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+chapter_names_cache = ChapterNamesCache(ttl=timedelta(seconds=settings.CHAPTER_CACHE_TTL_SECONDS))
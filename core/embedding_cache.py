@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from langchain_core.embeddings import Embeddings
+
+from .query_cache import LRUCache
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed cache of embedding vectors keyed by (model name, SHA-256 of text).
+
+    Backed by a SQLite file in WAL mode so every worker process on the host
+    shares the same entries. Vectors are stored as raw float32 blobs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors for the given text hashes; missing hashes are absent from the result"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connection()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        rows = []
+        for text_hash, vector in items.items():
+            array = np.asarray(vector, dtype=np.float32)
+            rows.append((model, text_hash, array.shape[0], array.tobytes()))
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, bytes_used = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes_used": bytes_used,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts missing from the cache to the model.
+
+    Query embeddings go through the in-process ``query_cache`` when one is given.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str,
+                 query_cache: Optional[LRUCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+        self.query_cache = query_cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, hashes)
+
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(self.model_name, fresh)
+            vectors.update(fresh)
+
+        return [vectors[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+        vector = self.query_cache.get_or_set(
+            (self.model_name, text),
+            lambda: np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        )
+        return vector.tolist()
+
+
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH)
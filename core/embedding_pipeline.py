@@ -0,0 +1,112 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from django.conf import settings
+from langchain_core.embeddings import Embeddings
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available"""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        if rate_per_second <= 0:
+            raise ValueError(f"rate_per_second must be positive, got {rate_per_second}")
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for HTTP 429 / quota errors raised by the embedding client"""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "resource exhausted" in message or "resourceexhausted" in message or "quota" in message
+
+
+class EmbeddingPipeline(Embeddings):
+    """Embeds documents in fixed-size batches on a bounded thread pool.
+
+    Every batch is one upstream request: it first takes a token from the shared
+    rate limiter and is retried with exponential backoff when the provider
+    answers 429. Results are returned in input order.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 100,
+        max_workers: int = 4,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 5,
+        initial_delay: float = 1.0,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        delay = self.initial_delay
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                logging.warning(f"Embedding batch rate limited (attempt {attempt + 1}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay *= (2 + random.random())  # Exponential backoff with jitter
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.max_workers <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+# One limiter per worker, shared by every processor calling the embedding API; none when the limit is disabled
+embedding_rate_limiter = TokenBucket(
+    rate_per_second=settings.EMBEDDING_REQUESTS_PER_MINUTE / 60.0,
+    capacity=settings.EMBEDDING_MAX_WORKERS,
+) if settings.EMBEDDING_REQUESTS_PER_MINUTE > 0 else None
+
+
+def make_embedding_pipeline(embeddings: Embeddings) -> EmbeddingPipeline:
+    return EmbeddingPipeline(
+        embeddings,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        max_workers=settings.EMBEDDING_MAX_WORKERS,
+        rate_limiter=embedding_rate_limiter,
+        max_retries=settings.EMBEDDING_MAX_RETRIES,
+    )
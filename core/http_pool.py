@@ -0,0 +1,223 @@
+import asyncio
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+class ConnectionStats:
+    """Per-host counts of requests sent and TCP(+TLS) connections opened for them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._connections: Dict[str, int] = defaultdict(int)
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self._requests[host] += 1
+
+    def record_connection(self, host: str) -> None:
+        with self._lock:
+            self._connections[host] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            hosts = sorted(set(self._requests) | set(self._connections))
+            report = {}
+            for host in hosts:
+                sent, opened = self._requests[host], self._connections[host]
+                reused = max(sent - opened, 0)
+                report[host] = {
+                    "requests": sent,
+                    "connections": opened,
+                    "reused": reused,
+                    "reuse_ratio": reused / sent if sent else 0.0,
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._connections.clear()
+
+
+connection_stats = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_connection(self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_connection(self.host)
+        return super()._new_conn()
+
+
+_COUNTING_POOL_CLASSES = {"http": _CountingHTTPConnectionPool, "https": _CountingHTTPSConnectionPool}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools (direct and via proxy) count the connections they open"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _COUNTING_POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = _COUNTING_POOL_CLASSES
+        return manager
+
+
+def _pool_size(host: str) -> int:
+    return settings.HTTP_POOL_MAXSIZE_BY_HOST.get(host, settings.HTTP_POOL_MAXSIZE)
+
+
+def new_session(pool_maxsize: Optional[int] = None, retry: bool = True) -> requests.Session:
+    """A keep-alive session with counted connection pools and connect/idempotent-request retries.
+
+    POSTs are retried only when the connection could not be established, so
+    a request the upstream may already have acted on is never sent twice.
+    With ``retry=False`` every request is sent once, for callers that run
+    their own retry loop.
+    """
+    adapter = PooledHTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or settings.HTTP_POOL_MAXSIZE,
+        max_retries=Retry(
+            total=settings.HTTP_MAX_RETRIES,
+            backoff_factor=settings.HTTP_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        ) if retry else 0,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# One session per upstream host (and retry policy) for the lifetime of the worker process
+_sessions: Dict[Tuple[str, bool], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def session_for(url: str, retry: bool = True) -> requests.Session:
+    host = urlsplit(url).hostname or ""
+    with _sessions_lock:
+        session = _sessions.get((host, retry))
+        if session is None:
+            session = _sessions[(host, retry)] = new_session(_pool_size(host), retry)
+        return session
+
+
+def request(method: str, url: str, retry: bool = True, **kwargs) -> requests.Response:
+    """``requests.request`` over the host's pooled session, with the default (connect, read) timeouts.
+
+    Pass ``retry=False`` when the caller already retries failed requests.
+    """
+    kwargs.setdefault("timeout", (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT))
+    connection_stats.record_request(urlsplit(url).hostname or "")
+    return session_for(url, retry).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+class PooledRequests:
+    """Stands in for the ``requests`` module of a client library, sending its ``requests.get``/``post`` calls over the pooled sessions"""
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return request(method, url, **kwargs)
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        return request("GET", url, params=params, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return request("POST", url, data=data, json=json, **kwargs)
+
+
+pooled_requests = PooledRequests()
+
+
+def route_through_pool(module) -> None:
+    """Point a library module's global ``requests`` at the pooled sessions.
+
+    Raises if the module no longer uses ``requests`` that way, so an upgrade
+    that changes its transport fails at import instead of silently bypassing
+    the pool.
+    """
+    if getattr(module, "requests", None) not in (requests, pooled_requests):
+        raise RuntimeError(f"{module.__name__} does not call the requests module directly; cannot pool its connections")
+    module.requests = pooled_requests
+
+
+# Async clients are bound to the event loop that created them: one per (loop, upstream host)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+
+def async_client_for(url: str) -> httpx.AsyncClient:
+    """The running loop's keep-alive ``httpx.AsyncClient`` for the URL's host, pool-sized like ``session_for``"""
+    host = urlsplit(url).hostname or ""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(host)
+    if client is None or client.is_closed:
+        size = _pool_size(host)
+        client = clients[host] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+            timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            transport=httpx.AsyncHTTPTransport(retries=settings.HTTP_MAX_RETRIES),  # Failed connects only
+        )
+    return client
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """``request`` for async views, over the running loop's client for the host"""
+    host = urlsplit(url).hostname or ""
+    connection_stats.record_request(host)
+
+    async def trace(event_name: str, info: Dict) -> None:
+        # httpcore reports each new connection it opens; reused ones skip connect_tcp
+        if event_name == "connection.connect_tcp.complete":
+            connection_stats.record_connection(host)
+
+    return await async_client_for(url).request(method, url, extensions={"trace": trace}, **kwargs)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    return connection_stats.snapshot()
+
+
+def close_all() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
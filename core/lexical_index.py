@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import math
+import threading
+import weakref
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+LEXICAL_INDEX_FILE = "lexical_index.json"
+
+_TOKEN_RE = re.compile(r"[\w\u0900-\u097F]+")  # Devanagari vowel signs are not \w
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in into is it its me my no not of on or our "
+    "she so that the their them then there these they this to was we were what when where which who why will "
+    "with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over a store's chunks, by FAISS position.
+
+    Built once when a store is ingested and saved next to its FAISS index, so
+    lexical matches on exact terms (names, formulas, jargon) are available
+    without expanding the query through the LLM first.
+    """
+
+    def __init__(self, postings: Dict[str, Tuple[np.ndarray, np.ndarray]], doc_lengths: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75):
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_lengths = []
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(position)
+                tfs.append(tf)
+        return cls(
+            {term: (np.asarray(docs, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+             for term, (docs, tfs) in postings.items()},
+            np.asarray(doc_lengths, dtype=np.float32), k1, b
+        )
+
+    @classmethod
+    def load(cls, store_path: str) -> "BM25Index":
+        with open(os.path.join(store_path, LEXICAL_INDEX_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {
+            term: (np.asarray(docs, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in data["postings"].items()
+        }
+        return cls(postings, np.asarray(data["doc_lengths"], dtype=np.float32), data["k1"], data["b"])
+
+    def save(self, store_path: str) -> None:
+        path = os.path.join(store_path, LEXICAL_INDEX_FILE)
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(),
+            "postings": {term: [docs.tolist(), tfs.astype(int).tolist()] for term, (docs, tfs) in self.postings.items()},
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and scores of the ``top_k`` best-scoring chunks; chunks sharing no term are left out"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, tfs = self.postings[term]
+            idf = math.log(1 + (len(self) - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = np.argsort(-scores[matched], kind="stable")
+        return matched[order], scores[matched[order]]
+
+
+# Lexical indexes follow their store object like the retrieval matrices do
+_indexes: "weakref.WeakKeyDictionary[object, BM25Index]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def attach_lexical_index(vectorstore, index: BM25Index) -> None:
+    with _indexes_lock:
+        _indexes[vectorstore] = index
+
+
+def lexical_index_for(vectorstore) -> Optional[BM25Index]:
+    with _indexes_lock:
+        return _indexes.get(vectorstore)
+
+
+def has_lexical_index(store_path: str) -> bool:
+    return os.path.exists(os.path.join(store_path, LEXICAL_INDEX_FILE))
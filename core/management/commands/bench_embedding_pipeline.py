@@ -0,0 +1,82 @@
+import time
+import random
+import threading
+from typing import List
+
+from django.core.management.base import BaseCommand
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_pipeline import EmbeddingPipeline, TokenBucket
+from core.vector_index import build_vector_store
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class FakeEmbedder(Embeddings):
+    """Local stand-in for the embedding API: fixed latency per request plus per text"""
+
+    def __init__(self, dim, request_latency, text_latency, rate_limit_ratio=0.0):
+        self.dim = dim
+        self.request_latency = request_latency
+        self.text_latency = text_latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.request_latency + self.text_latency * len(texts))
+        if random.random() < self.rate_limit_ratio:
+            raise RateLimited("429 Resource has been exhausted")
+        return [[random.random() for _ in range(self.dim)] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class Command(BaseCommand):
+    help = "Measure embedding throughput (chunks/sec) of the batched pipeline against a sequential baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunks", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+        parser.add_argument("--request-latency", type=float, default=0.2, help="Seconds per upstream request")
+        parser.add_argument("--text-latency", type=float, default=0.001, help="Seconds per embedded text")
+        parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fraction of requests answered with 429")
+        parser.add_argument("--requests-per-minute", type=float, default=0, help="Token bucket rate (0 disables)")
+
+    def handle(self, *args, **options):
+        documents = [Document(page_content=f"chunk {i} " * 20, metadata={"chunk_id": f"c{i}"}) for i in range(options["chunks"])]
+
+        def fake():
+            return FakeEmbedder(64, options["request_latency"], options["text_latency"], options["rate_limit_ratio"])
+
+        # Baseline: one batch after another, as the embeddings client does on its own
+        embedder = fake()
+        baseline = EmbeddingPipeline(embedder, batch_size=options["batch_size"], max_workers=1, initial_delay=0.05)
+        self._run("sequential", documents, baseline, embedder)
+
+        for workers in options["workers"]:
+            limiter = None
+            if options["requests_per_minute"] > 0:
+                limiter = TokenBucket(options["requests_per_minute"] / 60.0, capacity=workers)
+            embedder = fake()
+            pipeline = EmbeddingPipeline(
+                embedder, batch_size=options["batch_size"], max_workers=workers,
+                rate_limiter=limiter, initial_delay=0.05
+            )
+            self._run(f"pipeline x{workers}", documents, pipeline, embedder)
+
+    def _run(self, label, documents, pipeline, embedder):
+        start = time.perf_counter()
+        store = build_vector_store(documents, pipeline)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:>14}: {len(documents) / elapsed:8.1f} chunks/sec "
+            f"({elapsed:.2f}s, {embedder.requests} requests, {store.index.ntotal} vectors)"
+        )
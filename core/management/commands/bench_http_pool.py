@@ -0,0 +1,36 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core import http_pool
+
+
+class Command(BaseCommand):
+    help = "Compare per-call requests.get with the pooled keep-alive sessions against an upstream URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", default=["https://api.groq.com/openai/v1/models"])
+        parser.add_argument("--requests", type=int, default=10)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        self.stdout.write(f"{'url':<48} {'bare ms/req':>11} {'pooled ms/req':>13} {'connections':>11} {'reused':>6}")
+        for url in options["urls"]:
+            start = time.perf_counter()
+            for _ in range(count):
+                requests.get(url, timeout=30).close()
+            bare_ms = (time.perf_counter() - start) * 1000 / count
+
+            http_pool.connection_stats.reset()
+            start = time.perf_counter()
+            for _ in range(count):
+                response = http_pool.get(url)
+                response.content  # Read the body so the connection goes back to the pool
+            pooled_ms = (time.perf_counter() - start) * 1000 / count
+
+            host = http_pool.stats().get(requests.utils.urlparse(url).hostname, {})
+            self.stdout.write(
+                f"{url[:48]:<48} {bare_ms:>11.1f} {pooled_ms:>13.1f} "
+                f"{host.get('connections', 0):>11} {host.get('reused', 0):>6}"
+            )
@@ -0,0 +1,58 @@
+import time
+
+import faiss
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.vector_index import create_index
+
+
+def synthetic_vectors(n, dim, rng, clusters=100):
+    """Clustered vectors, closer to real embeddings than uniform noise"""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+class Command(BaseCommand):
+    help = "Report recall@k and p50/p99 search latency of flat, IVF and HNSW indexes on synthetic stores"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--types", nargs="+", default=["flat", "ivf", "hnsw"])
+        parser.add_argument("--dim", type=int, default=768)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        k = options["k"]
+        faiss.omp_set_num_threads(1)  # Per-request latency is what a single search sees
+
+        self.stdout.write(f"{'vectors':>8} {'type':>5} {'build s':>8} {f'recall@{k}':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for n in options["sizes"]:
+            vectors = synthetic_vectors(n, options["dim"], rng)
+            picks = rng.integers(0, n, size=options["queries"])
+            queries = vectors[picks] + 0.1 * rng.standard_normal((options["queries"], options["dim"])).astype(np.float32)
+
+            exact = faiss.IndexFlatL2(options["dim"])
+            exact.add(vectors)
+            _, truth = exact.search(queries, k)
+
+            for index_type in options["types"]:
+                start = time.perf_counter()
+                index = create_index(vectors, index_type)
+                build = time.perf_counter() - start
+
+                latencies, hits = [], 0
+                for i in range(len(queries)):
+                    start = time.perf_counter()
+                    _, found = index.search(queries[i:i + 1], k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += len(set(found[0]) & set(truth[i]))
+
+                self.stdout.write(
+                    f"{n:>8} {index_type:>5} {build:>8.2f} {hits / (k * len(queries)):>9.3f} "
+                    f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}"
+                )
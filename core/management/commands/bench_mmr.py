@@ -0,0 +1,71 @@
+import time
+import uuid
+
+import faiss
+import numpy as np
+from django.core.management.base import BaseCommand
+from langchain.schema import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from core.management.commands.bench_index_types import synthetic_vectors
+from core.retrieval import mmr_search_by_vectors, store_matrix
+from core.vector_index import create_index
+
+
+class Command(BaseCommand):
+    help = "Compare LangChain's MMR search with the vectorized retrieval module on synthetic stores"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+        parser.add_argument("--types", nargs="+", default=["flat", "hnsw"])
+        parser.add_argument("--dim", type=int, default=768)
+        parser.add_argument("--queries", type=int, default=64)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--fetch-k", type=int, default=25)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        k, fetch_k = options["k"], options["fetch_k"]
+        faiss.omp_set_num_threads(1)
+
+        self.stdout.write(
+            f"{'vectors':>8} {'type':>5} {'langchain ms/q':>14} {'numpy ms/q':>10} "
+            f"{'batch ms/q':>10} {'speedup':>8} {'same docs':>9}"
+        )
+        for n in options["sizes"]:
+            vectors = synthetic_vectors(n, options["dim"], rng)
+            picks = rng.integers(0, n, size=options["queries"])
+            queries = vectors[picks] + 0.1 * rng.standard_normal((len(picks), options["dim"])).astype(np.float32)
+            ids = [str(uuid.uuid4()) for _ in range(n)]
+            docstore = InMemoryDocstore({doc_id: Document(page_content=doc_id) for doc_id in ids})
+
+            for index_type in options["types"]:
+                store = FAISS(FakeEmbeddings(size=options["dim"]), create_index(vectors, index_type, "none"),
+                              docstore, dict(enumerate(ids)))
+                store_matrix(store)  # Built once when the store is loaded, not per query
+
+                start = time.perf_counter()
+                expected = [
+                    store.max_marginal_relevance_search_by_vector(query.tolist(), k=k, fetch_k=fetch_k)
+                    for query in queries
+                ]
+                langchain_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                start = time.perf_counter()
+                single = [mmr_search_by_vectors(store, [query], k=k, fetch_k=fetch_k)[0] for query in queries]
+                numpy_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                start = time.perf_counter()
+                mmr_search_by_vectors(store, queries, k=k, fetch_k=fetch_k)
+                batch_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                same = sum(
+                    [d.page_content for d in a] == [d.page_content for d in b] for a, b in zip(expected, single)
+                ) / len(queries)
+                self.stdout.write(
+                    f"{n:>8} {index_type:>5} {langchain_ms:>14.3f} {numpy_ms:>10.3f} "
+                    f"{batch_ms:>10.3f} {langchain_ms / batch_ms:>7.1f}x {same:>9.2f}"
+                )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.pdf_processor import PDFProcessor
+from core.yt_processor import YouTubeProcessor
+from core.processors import ProcessorRegistry
+
+
+class Command(BaseCommand):
+    help = "Compare per-request processor construction against the shared processor registry"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Simulated requests per processor")
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        for cls in (PDFProcessor, YouTubeProcessor):
+            start = time.perf_counter()
+            for _ in range(n):
+                cls()
+            per_request = (time.perf_counter() - start) / n
+
+            registry = ProcessorRegistry()
+            start = time.perf_counter()
+            for _ in range(n):
+                registry.get(cls)
+            shared = (time.perf_counter() - start) / n
+
+            self.stdout.write(
+                f"{cls.__name__}: per-request construction {per_request * 1000:.3f} ms/request, "
+                f"shared registry {shared * 1000:.3f} ms/request (first call builds the instance)"
+            )
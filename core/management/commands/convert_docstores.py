@@ -0,0 +1,70 @@
+import os
+import pickle
+
+import faiss
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.lexical_index import BM25Index, has_lexical_index
+from core.store_cache import vector_store_cache
+from core.vector_index import INDEX_FILE, LEGACY_DOCSTORE_FILE, MmapDocstore, has_indexed_docstore, write_docstore
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert pickled docstores (index.pkl) in the vectorstores directory to the indexed JSONL docstore, "
+        "in place, and build the BM25 lexical index of converted stores that lack one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("stores", nargs="*", help="Store names to convert (default: all)")
+        parser.add_argument("--keep-pickle", action="store_true", help="Leave index.pkl in place after converting")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be converted")
+
+    def build_lexical_index(self, store_name, store_path):
+        docstore = MmapDocstore(store_path)
+        BM25Index.build(docstore.search(position).page_content for position in range(len(docstore))).save(store_path)
+        self.stdout.write(f"{store_name}: built lexical index")
+
+    def handle(self, *args, **options):
+        store_names = options["stores"] or sorted(os.listdir(settings.VECTORSTORES_DIR))
+        converted = skipped = 0
+        for store_name in store_names:
+            store_path = os.path.join(settings.VECTORSTORES_DIR, store_name)
+            pickle_path = os.path.join(store_path, LEGACY_DOCSTORE_FILE)
+            if not os.path.isdir(store_path):
+                continue
+            if not os.path.exists(pickle_path):
+                if has_indexed_docstore(store_path) and not has_lexical_index(store_path):
+                    if options["dry_run"]:
+                        self.stdout.write(f"{store_name}: would build lexical index")
+                    else:
+                        self.build_lexical_index(store_name, store_path)
+                        vector_store_cache.invalidate(store_name)
+                continue
+            if not os.path.exists(os.path.join(store_path, INDEX_FILE)):
+                self.stderr.write(f"{store_name}: no {INDEX_FILE}, skipping")
+                skipped += 1
+                continue
+
+            if not has_indexed_docstore(store_path):
+                if options["dry_run"]:
+                    self.stdout.write(f"{store_name}: would convert")
+                    continue
+                # Stores written by this app only; the pickle is trusted here
+                with open(pickle_path, "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+                ntotal = faiss.read_index(os.path.join(store_path, INDEX_FILE)).ntotal
+                write_docstore(docstore, index_to_docstore_id, ntotal, store_path)
+                self.stdout.write(f"{store_name}: converted {ntotal} chunks")
+                self.build_lexical_index(store_name, store_path)
+                converted += 1
+            elif options["dry_run"]:
+                self.stdout.write(f"{store_name}: already converted, would remove {LEGACY_DOCSTORE_FILE}")
+                continue
+
+            if not options["keep_pickle"]:
+                os.remove(pickle_path)
+            vector_store_cache.invalidate(store_name)
+
+        self.stdout.write(self.style.SUCCESS(f"Converted {converted} store(s), skipped {skipped}"))
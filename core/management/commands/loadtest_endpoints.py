@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+import time
+
+import httpx
+import numpy as np
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent requests at running API endpoints and report throughput and latency per concurrency level"
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="e.g. the sync endpoint and its /async/ counterpart")
+        parser.add_argument("--data", default="{}",
+                            help="JSON body to POST; {n} is replaced by a per-request counter to get past the caches")
+        parser.add_argument("--token", default="", help="Firebase ID token sent as a Bearer token")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+        parser.add_argument("--rounds", type=int, default=3, help="Requests per concurrent client")
+        parser.add_argument("--timeout", type=float, default=120)
+
+    def handle(self, *args, **options):
+        self.request_numbers = itertools.count(1)  # Unique across levels and URLs
+        self.stdout.write(
+            f"{'url':<48} {'clients':>7} {'ok':>5} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for url in options["urls"]:
+            for clients in options["concurrency"]:
+                ok, errors, elapsed, latencies = asyncio.run(self._run(url, clients, options))
+                p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+                self.stdout.write(
+                    f"{url[-48:]:<48} {clients:>7} {ok:>5} {errors:>6} {ok / elapsed:>7.2f} {p50:>8.0f} {p95:>8.0f}"
+                )
+
+    async def _run(self, url, clients, options):
+        headers = {"Content-Type": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+        latencies, errors = [], 0
+
+        async def client(session):
+            nonlocal errors
+            for _ in range(options["rounds"]):
+                body = options["data"].replace("{n}", str(next(self.request_numbers)))
+                start = time.perf_counter()
+                try:
+                    response = await session.post(url, content=body, headers=headers)
+                    if response.status_code >= 400:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        async with httpx.AsyncClient(timeout=options["timeout"], limits=limits) as session:
+            start = time.perf_counter()
+            await asyncio.gather(*(client(session) for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+        return len(latencies), errors, elapsed, latencies
@@ -0,0 +1,83 @@
+import os
+
+import faiss
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.vector_index import INDEX_FILE, create_compressed_index, describe_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes per chunk and recall@k of compressed indexes against the flat index of existing stores. "
+        "Queries are stored vectors with added noise, so no embedding API calls are made."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("stores", nargs="*", help="Store names (default: every store in VECTORSTORES_DIR)")
+        parser.add_argument("--modes", nargs="+", default=["fp16", "sq8", "pq"])
+        parser.add_argument("--pca-dims", type=int, nargs="+", default=[0, 256])
+        parser.add_argument("--rerank-factor", type=int, default=settings.VECTOR_INDEX_RERANK_FACTOR)
+        parser.add_argument("--queries", type=int, default=100)
+        parser.add_argument("--noise", type=float, default=0.05, help="Query noise, relative to the vectors' std")
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def recall(self, index, queries, truth, k):
+        _, found = index.search(queries, k)
+        hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+        return hits / truth.size
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        k = options["k"]
+        stores = options["stores"] or sorted(os.listdir(settings.VECTORSTORES_DIR))
+
+        self.stdout.write(
+            f"{'store':<48} {'chunks':>6} {'mode':<16} {'index B/chunk':>13} {'disk B/chunk':>12} "
+            f"{f'recall@{k}':>9} {'reranked':>9}"
+        )
+        for store_name in stores:
+            index_path = os.path.join(settings.VECTORSTORES_DIR, store_name, INDEX_FILE)
+            if not os.path.exists(index_path):
+                self.stderr.write(f"{store_name}: no {INDEX_FILE}, skipped")
+                continue
+            flat = faiss.read_index(index_path)
+            if not isinstance(faiss.downcast_index(flat), faiss.IndexFlat):
+                self.stderr.write(f"{store_name}: not a flat index, skipped")
+                continue
+
+            ntotal = flat.ntotal
+            vectors = flat.reconstruct_n(0, ntotal)
+            picks = rng.integers(0, ntotal, size=options["queries"])
+            noise = options["noise"] * vectors.std() * rng.standard_normal((len(picks), flat.d))
+            queries = (vectors[picks] + noise).astype(np.float32)
+            depth = min(k, ntotal)
+            _, truth = flat.search(queries, depth)
+
+            flat_bytes = len(faiss.serialize_index(flat)) / ntotal
+            self.stdout.write(
+                f"{store_name:<48} {ntotal:>6} {'flat':<16} {flat_bytes:>13.0f} {flat_bytes:>12.0f} "
+                f"{1.0:>9.3f} {'-':>9}"
+            )
+            for mode in options["modes"]:
+                for pca_dim in options["pca_dims"]:
+                    index = create_compressed_index(
+                        vectors, "flat", mode, pca_dim=pca_dim, rerank_factor=options["rerank_factor"]
+                    )
+                    params = describe_index(index)
+                    label = mode if params["compression"] == mode else f"{mode}->{params['compression']}"
+                    if params["pca_dim"]:
+                        label += f"+pca{params['pca_dim']}"
+                    elif pca_dim:
+                        label += "+nopca"
+
+                    index_bytes = len(faiss.serialize_index(index.index)) / ntotal
+                    rerank_bytes = index.vectors.nbytes / ntotal if index.vectors is not None else 0
+                    raw = self.recall(index.index, queries, truth, depth)
+                    reranked = f"{self.recall(index, queries, truth, depth):>9.3f}" if index.rerank_factor else f"{'-':>9}"
+                    self.stdout.write(
+                        f"{'':<48} {'':>6} {label:<16} {index_bytes:>13.0f} {index_bytes + rerank_bytes:>12.0f} "
+                        f"{raw:>9.3f} {reranked}"
+                    )
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.answer_cache import answer_cache
+from core.models import PDFConversation, UserPDF, UserYouTubeVideo, YouTubeConversation
+from core.processors import get_pdf_processor, get_youtube_processor
+
+
+class Command(BaseCommand):
+    help = "Seed the semantic answer cache from PDF and YouTube conversation history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("stores", nargs="*", help="Store names to warm (default: every store with conversations)")
+        parser.add_argument("--limit", type=int, default=100, help="Most recent conversations to use per store")
+
+    def history(self, conversations, limit):
+        for conversation in conversations.order_by("-created_at")[:limit]:
+            try:
+                answer = json.loads(conversation.answer)
+            except ValueError:
+                continue
+            if isinstance(answer, dict) and answer.get("answer"):
+                yield conversation.question, answer, conversation.created_at
+
+    def handle(self, *args, **options):
+        sources = [
+            (UserPDF, PDFConversation, "pdf__vector_store", get_pdf_processor),
+            (UserYouTubeVideo, YouTubeConversation, "video__vector_store", get_youtube_processor),
+        ]
+        total = 0
+        for owner_model, conversation_model, store_field, get_processor in sources:
+            stores = options["stores"] or owner_model.objects.filter(
+                conversations__isnull=False
+            ).values_list("vector_store", flat=True).distinct()
+            for store_name in stores:
+                conversations = conversation_model.objects.filter(**{store_field: store_name})
+                if not conversations.exists():
+                    continue
+                added = answer_cache.warm(
+                    store_name, self.history(conversations, options["limit"]), get_processor().embedding_model
+                )
+                self.stdout.write(f"{store_name}: cached {added} answer(s)")
+                total += added
+        self.stdout.write(self.style.SUCCESS(f"Warmed {total} answer(s)"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_userpdf_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YouTubeVectorStore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=20)),
+                ('language', models.CharField(max_length=10)),
+                ('chunk_size', models.IntegerField()),
+                ('chunk_overlap', models.IntegerField()),
+                ('store_name', models.CharField(max_length=255, unique=True)),
+                ('video_title', models.CharField(blank=True, max_length=255)),
+                ('thumbnail_url', models.URLField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video_id', 'language', 'chunk_size', 'chunk_overlap'), name='unique_youtube_store_per_video_settings')],
+            },
+        ),
+        migrations.AddField(
+            model_name='useryoutubevideo',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='videos', to='core.youtubevectorstore'),
+        ),
+    ]
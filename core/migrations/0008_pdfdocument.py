@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_youtubevectorstore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('public_id', models.CharField(max_length=255)),
+                ('cloudinary_url', models.URLField(max_length=500)),
+                ('vector_store', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userpdf',
+            name='document',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='user_pdfs', to='core.pdfdocument'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_pdfdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store_name', models.CharField(max_length=255)),
+                ('store_version', models.CharField(max_length=64)),
+                ('question', models.TextField()),
+                ('question_hash', models.CharField(max_length=64)),
+                ('embedding', models.BinaryField()),
+                ('answer', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_name', 'store_version', 'created_at'], name='core_answer_store_n_3988da_idx')],
+                'constraints': [models.UniqueConstraint(fields=('store_name', 'store_version', 'question_hash'), name='unique_cached_answer_per_store_question')],
+            },
+        ),
+    ]
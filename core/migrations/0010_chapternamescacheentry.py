@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_answercacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterNamesCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=255)),
+                ('grade', models.CharField(max_length=50)),
+                ('chapters', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('topic', 'grade'), name='unique_cached_chapters_per_topic_grade')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_chapternamescacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceSearchCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('query', models.TextField()),
+                ('query_hash', models.CharField(max_length=64)),
+                ('results', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('refresh_started_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'query_hash'), name='unique_cached_resource_search')],
+            },
+        ),
+    ]
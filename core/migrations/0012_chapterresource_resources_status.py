@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resourcesearchcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapterresource',
+            name='resources_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('fetching', 'Fetching'), ('ready', 'Ready'), ('partial', 'Partial')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='chapterresource',
+            name='resources_status_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_chapterresource_resources_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaptergeneration',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='chaptergen_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdfconversation',
+            index=models.Index(fields=['pdf', 'created_at', 'id'], name='pdfconv_pdf_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpdf',
+            index=models.Index(fields=['user', 'upload_time', 'id'], name='userpdf_user_upload_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useryoutubevideo',
+            index=models.Index(fields=['user', 'upload_time', 'id'], name='ytvideo_user_upload_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubeconversation',
+            index=models.Index(fields=['video', 'created_at', 'id'], name='ytconv_video_created_idx'),
+        ),
+    ]
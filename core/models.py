@@ -60,11 +60,32 @@ class ChapterGeneration(models.Model):
     grade = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's history: newest first, id breaks timestamp ties
+            models.Index(fields=['user', 'created_at', 'id'], name='chaptergen_user_created_idx'),
+        ]
+
 class ChapterResource(models.Model):
     generation = models.ForeignKey(ChapterGeneration, on_delete=models.CASCADE, related_name='chapters')
     name = models.CharField(max_length=255)
     position = models.IntegerField()  # To maintain original order
 
+    # Videos/websites lookup: queued at generation, claimed by whoever fetches, then ready (or partial
+    # when a search failed or timed out and should be retried)
+    RESOURCES_PENDING = 'pending'
+    RESOURCES_FETCHING = 'fetching'
+    RESOURCES_READY = 'ready'
+    RESOURCES_PARTIAL = 'partial'
+    RESOURCES_STATUS_CHOICES = [
+        (RESOURCES_PENDING, 'Pending'),
+        (RESOURCES_FETCHING, 'Fetching'),
+        (RESOURCES_READY, 'Ready'),
+        (RESOURCES_PARTIAL, 'Partial'),
+    ]
+    resources_status = models.CharField(max_length=10, choices=RESOURCES_STATUS_CHOICES, default=RESOURCES_PENDING)
+    resources_status_at = models.DateTimeField(null=True, blank=True)  # When the status last changed
+
 class ChapterVideoResource(models.Model):
     chapter = models.ForeignKey(ChapterResource, on_delete=models.CASCADE, related_name='videos')
     title = models.TextField()
@@ -80,12 +101,30 @@ class ChapterWebResource(models.Model):
     source = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
 
+class PDFDocument(models.Model):
+    """Ingested PDF content shared by every upload with the same SHA-256"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    public_id = models.CharField(max_length=255)  # Cloudinary public_id
+    cloudinary_url = models.URLField(max_length=500)
+    vector_store = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.vector_store
+
 class UserPDF(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pdfs')
     file_name = models.CharField(max_length=255)
     file = CloudinaryField('pdf', resource_type='raw')  # Changed to CloudinaryField
     vector_store = models.CharField(max_length=255)
+    document = models.ForeignKey(PDFDocument, on_delete=models.PROTECT, null=True, blank=True, related_name='user_pdfs')
     upload_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'upload_time', 'id'], name='userpdf_user_upload_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}'s PDF: {self.file_name}"
@@ -102,10 +141,54 @@ class PDFConversation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pdf', 'created_at', 'id'], name='pdfconv_pdf_created_idx'),
+        ]
     
     def __str__(self):
         return f"Conversation about {self.pdf.file_name}"
 
+class YouTubeVectorStoreManager(models.Manager):
+    def find_existing(self, video_id, languages, chunk_size, chunk_overlap):
+        """Best already-ingested store for a video, in transcript language preference order"""
+        stores = {
+            store.language: store
+            for store in self.filter(
+                video_id=video_id,
+                language__in=languages,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        }
+        for language in languages:
+            if language in stores:
+                return stores[language]
+        return None
+
+class YouTubeVectorStore(models.Model):
+    """Vector store shared by every user who processed the same video with the same settings"""
+    video_id = models.CharField(max_length=20)
+    language = models.CharField(max_length=10)
+    chunk_size = models.IntegerField()
+    chunk_overlap = models.IntegerField()
+    store_name = models.CharField(max_length=255, unique=True)
+    video_title = models.CharField(max_length=255, blank=True)
+    thumbnail_url = models.URLField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = YouTubeVectorStoreManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['video_id', 'language', 'chunk_size', 'chunk_overlap'],
+                name='unique_youtube_store_per_video_settings'
+            )
+        ]
+
+    def __str__(self):
+        return self.store_name
+
 class UserYouTubeVideo(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='youtube_videos')
     video_url = models.URLField()
@@ -113,7 +196,13 @@ class UserYouTubeVideo(models.Model):
     video_title = models.CharField(max_length=255)
     thumbnail_url = models.URLField()
     vector_store = models.CharField(max_length=255)
+    store = models.ForeignKey(YouTubeVectorStore, on_delete=models.PROTECT, null=True, blank=True, related_name='videos')
     upload_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'upload_time', 'id'], name='ytvideo_user_upload_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}'s Video: {self.video_title}"
@@ -126,6 +215,70 @@ class YouTubeConversation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['video', 'created_at', 'id'], name='ytconv_video_created_idx'),
+        ]
     
     def __str__(self):
-        return f"Conversation about {self.video.video_title}"
\ No newline at end of file
+        return f"Conversation about {self.video.video_title}"
+
+class AnswerCacheEntry(models.Model):
+    """Answer generated for a question on a vector store, reused for repeated and near-duplicate questions"""
+    store_name = models.CharField(max_length=255)
+    store_version = models.CharField(max_length=64)
+    question = models.TextField()  # Normalized
+    question_hash = models.CharField(max_length=64)
+    embedding = models.BinaryField()  # Unit-length float32 question embedding
+    answer = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store_name', 'store_version', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['store_name', 'store_version', 'question_hash'],
+                name='unique_cached_answer_per_store_question'
+            )
+        ]
+
+    def __str__(self):
+        return f"Cached answer on {self.store_name}: {self.question[:50]}"
+
+
+class ChapterNamesCacheEntry(models.Model):
+    """Chapter list generated for a normalized (topic, grade), shared by all users until it expires"""
+    topic = models.CharField(max_length=255)  # Normalized
+    grade = models.CharField(max_length=50)  # Normalized
+    chapters = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['topic', 'grade'], name='unique_cached_chapters_per_topic_grade')
+        ]
+
+    def __str__(self):
+        return f"Cached chapters for {self.topic} ({self.grade})"
+
+
+class ResourceSearchCacheEntry(models.Model):
+    """YouTube or Tavily results for a normalized search query, shared by all users and workers"""
+    kind = models.CharField(max_length=20)  # "videos" | "websites"
+    query = models.TextField()  # Normalized
+    query_hash = models.CharField(max_length=64)
+    results = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)  # When the results were fetched
+    refresh_started_at = models.DateTimeField(null=True, blank=True)  # Claimed by a worker refreshing it
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'query_hash'], name='unique_cached_resource_search')
+        ]
+
+    def __str__(self):
+        return f"Cached {self.kind} for {self.query[:50]}"
@@ -0,0 +1,95 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, pk: int) -> str:
+    """Opaque position after (timestamp, pk) in a newest-first listing"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.rsplit("|", 1)
+        parsed = parse_datetime(timestamp)
+        if parsed is None:
+            raise ValueError(timestamp)
+        return parsed, int(pk)
+    except ValueError:  # Also covers binascii.Error and UnicodeDecodeError
+        raise InvalidPageRequest("Invalid cursor")
+
+
+@dataclass
+class KeysetPage:
+    rows: List
+    next_cursor: Optional[str]
+    synced_at: Optional[str]
+
+    def meta(self) -> Dict:
+        return {
+            'next_cursor': self.next_cursor,
+            'has_more': self.next_cursor is not None,
+            'synced_at': self.synced_at,
+        }
+
+
+def keyset_page(queryset: QuerySet, params, time_field: str) -> KeysetPage:
+    """One newest-first page of ``queryset`` from request query ``params``.
+
+    ``cursor`` continues after the last row of the previous page and
+    ``limit`` sets the page size (HISTORY_PAGE_SIZE by default, at most
+    HISTORY_MAX_PAGE_SIZE). ``since`` (an ISO timestamp, usually the
+    ``synced_at`` of an earlier response) keeps only rows created after it,
+    so a client can fetch just what is new; deletions are not reported.
+    Pages are read with a range condition on (time_field, id) rather than
+    OFFSET, so a deep page costs the same as the first.
+
+    ``synced_at`` is the server clock read before the query, less
+    HISTORY_SYNC_MARGIN_SECONDS: a row is stamped when it is saved but only
+    becomes visible when its transaction commits, so a row stamped just
+    before the query may show up after it. Rows inside the margin are sent
+    again on the next sync; clients de-duplicate them by id.
+    """
+    started_at = timezone.now()
+    try:
+        limit = int(params.get('limit') or settings.HISTORY_PAGE_SIZE)
+    except ValueError:
+        raise InvalidPageRequest("Invalid limit")
+    limit = max(1, min(limit, settings.HISTORY_MAX_PAGE_SIZE))
+
+    since = params.get('since')
+    if since:
+        since_time = parse_datetime(since.replace(' ', '+'))  # An unescaped "+" in the offset arrives as a space
+        if since_time is None:
+            raise InvalidPageRequest("Invalid since timestamp")
+        queryset = queryset.filter(**{f"{time_field}__gt": since_time})
+
+    cursor = params.get('cursor')
+    if cursor:
+        cursor_time, cursor_pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{time_field}__lt": cursor_time}) | Q(**{time_field: cursor_time, "pk__lt": cursor_pk})
+        )
+
+    rows = list(queryset.order_by(f"-{time_field}", "-pk")[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    synced_at = started_at - timedelta(seconds=settings.HISTORY_SYNC_MARGIN_SECONDS)
+    return KeysetPage(
+        rows=rows,
+        next_cursor=encode_cursor(getattr(last, time_field), last.pk) if more else None,
+        # Pass back as ?since= to get only newer rows; later pages don't move it
+        synced_at=(since or None) if cursor else synced_at.isoformat(),
+    )
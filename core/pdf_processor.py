@@ -1,6 +1,5 @@
 import os
 import time
-import requests
 import google.generativeai as genai
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
@@ -14,13 +13,29 @@ import tempfile
 import cloudinary
 import cloudinary.uploader
 from django.conf import settings
+from .store_cache import vector_store_cache, vector_store_path
+from .embedding_cache import CachedEmbeddings, embedding_cache
+from .query_cache import cached_expansion, normalize_question, query_embedding_cache
+from .embedding_pipeline import make_embedding_pipeline
+from .vector_index import build_vector_store, load_store, save_store
+from .retrieval import hybrid_search
+from .answer_cache import answer_cache
+from .answer_stream import GROQ_CHAT_URL, answer_question_async, chat_completion_async, stream_answer, stream_chat_completion
+from . import http_pool
+from .single_flight import answer_flight
+from .context_packing import pack_context, pdf_span
 
 class PDFProcessor:
     def __init__(self):
         self.groq_api_key = os.getenv("GROQ_API_KEY")
         self.groq_model = "deepseek-r1-distill-llama-70b"
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-        self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        self.embedding_model = CachedEmbeddings(
+            make_embedding_pipeline(GoogleGenerativeAIEmbeddings(model="models/embedding-001")),
+            embedding_cache,
+            model_name="models/embedding-001",
+            query_cache=query_embedding_cache
+        )
         
         # Configure Cloudinary
         cloudinary.config(
@@ -37,6 +52,14 @@ class PDFProcessor:
     def generate_text_hash(self, text: str) -> str:
         return hashlib.md5(text.encode('utf-8')).hexdigest()[:8]
 
+    def compute_file_hash(self, pdf_file) -> str:
+        """Streaming SHA-256 of an uploaded file"""
+        digest = hashlib.sha256()
+        for chunk in pdf_file.chunks():
+            digest.update(chunk)
+        pdf_file.seek(0)
+        return digest.hexdigest()
+
     def upload_to_cloudinary(self, file, user_id=None):
         """Upload file to Cloudinary and return secure URL"""
         try:
@@ -119,29 +142,25 @@ class PDFProcessor:
 
     def create_vector_store(self, chunks, store_name):
         print("Creating embeddings and vector store...")
-        vectorstore = FAISS.from_documents(chunks, self.embedding_model)
+        vectorstore = build_vector_store(chunks, self.embedding_model)
         print(f"Vector store created with {vectorstore.index.ntotal} embeddings")
         
         # Save to vectorstores directory
-        store_path = os.path.join(settings.BASE_DIR, "vectorstores", store_name)
-        vectorstore.save_local(store_path)
+        store_path = vector_store_path(store_name)
+        save_store(vectorstore, store_path)
+        vector_store_cache.invalidate(store_name)
+        answer_cache.invalidate(store_name)
         print(f"Vector store saved at {store_path}")
         return vectorstore
 
     def load_vector_store(self, store_name):
-        store_path = os.path.join(settings.BASE_DIR, "vectorstores", store_name)
-        return FAISS.load_local(
-            store_path,
-            self.embedding_model,
-            allow_dangerous_deserialization=True
+        return vector_store_cache.get(
+            store_name,
+            lambda store_path: load_store(store_path, self.embedding_model)
         )
 
-    def call_groq_llm(self, prompt):
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
+    def _groq_payload(self, prompt):
+        return {
             "model": self.groq_model,
             "messages": [
                 {"role": "system", "content": "You are a helpful AI assistant. Your work is to answer the Question given in prompt by strictly taking help of provided Context. Your solution should be accurate and in detail"},
@@ -149,12 +168,26 @@ class PDFProcessor:
             ]
         }
 
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", json=payload, headers=headers)
+    def call_groq_llm(self, prompt):
+        headers = {
+            "Authorization": f"Bearer {self.groq_api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = self._groq_payload(prompt)
+
+        response = http_pool.post(GROQ_CHAT_URL, json=payload, headers=headers)
         if response.status_code != 200:
             raise Exception(f"Groq LLM error: {response.status_code} - {response.text}")
         
         return response.json()["choices"][0]["message"]["content"]
 
+    def stream_groq_llm(self, prompt):
+        """Yield the completion's content as Groq streams it"""
+        return stream_chat_completion(self.groq_api_key, self._groq_payload(prompt))
+
+    async def call_groq_llm_async(self, prompt):
+        return await chat_completion_async(self.groq_api_key, self._groq_payload(prompt))
+
     def expand_query_with_llm(self, query):
         prompt = f"""You are an expert assistant. The user query below is too short for accurate search.
 So please you answer that query in 10 lines 
@@ -162,31 +195,57 @@ So please you answer that query in 10 lines
 Query: {query}
 
 Expanded version:"""
-        return self.call_groq_llm(prompt)
+        return cached_expansion("pdf", "en", query, lambda: self.call_groq_llm(prompt))
 
-    def answer_question(self, vectorstore, question):
-        # Step 1: Expand the query
-        expanded_query = self.expand_query_with_llm(question)
+    def answer_question(self, vectorstore, question, store_name=None):
+        # Repeated and near-duplicate questions on a named store come from the answer cache
+        if store_name is None:
+            return self.generate_answer(vectorstore, question)
+        # Concurrent duplicates (same store, same normalized question) wait on one computation
+        return answer_flight.do(
+            (store_name, normalize_question(question)),
+            lambda: answer_cache.get_or_answer(
+                store_name, question, self.embedding_model,
+                lambda embedding: self.generate_answer(vectorstore, question, embedding)
+            )
+        )
+
+    async def answer_question_async(self, vectorstore, question, store_name=None):
+        """answer_question without holding a thread while Groq generates"""
+        return await answer_question_async(self, vectorstore, question, store_name)
+
+    def stream_answer(self, vectorstore, question, store_name=None):
+        """Yield (event, data) pairs: references first, then thinking/answer text as it streams"""
+        return stream_answer(self, vectorstore, question, store_name)
+
+    def retrieve_context(self, vectorstore, question, embedding=None):
+        # Step 1: Expand the query (optional; the lexical index covers short queries)
+        expanded_query = question
+        if settings.RETRIEVAL_QUERY_EXPANSION:
+            expanded_query = self.expand_query_with_llm(question)
         
-        # Step 2: Semantic search on expanded query
-        similar_docs = vectorstore.max_marginal_relevance_search(
-            query=expanded_query, 
+        # Step 2: Hybrid lexical + semantic search (the question's embedding only fits an unexpanded query)
+        similar_docs = hybrid_search(
+            vectorstore,
+            expanded_query, 
             k=5, 
-            fetch_k=25
+            fetch_k=25,
+            embedding=embedding if expanded_query == question else None
         )
+        return expanded_query, similar_docs
 
-        if not similar_docs:
-            return {
-                "answer": "No relevant context found.",
-                "references": [],
-                "thinking_process": ""
-            }
+    def build_context(self, similar_docs):
+        # Merge overlapping chunks from the same page and keep within the prompt token budget
+        context = pack_context(similar_docs, settings.CONTEXT_TOKEN_BUDGET, span=pdf_span)
+        print(f"Context: {context.chunks} chunks -> {context.segments} passages, "
+              f"{context.tokens}/{context.raw_tokens} tokens ({context.tokens_saved} saved)")
+        return context
 
-        # Prepare context for LLM
-        full_context = "\n\n".join([doc.page_content for doc in similar_docs])
+    def answer_prompt(self, question, context):
+        full_context = context.text
 
         # Generate answer with thinking process
-        prompt = f"""Analyze the question and provide:
+        return f"""Analyze the question and provide:
 1. Your thinking process (marked with <thinking> tags)
 2. A detailed answer based strictly on the context
 3. Key points from each relevant chunk
@@ -200,12 +259,28 @@ Context:
 Format your response as:
 <thinking>Your analytical process here</thinking>
 <answer>Your structured answer here</answer>"""
-        
-        llm_response = self.call_groq_llm(prompt)
-        
+
+    def format_references(self, similar_docs):
+        return [
+            {
+                "page": doc.metadata["page"],
+                "chunk_id": doc.metadata["chunk_id"],
+                "position": doc.metadata["position"],
+                "text": doc.page_content,
+                "preview": doc.metadata["preview"],
+                "page_hash": doc.metadata["page_hash"],
+                "text_hash": doc.metadata["text_hash"],
+                "cloudinary_id": doc.metadata.get("cloudinary_id", "")
+            } for doc in similar_docs
+        ]
+
+    def build_answer(self, question, expanded_query, similar_docs, llm_response, context=None):
         # Extract thinking and answer parts
-        thinking_process = llm_response.split("<thinking>")[1].split("</thinking>")[0].strip()
-        answer = llm_response.split("<answer>")[1].split("</answer>")[0].strip()
+        try:
+            thinking_process = llm_response.split("<thinking>")[1].split("</thinking>")[0].strip()
+            answer = llm_response.split("<answer>")[1].split("</answer>")[0].strip()
+        except IndexError:
+            thinking_process, answer = "Model did not follow formatting.", llm_response
 
         # Prepare structured response
         response = {
@@ -213,19 +288,24 @@ Format your response as:
             "expanded_query": expanded_query,
             "thinking_process": thinking_process,
             "answer": answer,
-            "references": [
-                {
-                    "page": doc.metadata["page"],
-                    "chunk_id": doc.metadata["chunk_id"],
-                    "position": doc.metadata["position"],
-                    "text": doc.page_content,
-                    "preview": doc.metadata["preview"],
-                    "page_hash": doc.metadata["page_hash"],
-                    "text_hash": doc.metadata["text_hash"],
-                    "cloudinary_id": doc.metadata.get("cloudinary_id", "")
-                } for doc in similar_docs
-            ],
-            "context_hash": self.generate_text_hash(full_context)
+            "references": self.format_references(similar_docs),
+            "context_hash": self.generate_text_hash("\n\n".join([doc.page_content for doc in similar_docs]))
         }
+        if context is not None:
+            response["context_tokens"] = context.report()
+
+        return response
+
+    def generate_answer(self, vectorstore, question, embedding=None):
+        expanded_query, similar_docs = self.retrieve_context(vectorstore, question, embedding)
+
+        if not similar_docs:
+            return {
+                "answer": "No relevant context found.",
+                "references": [],
+                "thinking_process": ""
+            }
 
-        return response
\ No newline at end of file
+        context = self.build_context(similar_docs)
+        llm_response = self.call_groq_llm(self.answer_prompt(question, context))
+        return self.build_answer(question, expanded_query, similar_docs, llm_response, context)
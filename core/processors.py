@@ -0,0 +1,45 @@
+import threading
+from typing import Dict, Type, TypeVar
+
+from .pdf_processor import PDFProcessor
+from .yt_processor import YouTubeProcessor
+
+T = TypeVar("T")
+
+
+class ProcessorRegistry:
+    """Lazily builds one shared instance per processor class in this worker.
+
+    Construction configures SDK clients (Gemini, Cloudinary, transcript API
+    proxies), so it happens once on first use rather than on every request.
+    Instances hold no per-request state and are safe to share across threads.
+    """
+
+    def __init__(self):
+        self._instances: Dict[type, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cls: Type[T]) -> T:
+        instance = self._instances.get(cls)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(cls)
+                if instance is None:
+                    instance = cls()
+                    self._instances[cls] = instance
+        return instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+
+processor_registry = ProcessorRegistry()
+
+
+def get_pdf_processor() -> PDFProcessor:
+    return processor_registry.get(PDFProcessor)
+
+
+def get_youtube_processor() -> YouTubeProcessor:
+    return processor_registry.get(YouTubeProcessor)
@@ -0,0 +1,74 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from django.conf import settings
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a question"""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU bounded by entry count, with hit/miss counters"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: object) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], object]) -> object:
+        """Cached value for ``key``, computing it with ``factory()`` outside the lock on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# (prompt kind, language, normalized question) -> LLM-expanded query
+expansion_cache = LRUCache(settings.QUERY_EXPANSION_CACHE_MAX_ENTRIES)
+# (embedding model, exact text) -> float32 query embedding; shared by the PDF and YouTube paths
+query_embedding_cache = LRUCache(settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
+
+
+def cached_expansion(kind: str, language: str, question: str, expand: Callable[[], str]) -> str:
+    return expansion_cache.get_or_set((kind, language, normalize_question(question)), expand)
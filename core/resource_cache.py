@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ResourceSearchCacheEntry
+from .query_cache import normalize_question
+from .single_flight import resource_search_flight
+
+# A refresh claimed longer ago than this is assumed lost (worker restarted) and may be claimed again
+REFRESH_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def _query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class ResourceSearchCache:
+    """YouTube/Tavily results by normalized search query, shared by every worker through the database.
+
+    Results younger than ``ttl`` are served as they are. Older ones are still
+    served for another ``stale_ttl`` while one worker refreshes them in the
+    background, so a popular curriculum never waits on a search; past that
+    the search runs in the request again. Empty results are never stored.
+    """
+
+    def __init__(self, ttl: timedelta, stale_ttl: timedelta, refresh_workers: int = 2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="resource-refresh")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get_or_fetch(self, kind: str, query: str, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        normalized = normalize_question(query)
+        query_hash = _query_hash(normalized)
+        now = timezone.now()
+        entry = ResourceSearchCacheEntry.objects.filter(
+            kind=kind, query_hash=query_hash, created_at__gte=now - self.ttl - self.stale_ttl
+        ).first()
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            # Concurrent misses for the same query in this worker share one search
+            return resource_search_flight.do((kind, query_hash), lambda: self._fetch_and_store(kind, normalized, fetch))
+
+        ResourceSearchCacheEntry.objects.filter(id=entry.id).update(hits=F("hits") + 1)
+        if entry.created_at >= now - self.ttl:
+            with self._lock:
+                self.hits += 1
+        else:
+            with self._lock:
+                self.stale_hits += 1
+            self._refresh_in_background(entry, fetch)
+        return entry.results
+
+    def _fetch_and_store(self, kind: str, normalized: str, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        results = fetch()
+        try:
+            self.put(kind, normalized, results)
+        except DatabaseError as e:
+            logging.warning(f"Could not cache {kind} for {normalized!r}: {e}")
+        return results
+
+    def put(self, kind: str, query: str, results: List[Dict]) -> None:
+        if not results:
+            return
+        normalized = normalize_question(query)
+        query_hash = _query_hash(normalized)
+        fields = {"results": results, "created_at": timezone.now(), "refresh_started_at": None}
+        entries = ResourceSearchCacheEntry.objects.filter(kind=kind, query_hash=query_hash)
+        if entries.update(**fields):
+            return
+        try:
+            ResourceSearchCacheEntry.objects.create(kind=kind, query=normalized, query_hash=query_hash, **fields)
+        except IntegrityError:
+            entries.update(**fields)  # Another worker stored the same search first
+
+    def _refresh_in_background(self, entry: ResourceSearchCacheEntry, fetch: Callable[[], List[Dict]]) -> None:
+        now = timezone.now()
+        # Only the worker whose UPDATE wins the claim refreshes; the rest keep serving the stale results
+        claimed = ResourceSearchCacheEntry.objects.filter(id=entry.id).filter(
+            Q(refresh_started_at__isnull=True) | Q(refresh_started_at__lt=now - REFRESH_CLAIM_TIMEOUT)
+        ).update(refresh_started_at=now)
+        if claimed:
+            self._refresh_pool.submit(self._refresh, entry, fetch)
+
+    def _refresh(self, entry: ResourceSearchCacheEntry, fetch: Callable[[], List[Dict]]) -> None:
+        try:
+            results = fetch()
+            if results:
+                self.put(entry.kind, entry.query, results)
+            else:
+                # Keep the old results; let another request try again after the claim times out
+                logging.info(f"Refresh of {entry.kind} for {entry.query!r} found nothing; keeping cached results")
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            logging.warning(f"Background refresh of {entry.kind} for {entry.query!r} failed: {e}")
+        finally:
+            connections.close_all()  # This refresh thread's own connections
+
+    def purge_expired(self) -> int:
+        deleted, _ = ResourceSearchCacheEntry.objects.filter(
+            created_at__lt=timezone.now() - self.ttl - self.stale_ttl
+        ).delete()
+        return deleted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": ResourceSearchCacheEntry.objects.count(),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+
+resource_cache = ResourceSearchCache(
+    ttl=timedelta(seconds=settings.RESOURCE_CACHE_TTL_SECONDS),
+    stale_ttl=timedelta(seconds=settings.RESOURCE_CACHE_STALE_SECONDS),
+)
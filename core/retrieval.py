@@ -0,0 +1,228 @@
+import threading
+import weakref
+from typing import List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from django.conf import settings
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+from .lexical_index import lexical_index_for
+from .vector_index import CompressedIndex
+
+
+class StoreMatrix:
+    """L2 norms of a store's vectors, plus access to their rows without copying the store.
+
+    Candidates always come from the store's own FAISS index (exact for flat
+    stores). MMR then needs the unit vectors of just those candidates, which
+    are read from the index's vector array in place (memory-mapped when the
+    store is) and divided by the cached norms. Only indexes that expose no
+    such array (IVF, or compressed without re-rank vectors) reconstruct the
+    rows asked for.
+    The norms, 4 bytes per vector, are the only data kept per store.
+    """
+
+    # Rows read at a time while computing norms, so building never holds a float32 copy of the store
+    NORM_CHUNK_ROWS = 16384
+
+    def __init__(self, index):
+        self.index = index
+        self._vectors = _vector_view(index)
+        ntotal = index.ntotal
+        self.norms = np.empty(ntotal, dtype=np.float32)
+        for start in range(0, ntotal, self.NORM_CHUNK_ROWS):
+            end = min(start + self.NORM_CHUNK_ROWS, ntotal)
+            self.norms[start:end] = np.linalg.norm(self._read(np.arange(start, end)), axis=1)
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.norms)
+
+    def _read(self, ids: np.ndarray) -> np.ndarray:
+        if self._vectors is not None:
+            return np.asarray(self._vectors[ids], dtype=np.float32)
+        source = self.index.index if isinstance(self.index, CompressedIndex) else self.index
+        return source.reconstruct_batch(ids)
+
+    def unit_rows(self, ids: np.ndarray) -> np.ndarray:
+        """Unit-normalized vectors at positions ``ids`` (any shape; -1 padding reads row 0)"""
+        flat = np.where(ids >= 0, ids, 0).ravel()
+        rows = self._read(flat) / np.maximum(self.norms[flat], np.finfo(np.float32).tiny)[:, None]
+        return rows.reshape(*ids.shape, -1)
+
+    def candidates(self, queries: np.ndarray, fetch_k: int) -> np.ndarray:
+        """(batch, fetch_k) candidate positions, nearest first; -1 pads missing results"""
+        _, ids = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), fetch_k)
+        return ids
+
+
+def _vector_view(index) -> Optional[np.ndarray]:
+    """(ntotal, d) array over the vectors an index already holds, or None if it has none to expose"""
+    if isinstance(index, CompressedIndex):
+        return index.vectors
+    flat = faiss.downcast_index(index)
+    if isinstance(flat, faiss.IndexHNSW):
+        flat = faiss.downcast_index(flat.storage)  # HNSW graphs keep the vectors in a flat storage index
+    if isinstance(flat, faiss.IndexFlat):
+        return faiss.rev_swig_ptr(flat.get_xb(), flat.ntotal * flat.d).reshape(flat.ntotal, flat.d)
+    return None
+
+
+# Norms live exactly as long as the store object they were computed for,
+# so evicting a store from vector_store_cache releases them too
+_matrices: "weakref.WeakKeyDictionary[FAISS, StoreMatrix]" = weakref.WeakKeyDictionary()
+_build_locks: "weakref.WeakKeyDictionary[FAISS, threading.Lock]" = weakref.WeakKeyDictionary()
+_matrices_lock = threading.Lock()
+
+
+def _current(matrix: Optional[StoreMatrix], vectorstore: FAISS) -> bool:
+    return matrix is not None and matrix.index is vectorstore.index and matrix.ntotal == vectorstore.index.ntotal
+
+
+def store_matrix(vectorstore: FAISS) -> StoreMatrix:
+    """Norms and row access for a store, built on first use.
+
+    The global lock only guards the tables; the build runs under a lock of
+    its own per store, so a large store doesn't hold up searches on others.
+    """
+    with _matrices_lock:
+        matrix = _matrices.get(vectorstore)
+        if _current(matrix, vectorstore):
+            return matrix
+        build_lock = _build_locks.setdefault(vectorstore, threading.Lock())
+    with build_lock:
+        with _matrices_lock:
+            matrix = _matrices.get(vectorstore)
+        if not _current(matrix, vectorstore):
+            matrix = StoreMatrix(vectorstore.index)
+            with _matrices_lock:
+                _matrices[vectorstore] = matrix
+    return matrix
+
+
+def mmr_select(query_sims: np.ndarray, pair_sims: np.ndarray, valid: np.ndarray,
+               k: int, lambda_mult: float) -> np.ndarray:
+    """Maximal marginal relevance over a batch of candidate lists.
+
+    ``query_sims`` is the (batch, n) relevance of each candidate (query cosine,
+    or normalized fusion score), ``pair_sims`` the (batch, n, n)
+    candidate/candidate cosine and ``valid`` masks padding.
+    Returns (batch, k) candidate columns in selection order, -1 once a row
+    runs out; ties go to the nearer candidate, as in LangChain's loop.
+    """
+    batch, n = query_sims.shape
+    rows = np.arange(batch)
+    selected = np.full((batch, k), -1, dtype=np.int64)
+    available = valid.copy()
+    redundancy = np.full((batch, n), -np.inf, dtype=np.float32)
+    for step in range(k):
+        if step == 0:
+            scores = query_sims.copy()
+        else:
+            scores = lambda_mult * query_sims - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        picks = np.argmax(scores, axis=1)
+        active = available[rows, picks]
+        if not active.any():
+            break
+        selected[active, step] = picks[active]
+        available[rows[active], picks[active]] = False
+        redundancy[active] = np.maximum(redundancy[active], pair_sims[rows[active], picks[active]])
+    return selected
+
+
+def mmr_search_by_vectors(vectorstore: FAISS, embeddings: Sequence[Sequence[float]], k: int = 4,
+                          fetch_k: int = 20, lambda_mult: float = 0.5) -> List[List[Document]]:
+    """MMR search for a batch of query embeddings; one result list per query"""
+    queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    matrix = store_matrix(vectorstore)
+    fetch_k = min(fetch_k, matrix.ntotal)
+    k = min(k, fetch_k)
+    if k <= 0:
+        return [[] for _ in queries]
+
+    ids = matrix.candidates(queries, fetch_k)
+    valid = ids >= 0
+    candidates = matrix.unit_rows(ids)
+    query_units = queries / np.maximum(np.linalg.norm(queries, axis=1), np.finfo(np.float32).tiny)[:, None]
+    query_sims = np.einsum("bd,bnd->bn", query_units, candidates)
+    pair_sims = np.einsum("bnd,bmd->bnm", candidates, candidates)
+    selected = mmr_select(query_sims, pair_sims, valid, k, lambda_mult)
+    return _documents(vectorstore, ids, selected)
+
+
+def _documents(vectorstore: FAISS, ids: np.ndarray, selected: np.ndarray) -> List[List[Document]]:
+    results = []
+    for row_ids, row_selected in zip(ids, selected):
+        docs = []
+        for column in row_selected[row_selected >= 0]:
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(row_ids[column])])
+            if isinstance(doc, Document):
+                docs.append(doc)
+        results.append(docs)
+    return results
+
+
+def mmr_search_batch(vectorstore: FAISS, queries: List[str], k: int = 4, fetch_k: int = 20,
+                     lambda_mult: float = 0.5) -> List[List[Document]]:
+    embeddings = [vectorstore.embedding_function.embed_query(query) for query in queries]
+    return mmr_search_by_vectors(vectorstore, embeddings, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+
+
+def mmr_search(vectorstore: FAISS, query: str, k: int = 4, fetch_k: int = 20,
+               lambda_mult: float = 0.5) -> List[Document]:
+    """Drop-in for ``vectorstore.max_marginal_relevance_search`` on the vectorized path"""
+    return mmr_search_batch(vectorstore, [query], k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)[0]
+
+
+def reciprocal_rank_fusion(rankings: List[Sequence[int]], rrf_k: int) -> List[Tuple[int, float]]:
+    """(position, score) pairs ordered by summed 1 / (rrf_k + rank); ties keep first-seen order"""
+    fused = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, start=1):
+            fused[int(position)] = fused.get(int(position), 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def hybrid_search_by_vectors(vectorstore: FAISS, queries: List[str], embeddings: Sequence[Sequence[float]],
+                             k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5) -> List[List[Document]]:
+    """Fuse vector and BM25 rankings with RRF, then pick a diverse top ``k`` with MMR.
+
+    Stores without a lexical index fall back to plain vector MMR.
+    """
+    lexical = lexical_index_for(vectorstore)
+    if lexical is None:
+        return mmr_search_by_vectors(vectorstore, embeddings, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+
+    vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    matrix = store_matrix(vectorstore)
+    fetch_k = min(fetch_k, matrix.ntotal)
+    k = min(k, fetch_k)
+    if k <= 0:
+        return [[] for _ in queries]
+
+    vector_ids = matrix.candidates(vectors, fetch_k)
+    ids = np.full((len(queries), fetch_k), -1, dtype=np.int64)
+    relevance = np.zeros((len(queries), fetch_k), dtype=np.float32)
+    for row, (query, ranked) in enumerate(zip(queries, vector_ids)):
+        lexical_ids, _ = lexical.search(query, fetch_k)
+        fused = reciprocal_rank_fusion([ranked[ranked >= 0], lexical_ids], settings.RETRIEVAL_RRF_K)[:fetch_k]
+        ids[row, :len(fused)] = [position for position, _ in fused]
+        # Scaled to [0, 1] so MMR weighs it against cosine redundancy as it would query similarity
+        relevance[row, :len(fused)] = [score / fused[0][1] for _, score in fused]
+
+    valid = ids >= 0
+    candidates = matrix.unit_rows(ids)
+    pair_sims = np.einsum("bnd,bmd->bnm", candidates, candidates)
+    selected = mmr_select(relevance, pair_sims, valid, k, lambda_mult)
+    return _documents(vectorstore, ids, selected)
+
+
+def hybrid_search(vectorstore: FAISS, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+                  embedding: Optional[Sequence[float]] = None) -> List[Document]:
+    """``hybrid_search_by_vectors`` for one query; pass ``embedding`` when the query was already embedded"""
+    if embedding is None:
+        embedding = vectorstore.embedding_function.embed_query(query)
+    return hybrid_search_by_vectors(vectorstore, [query], [embedding], k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)[0]
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key onto one in-progress computation.
+
+    The first caller for a key runs it; callers arriving before it finishes
+    wait and receive the same result (or exception), which they must treat as
+    read-only. Sync threads and async views share one table, so a duplicate
+    can wait on work started by either. Nothing is kept once the call ends;
+    caching finished results is left to the layers underneath.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.collapsed = 0
+        self.failures = 0
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                logging.info(f"[{self.name}] Joined in-flight computation for {key!r}")
+                return call, False
+            call = self._calls[key] = _Call()
+            self.executions += 1
+            return call, True
+
+    def _finish(self, key: Hashable, call: _Call, result, error) -> None:
+        with self._lock:
+            del self._calls[key]
+            call.result, call.error = result, error
+            if error is not None:
+                self.failures += 1
+            waiters, call.waiters = call.waiters, []
+            call.done.set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_settle, future, result, error)
+
+    @staticmethod
+    def _outcome(call: _Call):
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return self._outcome(call)
+        result, error = None, None
+        try:
+            result = fn()
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(key, call, result, error)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call, leader = self._join(key)
+        if not leader:
+            with self._lock:
+                if not call.done.is_set():
+                    future = asyncio.get_running_loop().create_future()
+                    call.waiters.append((asyncio.get_running_loop(), future))
+                    settled = False
+                else:
+                    settled = True
+            if settled:
+                return self._outcome(call)
+            return await future
+        result, error = None, None
+        try:
+            result = await fn()
+            return result
+        except asyncio.CancelledError:
+            # The leader's client went away; the waiters still need an answer
+            error = RuntimeError(f"[{self.name}] in-flight computation was cancelled")
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(key, call, result, error)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            calls = self.executions + self.collapsed
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "failures": self.failures,
+                "collapse_ratio": self.collapsed / calls if calls else 0.0,
+            }
+
+
+def _settle(future: asyncio.Future, result, error) -> None:
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+# Transcript fetch + embedding + store build, keyed by video and chunking settings
+video_processing_flight = SingleFlight("video-processing")
+# PDF upload + parsing + embedding, keyed by the file's SHA-256
+pdf_processing_flight = SingleFlight("pdf-processing")
+# Retrieval + LLM answer, keyed by store and normalized question
+answer_flight = SingleFlight("answers")
+# LLM chapter outlines, keyed by normalized topic and grade
+chapter_names_flight = SingleFlight("chapter-names")
+# YouTube/Tavily resource searches missing from the resource cache, keyed by kind and query hash
+resource_search_flight = SingleFlight("resource-search")
+
+
+def flight_stats() -> Dict[str, Dict[str, float]]:
+    return {flight.name: flight.stats() for flight in (
+        video_processing_flight, pdf_processing_flight, answer_flight, chapter_names_flight, resource_search_flight
+    )}
@@ -0,0 +1,131 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+def vector_store_path(store_name: str) -> str:
+    """Absolute directory of a named vector store"""
+    return os.path.join(settings.VECTORSTORES_DIR, store_name)
+
+
+def store_version(store_path: str) -> Optional[Tuple[Tuple[str, int, int], ...]]:
+    """(name, mtime_ns, size) for every file in the store, or None if it is missing"""
+    try:
+        entries = sorted(os.scandir(store_path), key=lambda e: e.name)
+    except FileNotFoundError:
+        return None
+    version = []
+    for entry in entries:
+        if entry.is_file():
+            stat = entry.stat()
+            version.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+class _CacheEntry:
+    __slots__ = ("store", "version", "nbytes")
+
+    def __init__(self, store, version, nbytes: int):
+        self.store = store
+        self.version = version
+        self.nbytes = nbytes
+
+
+class VectorStoreCache:
+    """Process-wide LRU of loaded vector stores, bounded by on-disk size.
+
+    Entries are keyed by store name and re-validated against the mtime/size of
+    the files in the store directory on every lookup, so a store rebuilt on disk
+    (by this or another worker) is reloaded on its next use.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, store_name: str, loader: Callable[[str], object]):
+        """Return the cached store, loading it with ``loader(store_path)`` on a miss"""
+        store_path = vector_store_path(store_name)
+        version = store_version(store_path)
+        if version is None:
+            self.invalidate(store_name)
+            raise FileNotFoundError(f"Vector store not found: {store_path}")
+
+        with self._lock:
+            entry = self._entries.get(store_name)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(store_name)
+                self.hits += 1
+                return entry.store
+            if entry is not None:
+                self._remove(store_name)
+                self.invalidations += 1
+            self.misses += 1
+
+        # Load outside the lock so a slow load doesn't block hits on other stores
+        store = loader(store_path)
+        nbytes = sum(size for _, _, size in version)
+        self._put(store_name, _CacheEntry(store, version, nbytes))
+        return store
+
+    def invalidate(self, store_name: str) -> None:
+        with self._lock:
+            if store_name in self._entries:
+                self._remove(store_name)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _put(self, store_name: str, entry: _CacheEntry) -> None:
+        if entry.nbytes > self.max_bytes:
+            logging.info(f"Vector store '{store_name}' ({entry.nbytes} bytes) exceeds cache budget; not cached.")
+            return
+        with self._lock:
+            if store_name in self._entries:
+                self._remove(store_name)
+            self._entries[store_name] = entry
+            self._bytes += entry.nbytes
+            while self._entries and (
+                self._bytes > self.max_bytes
+                or (self.max_entries and len(self._entries) > self.max_entries)
+            ):
+                evicted, _ = next(iter(self._entries.items()))
+                self._remove(evicted)
+                self.evictions += 1
+                logging.info(f"Evicted vector store '{evicted}' from cache.")
+
+    def _remove(self, store_name: str) -> None:
+        entry = self._entries.pop(store_name)
+        self._bytes -= entry.nbytes
+
+
+vector_store_cache = VectorStoreCache(
+    max_bytes=settings.VECTOR_STORE_CACHE_MAX_BYTES,
+    max_entries=settings.VECTOR_STORE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,108 @@
+"""Tests for core/answer_cache.py.
+
+Questions embed to fixed vectors chosen for their cosine similarity, and the
+store is a directory in a temporary VECTORSTORES_DIR whose file is rewritten to
+simulate a rebuild. Run with ``python manage.py test core``.
+"""
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from langchain_core.embeddings import Embeddings
+
+from core.answer_cache import SemanticAnswerCache
+from core.models import AnswerCacheEntry
+
+VECTORS = {
+    "What is inertia?": [1.0, 0.0],
+    "Define inertia": [0.96, 0.28],  # cosine 0.96 with the first question
+    "What is friction?": [0.6, 0.8],  # cosine 0.6
+}
+
+
+class FixedEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        return [VECTORS[text] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return VECTORS[text]
+
+
+class SemanticAnswerCacheTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(VECTORSTORES_DIR=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.build_store(b"v1")
+        self.cache = SemanticAnswerCache(threshold=0.9, ttl=timedelta(hours=1), max_entries_per_store=10)
+        self.embeddings = FixedEmbeddings()
+        self.answered = []
+
+    def build_store(self, content):
+        path = os.path.join(self.root, "store")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "index.faiss"), "wb") as f:
+            f.write(content)
+
+    def ask(self, question):
+        def answer(embedding):
+            self.answered.append(question)
+            return {"question": question, "answer": f"answer to {question}"}
+        return self.cache.get_or_answer("store", question, self.embeddings, answer)
+
+    def test_exact_repeat_skips_the_embedding_call(self):
+        self.ask("What is inertia?")
+        result = self.ask("  what is INERTIA ")
+        self.assertTrue(result["cached"])
+        self.assertEqual(result["answer"], "answer to What is inertia?")
+        self.assertEqual(result["question"], "  what is INERTIA ")
+        self.assertEqual(self.embeddings.queries, ["What is inertia?"])
+        self.assertEqual(self.cache.stats()["exact_hits"], 1)
+
+    def test_similar_question_above_threshold_hits(self):
+        self.ask("What is inertia?")
+        result = self.ask("Define inertia")
+        self.assertTrue(result["cached"])
+        self.assertAlmostEqual(result["cache_similarity"], 0.96, places=3)
+        self.assertEqual(self.answered, ["What is inertia?"])
+
+    def test_question_below_threshold_misses(self):
+        self.ask("What is inertia?")
+        result = self.ask("What is friction?")
+        self.assertFalse(result["cached"])
+        self.assertEqual(self.answered, ["What is inertia?", "What is friction?"])
+
+    def test_expired_entries_are_ignored(self):
+        self.ask("What is inertia?")
+        AnswerCacheEntry.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertFalse(self.ask("What is inertia?")["cached"])
+        self.assertEqual(len(self.answered), 2)
+
+    def test_rebuilt_store_ignores_and_replaces_old_entries(self):
+        self.ask("What is inertia?")
+        self.build_store(b"v2 with more chunks")
+        self.assertFalse(self.ask("What is inertia?")["cached"])
+        self.assertEqual(AnswerCacheEntry.objects.filter(store_name="store").count(), 1)
+        self.assertTrue(self.ask("What is inertia?")["cached"])
+
+    def test_invalidate_drops_the_store_entries(self):
+        self.ask("What is inertia?")
+        self.cache.invalidate("store")
+        self.assertFalse(AnswerCacheEntry.objects.exists())
+        self.assertFalse(self.ask("What is inertia?")["cached"])
+
+    def test_missing_store_is_never_cached(self):
+        shutil.rmtree(os.path.join(self.root, "store"))
+        self.ask("What is inertia?")
+        self.ask("What is inertia?")
+        self.assertEqual(len(self.answered), 2)
+        self.assertFalse(AnswerCacheEntry.objects.exists())
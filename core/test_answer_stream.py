@@ -0,0 +1,54 @@
+"""Tests for TaggedStreamSplitter in core/answer_stream.py.
+
+Each response is fed in every possible two-piece split as well as one
+character at a time, so tags cut at any delta boundary are covered. Run with
+``python manage.py test core``.
+"""
+from django.test import SimpleTestCase
+
+from core.answer_stream import TaggedStreamSplitter
+
+RESPONSE = "Sure.\n<thinking>Force = mass * acceleration</thinking>\n<answer>\nF = 10 N <b>net</b></answer>"
+
+
+def split(deltas):
+    """Run deltas through a splitter; returns the joined text per section"""
+    splitter = TaggedStreamSplitter()
+    events = [event for delta in deltas for event in splitter.feed(delta)] + splitter.flush()
+    sections = {}
+    for section, text in events:
+        sections[section] = sections.get(section, "") + text
+    return sections
+
+
+class TaggedStreamSplitterTests(SimpleTestCase):
+    expected = {"thinking": "Force = mass * acceleration", "answer": "\nF = 10 N <b>net</b>"}
+
+    def test_whole_response(self):
+        # Text between </thinking> and <answer> is dropped; the newline after <answer> is kept
+        self.assertEqual(split([RESPONSE]), self.expected)
+
+    def test_every_two_piece_split(self):
+        for cut in range(1, len(RESPONSE)):
+            with self.subTest(cut=cut, around=RESPONSE[max(cut - 5, 0):cut + 5]):
+                self.assertEqual(split([RESPONSE[:cut], RESPONSE[cut:]]), self.expected)
+
+    def test_one_character_at_a_time(self):
+        self.assertEqual(split(list(RESPONSE)), self.expected)
+
+    def test_partial_tag_is_held_back_until_resolved(self):
+        splitter = TaggedStreamSplitter()
+        self.assertEqual(splitter.feed("<answer>x <"), [("answer", "x ")])
+        self.assertEqual(splitter.feed("/ans"), [])
+        self.assertEqual(splitter.feed("wer>after"), [])
+        self.assertIsNone(splitter.section)
+
+    def test_lookalike_is_emitted_once_ruled_out(self):
+        splitter = TaggedStreamSplitter()
+        splitter.feed("<answer>a <")
+        self.assertEqual(splitter.feed("= b"), [("answer", "<"), ("answer", "= b")])
+
+    def test_flush_emits_an_unterminated_section(self):
+        splitter = TaggedStreamSplitter()
+        self.assertEqual(splitter.feed("<thinking>cut off <th"), [("thinking", "cut off ")])
+        self.assertEqual(splitter.flush(), [("thinking", "<th")])
@@ -0,0 +1,72 @@
+"""Tests for core/context_packing.py.
+
+Run with ``python manage.py test core``.
+"""
+from django.test import SimpleTestCase
+from langchain.schema import Document
+
+from core.context_packing import estimate_tokens, join_overlapping, pack_context, pdf_span, video_span
+
+PAGE = ("Newton's first law says a body stays at rest or in uniform motion unless a net force acts on it. "
+        "The second law says the net force equals mass times acceleration.")
+
+
+def pdf_chunk(start, end, page=1, source="book.pdf"):
+    return Document(page_content=PAGE[start:end + 1],
+                    metadata={"source": source, "page": page, "position": {"start": start, "end": end}})
+
+
+def video_chunk(text, start, end, video_id="abc123"):
+    return Document(page_content=text, metadata={"video_id": video_id, "timestamp": {"start": start, "end": end}})
+
+
+class JoinOverlappingTests(SimpleTestCase):
+    def test_drops_the_shared_seam(self):
+        self.assertEqual(join_overlapping("the quick brown fox jumps", "brown fox jumps over"),
+                         "the quick brown fox jumps over")
+
+    def test_contained_text_is_not_repeated(self):
+        self.assertEqual(join_overlapping("the quick brown fox", "quick brown"), "the quick brown fox")
+        self.assertEqual(join_overlapping("quick brown", "the quick brown fox"), "the quick brown fox")
+
+    def test_short_coincidental_overlap_is_kept(self):
+        self.assertEqual(join_overlapping("ends with the", "the start"), "ends with the the start")
+
+
+class PackContextTests(SimpleTestCase):
+    def test_overlapping_pdf_chunks_merge_into_one_passage(self):
+        docs = [pdf_chunk(80, 165), pdf_chunk(0, 100)]
+        packed = pack_context(docs, token_budget=0, span=pdf_span)
+        self.assertEqual(packed.text, PAGE[:166])
+        self.assertEqual((packed.chunks, packed.segments), (2, 1))
+        self.assertGreater(packed.tokens_saved, 0)
+
+    def test_chunks_on_other_pages_stay_apart_in_rank_order(self):
+        docs = [pdf_chunk(0, 40, page=2), pdf_chunk(0, 40, page=1), pdf_chunk(30, 60, page=2)]
+        packed = pack_context(docs, token_budget=0, span=pdf_span)
+        self.assertEqual(packed.text, PAGE[:61] + "\n\n" + PAGE[:41])
+        self.assertEqual(packed.segments, 2)
+
+    def test_touching_transcript_chunks_merge(self):
+        docs = [video_chunk("and that is inertia.", 10.0, 20.0), video_chunk("A body at rest stays at rest", 0.0, 10.0),
+                video_chunk("Unrelated clip", 5.0, 8.0, video_id="other")]
+        packed = pack_context(docs, token_budget=0, span=video_span)
+        self.assertEqual(packed.text, "A body at rest stays at rest and that is inertia.\n\nUnrelated clip")
+
+    def test_budget_drops_lower_ranked_passages(self):
+        docs = [Document(page_content="alpha " * 20), Document(page_content="beta " * 20)]
+        packed = pack_context(docs, token_budget=30)
+        self.assertEqual(packed.text, "alpha " * 20)
+        self.assertEqual((packed.dropped_segments, packed.truncated), (1, False))
+
+    def test_first_passage_is_truncated_rather_than_dropped(self):
+        packed = pack_context([Document(page_content="word " * 100)], token_budget=10)
+        self.assertTrue(packed.truncated)
+        self.assertLessEqual(packed.tokens, 10)
+        self.assertTrue(packed.text.startswith("word"))
+
+    def test_chunks_without_span_metadata_are_kept_separately(self):
+        docs = [Document(page_content="old chunk one"), Document(page_content="old chunk two")]
+        packed = pack_context(docs, token_budget=0, span=pdf_span)
+        self.assertEqual(packed.text, "old chunk one\n\nold chunk two")
+        self.assertEqual(packed.tokens, estimate_tokens(packed.text))
@@ -0,0 +1,76 @@
+"""Tests for core/embedding_cache.py.
+
+The cache lives in a temporary SQLite file and a fake model records every
+text it is asked to embed, so a cache hit shows up as a text the model never
+saw. Run with ``python manage.py test core``.
+"""
+import os
+import shutil
+import tempfile
+from typing import List
+
+from django.test import SimpleTestCase
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_cache import CachedEmbeddings, EmbeddingCache
+from core.query_cache import LRUCache
+
+
+class RecordingEmbeddings(Embeddings):
+    """Embeds a text as [len(text), 1.0] and records what it was sent"""
+
+    def __init__(self):
+        self.documents: List[List[str]] = []
+        self.queries: List[str] = []
+
+    def embed_documents(self, texts):
+        self.documents.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+
+class CachedEmbeddingsTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.cache = EmbeddingCache(os.path.join(root, "embeddings.sqlite3"))
+        self.model = RecordingEmbeddings()
+
+    def embeddings(self, model_name="model-a", query_cache=None):
+        return CachedEmbeddings(self.model, self.cache, model_name, query_cache)
+
+    def test_only_missing_texts_reach_the_model(self):
+        embeddings = self.embeddings()
+        embeddings.embed_documents(["alpha", "beta"])
+
+        vectors = embeddings.embed_documents(["beta", "gamma", "alpha"])
+
+        self.assertEqual(self.model.documents, [["alpha", "beta"], ["gamma"]])
+        self.assertEqual(vectors, [[4.0, 1.0], [5.0, 1.0], [5.0, 1.0]])
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (3, 2, 3))
+
+    def test_duplicate_texts_are_embedded_once(self):
+        vectors = self.embeddings().embed_documents(["same", "same", "other"])
+        self.assertEqual(self.model.documents, [["same", "other"]])
+        self.assertEqual(vectors[0], vectors[1])
+
+    def test_entries_are_scoped_to_the_model(self):
+        self.embeddings("model-a").embed_documents(["alpha"])
+        self.embeddings("model-b").embed_documents(["alpha"])
+        self.assertEqual(self.model.documents, [["alpha"], ["alpha"]])
+
+    def test_entries_survive_a_new_connection(self):
+        self.embeddings().embed_documents(["alpha"])
+        reopened = CachedEmbeddings(self.model, EmbeddingCache(self.cache.path), "model-a")
+        self.assertEqual(reopened.embed_documents(["alpha"]), [[5.0, 1.0]])
+        self.assertEqual(self.model.documents, [["alpha"]])
+
+    def test_queries_use_the_in_process_cache(self):
+        embeddings = self.embeddings(query_cache=LRUCache(max_entries=10))
+        first = embeddings.embed_query("what is a limit")
+        self.assertEqual(embeddings.embed_query("what is a limit"), first)
+        self.assertEqual(self.model.queries, ["what is a limit"])
@@ -0,0 +1,101 @@
+"""Tests for core/embedding_pipeline.py.
+
+The upstream model is a fake that fails with 429-style errors on demand, and
+retries run with no backoff delay. Run with ``python manage.py test core``.
+"""
+import importlib
+import threading
+
+from django.test import SimpleTestCase, override_settings
+from langchain_core.embeddings import Embeddings
+
+from core import embedding_pipeline
+from core.embedding_pipeline import EmbeddingPipeline, TokenBucket, is_rate_limited
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+class FlakyEmbeddings(Embeddings):
+    """Raises ``failures`` errors before answering; embeds a text as [len(text)]"""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or RateLimitError("429 Resource has been exhausted")
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            if self.failures:
+                self.failures -= 1
+                raise self.error
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_rejects_a_non_positive_rate(self):
+        for rate in (0, -1):
+            with self.assertRaises(ValueError):
+                TokenBucket(rate)
+
+    def test_limiter_is_disabled_when_rpm_is_not_positive(self):
+        self.addCleanup(importlib.reload, embedding_pipeline)
+        with override_settings(EMBEDDING_REQUESTS_PER_MINUTE=0):
+            self.assertIsNone(importlib.reload(embedding_pipeline).embedding_rate_limiter)
+        with override_settings(EMBEDDING_REQUESTS_PER_MINUTE=120, EMBEDDING_MAX_WORKERS=3):
+            limiter = importlib.reload(embedding_pipeline).embedding_rate_limiter
+            self.assertEqual((limiter.rate, limiter.capacity), (2.0, 3))
+
+    def test_burst_up_to_capacity_without_waiting(self):
+        bucket = TokenBucket(rate_per_second=0.001, capacity=3)
+        done = threading.Event()
+
+        def drain():
+            for _ in range(3):
+                bucket.acquire()
+            done.set()
+
+        threading.Thread(target=drain, daemon=True).start()
+        self.assertTrue(done.wait(1))
+
+
+class EmbeddingPipelineTests(SimpleTestCase):
+    def pipeline(self, embeddings, **kwargs):
+        kwargs.setdefault("initial_delay", 0)
+        return EmbeddingPipeline(embeddings, **kwargs)
+
+    def test_batches_keep_input_order(self):
+        texts = ["a" * n for n in range(1, 8)]
+        embeddings = FlakyEmbeddings()
+        vectors = self.pipeline(embeddings, batch_size=2, max_workers=3).embed_documents(texts)
+        self.assertEqual(vectors, [[float(n)] for n in range(1, 8)])
+        self.assertEqual(sorted(len(batch) for batch in embeddings.calls), [1, 2, 2, 2])
+
+    def test_rate_limited_batch_is_retried(self):
+        embeddings = FlakyEmbeddings(failures=2)
+        vectors = self.pipeline(embeddings, max_retries=2).embed_documents(["abc"])
+        self.assertEqual(vectors, [[3.0]])
+        self.assertEqual(len(embeddings.calls), 3)
+
+    def test_gives_up_after_max_retries(self):
+        embeddings = FlakyEmbeddings(failures=5)
+        with self.assertRaises(RateLimitError):
+            self.pipeline(embeddings, max_retries=2).embed_documents(["abc"])
+        self.assertEqual(len(embeddings.calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        embeddings = FlakyEmbeddings(failures=1, error=ValueError("bad input"))
+        with self.assertRaises(ValueError):
+            self.pipeline(embeddings).embed_documents(["abc"])
+        self.assertEqual(len(embeddings.calls), 1)
+
+    def test_recognises_quota_errors(self):
+        self.assertTrue(is_rate_limited(RateLimitError()))
+        self.assertTrue(is_rate_limited(Exception("ResourceExhausted: quota exceeded")))
+        self.assertFalse(is_rate_limited(Exception("invalid argument")))
@@ -0,0 +1,79 @@
+"""Tests for the search libraries' routing through core/http_pool.py.
+
+They run the pinned ``youtube_search`` and ``tavily-python`` clients as
+``core.utils`` uses them, with the pooled session replaced by a stub, so an
+upstream change to how those clients send requests fails here. Run with
+``python manage.py test core``.
+"""
+import json
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+from tavily import TavilyClient
+from tavily.errors import UsageLimitExceededError
+from youtube_search import YoutubeSearch
+
+from core import http_pool, utils  # noqa: F401 - importing utils routes the libraries through the pool
+
+SEARCH_PAGE = "var ytInitialData = " + json.dumps({
+    "contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {"sectionListRenderer": {"contents": [
+        {"itemSectionRenderer": {"contents": [{"videoRenderer": {
+            "videoId": "abc123",
+            "title": {"runs": [{"text": "Limits explained"}]},
+            "longBylineText": {"runs": [{"text": "Systems Channel"}]},
+            "navigationEndpoint": {"commandMetadata": {"webCommandMetadata": {"url": "/watch?v=abc123"}}},
+        }}]}},
+    ]}}}},
+}) + ";</script>"
+
+
+def response(status, body):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body.encode()
+    return resp
+
+
+class PooledSearchClientTests(SimpleTestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        patcher = mock.patch.object(http_pool, "session_for", return_value=self.session)
+        self.session_for = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self):
+        (method, url), kwargs = self.session.request.call_args
+        return method, url, kwargs
+
+    def test_tavily_search_goes_through_the_pool(self):
+        self.session.request.return_value = response(200, json.dumps({"results": [{"url": "https://example.com"}]}))
+
+        result = TavilyClient(api_key="tvly-test").search(query="rate limits", max_results=5)
+
+        self.assertEqual(result["results"], [{"url": "https://example.com"}])
+        method, url, kwargs = self.sent()
+        self.assertEqual((method, url), ("POST", "https://api.tavily.com/search"))
+        self.assertEqual(json.loads(kwargs["data"])["query"], "rate limits")
+        self.assertEqual(self.session_for.call_args.args[0], "https://api.tavily.com/search")
+
+    def test_tavily_errors_are_mapped_upstream(self):
+        self.session.request.return_value = response(429, json.dumps({"detail": {"error": "slow down"}}))
+        with self.assertRaises(UsageLimitExceededError):
+            TavilyClient(api_key="tvly-test").search(query="rate limits")
+
+    def test_youtube_search_goes_through_the_pool(self):
+        self.session.request.return_value = response(200, SEARCH_PAGE)
+
+        videos = YoutubeSearch("rate limits", max_results=20).to_dict()
+
+        self.assertEqual([video["id"] for video in videos], ["abc123"])
+        method, url, kwargs = self.sent()
+        self.assertEqual((method, url), ("GET", "https://youtube.com/results?search_query=rate+limits"))
+        self.assertIn("timeout", kwargs)
+
+    def test_routing_refuses_a_module_without_global_requests(self):
+        module = mock.Mock(spec=["__name__"])
+        module.__name__ = "changed_client"
+        with self.assertRaises(RuntimeError):
+            http_pool.route_through_pool(module)
@@ -0,0 +1,92 @@
+"""Tests for core/lexical_index.py and the RRF fusion in core/retrieval.py.
+
+Run with ``python manage.py test core``.
+"""
+import math
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.lexical_index import BM25Index, has_lexical_index, tokenize
+from core.retrieval import reciprocal_rank_fusion
+
+CHUNKS = [
+    "The mitochondria is the powerhouse of the cell.",
+    "Photosynthesis converts light into chemical energy in the chloroplast.",
+    "Mitochondria and chloroplasts both carry their own DNA. Mitochondria divide on their own.",
+    "Newton's second law relates force, mass and acceleration.",
+]
+
+
+class BM25IndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = BM25Index.build(CHUNKS)
+
+    def test_tokenize_drops_stopwords_and_case(self):
+        self.assertEqual(tokenize("What is the Mitochondria?"), ["mitochondria"])
+        self.assertEqual(tokenize("बल और त्वरण"), ["बल", "और", "त्वरण"])
+
+    def test_leaves_out_non_matches_and_normalizes_for_length(self):
+        # Chunk 0 mentions the term once in 3 tokens, chunk 2 twice in 9
+        positions, scores = self.index.search("mitochondria", top_k=10)
+        self.assertEqual(positions.tolist(), [0, 2])
+        self.assertGreater(scores[0], scores[1])
+
+    def test_repeated_terms_score_higher(self):
+        index = BM25Index.build(["force acts", "force force"])
+        positions, _ = index.search("force", top_k=2)
+        self.assertEqual(positions.tolist(), [1, 0])
+
+    def test_score_matches_okapi_bm25(self):
+        positions, scores = self.index.search("force", top_k=1)
+        k1, b = self.index.k1, self.index.b
+        length = len(tokenize(CHUNKS[3]))
+        idf = math.log(1 + (4 - 1 + 0.5) / (1 + 0.5))
+        expected = idf * (k1 + 1) / (1 + k1 * (1 - b + b * length / self.index.avg_length))
+        self.assertEqual(positions.tolist(), [3])
+        self.assertAlmostEqual(float(scores[0]), expected, places=5)
+
+    def test_rarer_terms_weigh_more(self):
+        positions, _ = self.index.search("chloroplast light", top_k=10)
+        self.assertEqual(positions[0], 1)
+
+    def test_top_k_limits_results(self):
+        positions, _ = self.index.search("mitochondria chloroplasts force", top_k=2)
+        self.assertEqual(len(positions), 2)
+
+    def test_unknown_terms_match_nothing(self):
+        positions, scores = self.index.search("quantum", top_k=5)
+        self.assertEqual((len(positions), len(scores)), (0, 0))
+
+    def test_save_and_load_round_trip(self):
+        store_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, store_path, ignore_errors=True)
+        self.assertFalse(has_lexical_index(store_path))
+        self.index.save(store_path)
+        self.assertTrue(has_lexical_index(store_path))
+
+        loaded = BM25Index.load(store_path)
+        for query in ("mitochondria", "force mass", "light"):
+            expected, expected_scores = self.index.search(query, top_k=4)
+            positions, scores = loaded.search(query, top_k=4)
+            self.assertEqual(positions.tolist(), expected.tolist())
+            self.assertEqual(scores.tolist(), expected_scores.tolist())
+
+
+class ReciprocalRankFusionTests(SimpleTestCase):
+    def test_items_ranked_well_in_both_lists_come_first(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], rrf_k=60)
+        self.assertEqual([position for position, _ in fused], [1, 3, 2, 4])
+        self.assertAlmostEqual(fused[0][1], 1 / 61 + 1 / 62)
+
+    def test_ties_keep_first_seen_order(self):
+        fused = reciprocal_rank_fusion([[7, 8], [8, 7]], rrf_k=60)
+        self.assertEqual([position for position, _ in fused], [7, 8])
+
+    def test_rrf_k_damps_top_ranks(self):
+        rankings = [[1, 2, 3], [2, 3, 1], [3, 1, 2], [1]]
+        low = reciprocal_rank_fusion(rankings, rrf_k=1)
+        high = reciprocal_rank_fusion(rankings, rrf_k=1000)
+        self.assertEqual(low[0][0], 1)
+        self.assertLess(high[0][1] - high[-1][1], low[0][1] - low[-1][1])
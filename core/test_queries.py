@@ -0,0 +1,327 @@
+"""Query-count regression tests for the views in core/api.py.
+
+List and history endpoints must run the same number of queries however many
+rows they return, and every other view a fixed number. Upstream services
+(Gemini, Groq, YouTube, Tavily, Cloudinary, FAISS) are patched out; only the
+ORM work is measured. Run with ``python manage.py test core``.
+"""
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import cloudinary
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import api
+from core.models import (
+    ChapterGeneration, ChapterResource, ChapterVideoResource, ChapterWebResource, PDFConversation, PDFDocument,
+    User, UserPDF, UserYouTubeVideo, YouTubeConversation, YouTubeVectorStore
+)
+
+ANSWER = {"answer": "42", "references": [], "thinking_process": ""}
+
+
+@override_settings(RESOURCE_PREFETCH_ENABLED=False)
+class QueryCountTestCase(TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name=cloudinary.config().cloud_name or "test")  # Upload URLs are built offline
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(firebase_uid="uid-1", email="one@example.com", username="one")
+
+    def call(self, view, method="get", data=None, user=None, query="", headers=None, **kwargs):
+        request = getattr(self.factory, method)("/" + query, data, format="json", headers=headers)
+        force_authenticate(request, user=user or self.user)
+        response = view.as_view()(request, **kwargs)
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)  # The conversation is saved as the stream finishes
+        return response
+
+    def count_queries(self, view, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call(view, *args, **kwargs)
+        self.assertLess(response.status_code, 400, response.content)
+        return len(queries)
+
+    def assertConstantQueries(self, add_rows, view, *args, **kwargs):
+        """Same query count for a view after ``add_rows`` adds more of what it lists"""
+        add_rows(1)
+        few = self.count_queries(view, *args, **kwargs)
+        add_rows(5)
+        many = self.count_queries(view, *args, **kwargs)
+        self.assertEqual(few, many, f"{view.__name__} query count grows with rows ({few} -> {many})")
+        return many
+
+    # Fixtures
+
+    def add_generation(self, chapters=3, with_resources=False):
+        generation = ChapterGeneration.objects.create(user=self.user, topic="Physics", grade="10")
+        for i in range(chapters):
+            chapter = ChapterResource.objects.create(generation=generation, name=f"Chapter {i}", position=i)
+            if with_resources:
+                chapter.resources_status = ChapterResource.RESOURCES_READY
+                chapter.save()
+                ChapterVideoResource.objects.create(
+                    chapter=chapter, title="v", url="https://youtube.com/v", channel="c", duration="5:00"
+                )
+                ChapterWebResource.objects.create(chapter=chapter, title="w", url="https://example.com", source="e")
+        return generation
+
+    def add_pdf(self, conversations=2):
+        document = PDFDocument.objects.create(
+            sha256=f"{UserPDF.objects.count():064d}", public_id="p", cloudinary_url="https://c/p",
+            vector_store=f"book_missing_{UserPDF.objects.count()}", size=1
+        )
+        pdf = UserPDF.objects.create(
+            user=self.user, file_name="a.pdf", file="p", vector_store=document.vector_store, document=document
+        )
+        for _ in range(conversations):
+            PDFConversation.objects.create(pdf=pdf, question="q", answer=json.dumps(ANSWER))
+        return pdf
+
+    def add_video(self, conversations=2):
+        store = YouTubeVectorStore.objects.create(
+            video_id=f"vid{YouTubeVectorStore.objects.count()}", language="en", chunk_size=1000, chunk_overlap=200,
+            store_name=f"yt_missing_{YouTubeVectorStore.objects.count()}"
+        )
+        video = UserYouTubeVideo.objects.create(
+            user=self.user, video_url="https://youtube.com/watch?v=x", video_id=store.video_id,
+            video_title="t", thumbnail_url="https://i/t.jpg", vector_store=store.store_name, store=store
+        )
+        for _ in range(conversations):
+            YouTubeConversation.objects.create(video=video, question="q", answer=json.dumps(ANSWER))
+        return video
+
+    def processor(self):
+        processor = mock.Mock()
+        processor.answer_question.return_value = dict(ANSWER)
+        processor.stream_answer.return_value = iter([("answer", "42"), ("done", dict(ANSWER))])
+        processor.supported_languages = ["en"]
+        processor.chunk_size = 1000
+        processor.chunk_overlap = 200
+        return processor
+
+
+class ListQueryCountTests(QueryCountTestCase):
+    def test_chapter_history(self):
+        self.assertConstantQueries(
+            lambda n: [self.add_generation(chapters=4) for _ in range(n)], api.ChapterGenerationHistoryAPI
+        )
+
+    def test_pdf_list(self):
+        self.assertConstantQueries(lambda n: [self.add_pdf() for _ in range(n)], api.UserPDFListAPI)
+
+    def test_youtube_video_list(self):
+        self.assertConstantQueries(lambda n: [self.add_video() for _ in range(n)], api.YouTubeVideoListAPI)
+
+    def test_pdf_conversation_history(self):
+        pdf = self.add_pdf(conversations=0)
+        add = lambda n: [PDFConversation.objects.create(pdf=pdf, question="q", answer="{}") for _ in range(n)]
+        self.assertEqual(self.assertConstantQueries(add, api.PDFConversationHistoryAPI, pdf_id=pdf.id), 2)
+
+    def test_chapter_resources_ready(self):
+        generation = ChapterGeneration.objects.create(user=self.user, topic="Physics", grade="10")
+
+        def add(n):
+            for _ in range(n):
+                chapter = ChapterResource.objects.create(
+                    generation=generation, name="c", position=0, resources_status=ChapterResource.RESOURCES_READY
+                )
+                ChapterVideoResource.objects.create(chapter=chapter, title="v", url="https://y/v", channel="c",
+                                                    duration="5:00")
+                ChapterWebResource.objects.create(chapter=chapter, title="w", url="https://e", source="e")
+
+        self.assertEqual(self.assertConstantQueries(add, api.ChapterResourcesAPI, generation_id=generation.id), 4)
+
+    def test_chapter_resources_fetched(self):
+        def fetch(topic, grade, wanted, timeout=None):
+            return {
+                key: [{"title": "t", "url": "https://e", "channel": "c", "duration": "5:00", "source": "e"}]
+                for key in wanted
+            }
+
+        with mock.patch("core.chapter_resources.fetch_chapter_resources", side_effect=fetch):
+            few = self.count_queries(api.ChapterResourcesAPI, generation_id=self.add_generation(chapters=2).id)
+            many = self.count_queries(api.ChapterResourcesAPI, generation_id=self.add_generation(chapters=10).id)
+        self.assertEqual(few, many)
+        self.assertFalse(ChapterResource.objects.exclude(resources_status=ChapterResource.RESOURCES_READY).exists())
+
+
+class HistoryPaginationTests(QueryCountTestCase):
+    def walk(self, view, **kwargs):
+        """(ids in the order served, query count per page) following next_cursor to the end"""
+        ids, counts, query = [], [], "?limit=3"
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                body = json.loads(self.call(view, query=query, **kwargs).content)
+            counts.append(len(queries))
+            ids += [row.get("id", row.get("question")) for row in body["data"]]
+            if not body["has_more"]:
+                return ids, counts, body
+            query = f"?limit=3&cursor={body['next_cursor']}"
+
+    def test_pages_cover_every_row_once(self):
+        generations = [self.add_generation(chapters=1) for _ in range(8)]
+        # Equal timestamps must still page by id without skipping or repeating rows
+        ChapterGeneration.objects.filter(id__in=[g.id for g in generations[2:6]]).update(
+            created_at=generations[2].created_at
+        )
+        ids, counts, _ = self.walk(api.ChapterGenerationHistoryAPI)
+        self.assertEqual(sorted(ids), sorted(g.id for g in generations))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(set(counts)), 1, f"deep pages cost more queries: {counts}")
+
+    def test_list_pages(self):
+        for _ in range(7):
+            self.add_pdf(conversations=0)
+            self.add_video(conversations=0)
+        for view in (api.UserPDFListAPI, api.YouTubeVideoListAPI):
+            ids, counts, _ = self.walk(view)
+            self.assertEqual(len(set(ids)), 7)
+            self.assertEqual(len(set(counts)), 1)
+
+    def test_conversation_pages(self):
+        pdf, video = self.add_pdf(conversations=7), self.add_video(conversations=7)
+        for view, kwargs in ((api.PDFConversationHistoryAPI, {"pdf_id": pdf.id}),
+                             (api.YouTubeConversationHistoryAPI, {"video_id": video.id})):
+            _, counts, body = self.walk(view, **kwargs)
+            self.assertEqual(counts, [2, 2, 2])
+            self.assertEqual(body["data"][0]["answer"], ANSWER)
+
+    def test_since_returns_only_newer_rows(self):
+        old = self.add_generation(chapters=1)
+        ChapterGeneration.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(minutes=1))
+        synced_at = json.loads(self.call(api.ChapterGenerationHistoryAPI).content)["synced_at"]
+        newer = self.add_generation(chapters=1)
+        # Stamped before the listing above but committed after it, so that listing could not have seen it
+        late = self.add_generation(chapters=1)
+        ChapterGeneration.objects.filter(id=late.id).update(created_at=timezone.now() - timedelta(seconds=1))
+        body = json.loads(self.call(api.ChapterGenerationHistoryAPI, query=f"?since={synced_at}").content)
+        self.assertEqual(sorted(row["id"] for row in body["data"]), [newer.id, late.id])
+        self.assertEqual(self.call(api.ChapterGenerationHistoryAPI, query="?cursor=bogus").status_code, 400)
+
+
+class WriteQueryCountTests(QueryCountTestCase):
+    def test_chapter_generation(self):
+        def generate(chapters):
+            with mock.patch("core.api.generate_chapter_names", return_value=[f"c{i}" for i in range(chapters)]):
+                return self.count_queries(api.ChapterAPI, "post", {"topic": "Physics", "grade": "10"})
+
+        self.assertEqual(generate(3), generate(10))
+
+    def test_chapter_batch(self):
+        def batch(topics):
+            results = [
+                {"topic": f"t{i}", "grade": "10", "status": "ok", "cached": True, "chapters": ["a", "b", "c"]}
+                for i in range(topics)
+            ]
+            with mock.patch("core.api.generate_chapter_names_batch", return_value=results):
+                data = {"topics": [f"t{i}" for i in range(topics)], "grade": "10", "save": True}
+                return self.count_queries(api.ChapterBatchAPI, "post", data)
+
+        self.assertEqual(batch(2), batch(8))
+
+    def test_delete_chapter_generation(self):
+        few = self.count_queries(
+            api.DeleteChapterGenerationAPI, "delete",
+            generation_id=self.add_generation(chapters=1, with_resources=True).id
+        )
+        many = self.count_queries(
+            api.DeleteChapterGenerationAPI, "delete",
+            generation_id=self.add_generation(chapters=8, with_resources=True).id
+        )
+        self.assertEqual(few, many)
+
+    def test_login(self):
+        data = {"email": "new@example.com"}
+        with self.assertNumQueries(4):  # Lookup, then the insert in a savepoint
+            self.call(api.FirebaseLoginAPI, "post", data, headers={"X-Firebase-UID": "uid-new"})
+        with self.assertNumQueries(1):
+            self.call(api.FirebaseLoginAPI, "post", data, headers={"X-Firebase-UID": "uid-new"})
+
+    def test_no_database_views(self):
+        with self.assertNumQueries(0):
+            self.call(api.DashboardAPI)
+        with self.assertNumQueries(0):
+            api.get_csrf_token(self.factory.get("/"))
+        body = {"topic": "Physics", "grade": "10", "chapter": "Optics"}
+        with mock.patch("core.api.get_video_resources", return_value=[]), self.assertNumQueries(0):
+            self.call(api.VideoResourcesAPI, "post", body)
+        with mock.patch("core.api.get_web_resources", return_value=[]), self.assertNumQueries(0):
+            self.call(api.WebResourcesAPI, "post", body)
+        with mock.patch("core.utils.get_transcript_chunks_from_youtube", return_value=[]), \
+                override_settings(BASE_DIR=tempfile.mkdtemp()), self.assertNumQueries(0):
+            self.call(api.MultiVideoMCQAPI, "post", {"video_urls": ["https://youtube.com/watch?v=a"] * 4})
+
+    def test_pdf_upload(self):
+        processor = self.processor()
+        processor.compute_file_hash.return_value = "f" * 64
+        processor.process_pdf.return_value = ([], "https://c/p", "p")
+        stores_dir = tempfile.mkdtemp()
+        processor.create_vector_store.side_effect = lambda chunks, name: os.makedirs(os.path.join(stores_dir, name))
+        request = self.factory.post("/", {"pdf": SimpleUploadedFile("a.pdf", b"%PDF-1.4")}, format="multipart")
+        force_authenticate(request, user=self.user)
+        with mock.patch("core.api.get_pdf_processor", return_value=processor), \
+                override_settings(VECTORSTORES_DIR=stores_dir):
+            # Lookup, then the locked lookup and insert of the document and of the user upload, each in a savepoint
+            with self.assertNumQueries(9):
+                response = api.PDFQAAPI.as_view()(request)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_pdf_question(self):
+        pdf = self.add_pdf()
+        processor = self.processor()
+        base_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(base_dir, "vectorstores", pdf.vector_store))
+        with mock.patch("core.api.get_pdf_processor", return_value=processor), override_settings(BASE_DIR=base_dir):
+            with self.assertNumQueries(2):
+                self.call(api.QuestionAnswerAPI, "post", {"pdf_id": pdf.id, "question": "q"})
+            with self.assertNumQueries(2):
+                self.call(api.QuestionAnswerStreamAPI, "post", {"pdf_id": pdf.id, "question": "q"})
+
+    def test_youtube_video(self):
+        processor = self.processor()
+        processor.extract_video_id.return_value = "newvid"
+        processor.process_video.return_value = {
+            "language": "en", "store_name": "yt_new", "video_info": {"title": "t", "thumbnail": "https://i/t.jpg"}
+        }
+        stores_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(stores_dir, "yt_new"))
+        with mock.patch("core.api.get_youtube_processor", return_value=processor), \
+                override_settings(VECTORSTORES_DIR=stores_dir):
+            # Store lookup, the locked lookup and insert of the store, then the locked store and the user video,
+            # each in a savepoint
+            with self.assertNumQueries(9):
+                self.call(api.YouTubeVideoAPI, "post", {"video_url": "https://youtube.com/watch?v=newvid"})
+
+    def test_youtube_question(self):
+        video = self.add_video()
+        processor = self.processor()
+        with mock.patch("core.api.get_youtube_processor", return_value=processor):
+            with self.assertNumQueries(2):
+                self.call(api.YouTubeQuestionAPI, "post", {"video_id": video.id, "question": "q"})
+            with self.assertNumQueries(2):
+                self.call(api.YouTubeQuestionStreamAPI, "post", {"video_id": video.id, "question": "q"})
+
+    def test_delete_pdf(self):
+        few = self.add_pdf(conversations=1)
+        many = self.add_pdf(conversations=8)
+        with mock.patch("core.api.cloudinary.uploader.destroy", return_value={"result": "ok"}):
+            self.assertEqual(
+                self.count_queries(api.DeletePDFAPI, "delete", pdf_id=few.id),
+                self.count_queries(api.DeletePDFAPI, "delete", pdf_id=many.id)
+            )
+
+    def test_delete_youtube_video(self):
+        few = self.add_video(conversations=1)
+        many = self.add_video(conversations=8)
+        self.assertEqual(
+            self.count_queries(api.YouTubeVideoDeleteAPI, "delete", video_id=few.id),
+            self.count_queries(api.YouTubeVideoDeleteAPI, "delete", video_id=many.id)
+        )
@@ -0,0 +1,103 @@
+"""Tests for core/resource_cache.py.
+
+Background refreshes run inline through a synchronous stand-in for the
+refresh pool, and entries are aged by rewriting ``created_at``. Run with
+``python manage.py test core``.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ResourceSearchCacheEntry
+from core.resource_cache import REFRESH_CLAIM_TIMEOUT, ResourceSearchCache
+
+
+class InlineExecutor:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        fn(*args)
+
+
+class ResourceSearchCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ResourceSearchCache(ttl=timedelta(hours=1), stale_ttl=timedelta(hours=1))
+        self.addCleanup(self.cache._refresh_pool.shutdown)
+        self.refresh_pool = InlineExecutor()
+        self.cache._refresh_pool = self.refresh_pool
+        # The refresh thread closes its own connections; inline, that would be the test's
+        patcher = mock.patch("core.resource_cache.connections")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.searches = []
+
+    def search(self, results):
+        def fetch():
+            self.searches.append(results)
+            return results
+        return fetch
+
+    def age(self, delta):
+        ResourceSearchCacheEntry.objects.update(created_at=timezone.now() - delta)
+
+    def test_fresh_entry_is_served_without_searching(self):
+        self.assertEqual(self.cache.get_or_fetch("videos", "Newton's Laws", self.search([{"id": 1}])), [{"id": 1}])
+        self.assertEqual(self.cache.get_or_fetch("videos", "  newton's laws?", self.search([{"id": 2}])), [{"id": 1}])
+        self.assertEqual(self.searches, [[{"id": 1}]])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_kinds_are_cached_separately(self):
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 1}]))
+        self.assertEqual(self.cache.get_or_fetch("web", "inertia", self.search([{"url": "u"}])), [{"url": "u"}])
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 1}]))
+        self.age(timedelta(minutes=90))
+
+        served = self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 2}]))
+
+        self.assertEqual(served, [{"id": 1}])
+        self.assertEqual((self.cache.stale_hits, self.cache.refreshes), (1, 1))
+        entry = ResourceSearchCacheEntry.objects.get()
+        self.assertEqual(entry.results, [{"id": 2}])
+        self.assertIsNone(entry.refresh_started_at)
+        self.assertGreater(entry.created_at, timezone.now() - timedelta(minutes=1))
+
+    def test_claimed_refresh_is_not_repeated(self):
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 1}]))
+        self.age(timedelta(minutes=90))
+        ResourceSearchCacheEntry.objects.update(refresh_started_at=timezone.now())
+
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 2}]))
+        self.assertEqual(self.refresh_pool.submitted, 0)
+
+        ResourceSearchCacheEntry.objects.update(
+            refresh_started_at=timezone.now() - REFRESH_CLAIM_TIMEOUT - timedelta(seconds=1)
+        )
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 3}]))
+        self.assertEqual(self.refresh_pool.submitted, 1)
+        self.assertEqual(ResourceSearchCacheEntry.objects.get().results, [{"id": 3}])
+
+    def test_empty_refresh_keeps_the_stale_results(self):
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 1}]))
+        self.age(timedelta(minutes=90))
+        self.cache.get_or_fetch("videos", "inertia", self.search([]))
+        entry = ResourceSearchCacheEntry.objects.get()
+        self.assertEqual(entry.results, [{"id": 1}])
+        self.assertIsNotNone(entry.refresh_started_at)
+
+    def test_expired_entry_is_searched_again_in_the_request(self):
+        self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 1}]))
+        self.age(timedelta(hours=3))
+        self.assertEqual(self.cache.get_or_fetch("videos", "inertia", self.search([{"id": 2}])), [{"id": 2}])
+        self.assertEqual((self.cache.misses, self.refresh_pool.submitted), (2, 0))
+
+    def test_empty_results_are_not_stored(self):
+        self.cache.get_or_fetch("videos", "nothing", self.search([]))
+        self.cache.get_or_fetch("videos", "nothing", self.search([]))
+        self.assertEqual(len(self.searches), 2)
+        self.assertFalse(ResourceSearchCacheEntry.objects.exists())
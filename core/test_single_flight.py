@@ -0,0 +1,173 @@
+"""Tests for core/single_flight.py.
+
+Each test holds the leader's computation open until every duplicate caller
+has joined it (``stats()["collapsed"]``), so the outcome does not depend on
+thread timing. Run with ``python manage.py test core``.
+"""
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.single_flight import SingleFlight
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.flight = SingleFlight("test")
+        self.release = threading.Event()
+        self.runs = 0
+
+    def blocking(self, outcome):
+        """A computation that counts its runs and waits for ``release`` before returning or raising ``outcome``"""
+        def fn():
+            self.runs += 1
+            self.release.wait(5)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+        return fn
+
+    def run_threads(self, count, fn, key="key"):
+        """Start ``count`` threads calling ``do``; returns (their results or exceptions, the threads)"""
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(self.flight.do(key, fn))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        self.addCleanup(lambda: [thread.join(5) for thread in threads])
+        return outcomes, threads
+
+    def joined(self, count):
+        return lambda: self.flight.stats()["collapsed"] >= count
+
+    def test_concurrent_callers_share_one_result(self):
+        result = {"answer": 42}
+        outcomes, threads = self.run_threads(5, self.blocking(result))
+        wait_until(self.joined(4))
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(len(outcomes), 5)
+        self.assertTrue(all(outcome is result for outcome in outcomes))
+        stats = self.flight.stats()
+        self.assertEqual((stats["executions"], stats["collapsed"], stats["in_flight"]), (1, 4, 0))
+
+    def test_concurrent_callers_share_one_exception(self):
+        error = ValueError("upstream failed")
+        outcomes, threads = self.run_threads(3, self.blocking(error))
+        wait_until(self.joined(2))
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(len(outcomes), 3)
+        self.assertTrue(all(outcome is error for outcome in outcomes))
+        self.assertEqual(self.flight.stats()["failures"], 1)
+
+    def test_finished_calls_are_not_cached(self):
+        self.release.set()
+        self.assertEqual(self.flight.do("key", self.blocking(1)), 1)
+        self.assertEqual(self.flight.do("key", self.blocking(2)), 2)
+        self.assertEqual(self.runs, 2)
+
+    def test_distinct_keys_run_separately(self):
+        outcomes, threads = self.run_threads(1, self.blocking("a"), key="a")
+        more, more_threads = self.run_threads(1, self.blocking("b"), key="b")
+        wait_until(lambda: self.flight.stats()["in_flight"] == 2)
+        self.release.set()
+        for thread in threads + more_threads:
+            thread.join(5)
+        self.assertEqual((outcomes, more, self.runs), (["a"], ["b"], 2))
+
+    def test_async_caller_waits_on_sync_leader(self):
+        outcomes, threads = self.run_threads(1, self.blocking("from-thread"))
+        wait_until(lambda: self.flight.stats()["in_flight"] == 1)
+
+        async def follower():
+            async def never_runs():
+                raise AssertionError("the follower must not run the computation")
+
+            task = asyncio.ensure_future(self.flight.do_async("key", never_runs))
+            await asyncio.sleep(0)
+            wait_until(self.joined(1))
+            self.release.set()
+            return await asyncio.wait_for(task, 5)
+
+        self.assertEqual(asyncio.run(follower()), "from-thread")
+        threads[0].join(5)
+        self.assertEqual(outcomes, ["from-thread"])
+        self.assertEqual(self.runs, 1)
+
+    def test_sync_caller_waits_on_async_leader(self):
+        async def leader():
+            started = asyncio.Event()
+            release = asyncio.Event()
+
+            async def compute():
+                self.runs += 1
+                started.set()
+                await release.wait()
+                return "from-loop"
+
+            task = asyncio.ensure_future(self.flight.do_async("key", compute))
+            await started.wait()
+            outcomes, threads = self.run_threads(1, self.blocking("never"))
+            await asyncio.get_running_loop().run_in_executor(None, wait_until, self.joined(1))
+            release.set()
+            result = await task
+            await asyncio.get_running_loop().run_in_executor(None, threads[0].join, 5)
+            return result, outcomes
+
+        result, outcomes = asyncio.run(leader())
+        self.assertEqual(result, "from-loop")
+        self.assertEqual(outcomes, ["from-loop"])
+        self.assertEqual(self.runs, 1)
+
+    def test_cancelled_leader_fails_waiters_and_frees_the_key(self):
+        async def scenario():
+            started = asyncio.Event()
+
+            async def compute():
+                started.set()
+                await asyncio.sleep(60)
+
+            async def never_runs():
+                raise AssertionError("the follower must not run the computation")
+
+            leader = asyncio.ensure_future(self.flight.do_async("key", compute))
+            await started.wait()
+            follower = asyncio.ensure_future(self.flight.do_async("key", never_runs))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(follower, 5)
+
+            async def compute_again():
+                return "retried"
+
+            return await self.flight.do_async("key", compute_again)
+
+        self.assertEqual(asyncio.run(scenario()), "retried")
+        stats = self.flight.stats()
+        self.assertEqual((stats["executions"], stats["collapsed"], stats["in_flight"]), (2, 1, 0))
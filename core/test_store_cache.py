@@ -0,0 +1,99 @@
+"""Tests for core/store_cache.py.
+
+Stores are plain directories of files in a temporary VECTORSTORES_DIR and the
+loader returns a fresh object per call, so a reload is visible as a new object.
+Run with ``python manage.py test core``.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from core.store_cache import VectorStoreCache
+
+
+class VectorStoreCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(VECTORSTORES_DIR=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.loads = []
+
+    def make_store(self, name, nbytes):
+        """Write a store directory holding one index file of ``nbytes`` bytes"""
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "index.faiss"), "wb") as f:
+            f.write(b"x" * nbytes)
+        return path
+
+    def loader(self, store_path):
+        self.loads.append(os.path.basename(store_path))
+        return object()
+
+    def test_hit_returns_the_loaded_store(self):
+        cache = VectorStoreCache(max_bytes=1000)
+        self.make_store("a", 100)
+        store = cache.get("a", self.loader)
+        self.assertIs(cache.get("a", self.loader), store)
+        self.assertEqual(self.loads, ["a"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, 100))
+
+    def test_evicts_least_recently_used_over_the_byte_budget(self):
+        cache = VectorStoreCache(max_bytes=250)
+        for name in ("a", "b", "c"):
+            self.make_store(name, 100)
+        cache.get("a", self.loader)
+        cache.get("b", self.loader)
+        cache.get("a", self.loader)  # b is now the least recently used
+        cache.get("c", self.loader)
+
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 200)
+        cache.get("a", self.loader)
+        cache.get("b", self.loader)
+        self.assertEqual(self.loads, ["a", "b", "c", "b"])
+
+    def test_evicts_over_the_entry_limit(self):
+        cache = VectorStoreCache(max_bytes=1000, max_entries=1)
+        self.make_store("a", 10)
+        self.make_store("b", 10)
+        cache.get("a", self.loader)
+        cache.get("b", self.loader)
+        self.assertEqual(cache.stats()["entries"], 1)
+        cache.get("a", self.loader)
+        self.assertEqual(self.loads, ["a", "b", "a"])
+
+    def test_store_larger_than_the_budget_is_not_cached(self):
+        cache = VectorStoreCache(max_bytes=50)
+        self.make_store("big", 100)
+        cache.get("big", self.loader)
+        cache.get("big", self.loader)
+        self.assertEqual(self.loads, ["big", "big"])
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_rebuilt_store_is_reloaded(self):
+        cache = VectorStoreCache(max_bytes=1000)
+        path = self.make_store("a", 100)
+        first = cache.get("a", self.loader)
+        index = os.path.join(path, "index.faiss")
+        stat = os.stat(index)
+        os.utime(index, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        second = cache.get("a", self.loader)
+        self.assertIsNot(second, first)
+        self.assertIs(cache.get("a", self.loader), second)
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_deleted_store_raises_and_is_dropped(self):
+        cache = VectorStoreCache(max_bytes=1000)
+        path = self.make_store("a", 100)
+        cache.get("a", self.loader)
+        shutil.rmtree(path)
+        with self.assertRaises(FileNotFoundError):
+            cache.get("a", self.loader)
+        self.assertEqual((cache.stats()["entries"], cache.stats()["bytes"]), (0, 0))
@@ -1,16 +1,27 @@
 import os
-from typing import List, Dict, TypedDict
+import sys
+from typing import List, Dict, Optional, Tuple, TypedDict
 import time
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from django.conf import settings
+from django.db import connections
+from google.api_core.exceptions import DeadlineExceeded
 from youtube_search import YoutubeSearch
 from tavily import TavilyClient
 import google.generativeai as genai
-from .yt_processor import YouTubeProcessor
+from . import http_pool
+from .curriculum_cache import chapter_names_cache, curriculum_key
+from .resource_cache import resource_cache
+from .single_flight import chapter_names_flight
+from .processors import get_youtube_processor
 import re 
 
-# Initialize YouTubeProcessor (which includes proxy setup)
-yt_processor = YouTubeProcessor()
+
+# Send the search libraries' requests over the pooled per-host sessions
+http_pool.route_through_pool(sys.modules[YoutubeSearch.__module__])
+http_pool.route_through_pool(sys.modules[TavilyClient.__module__])
 
 # Initialize Gemini and Tavily
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -35,6 +46,62 @@ class ChapterOutput(TypedDict):
     web_resources: List[WebResource]
 
 def generate_chapter_names(topic: str, grade: str) -> List[str]:
+    """Chapter outline for a topic and grade, reused from the curriculum cache when one was generated recently"""
+    chapters, _ = cached_chapter_names(topic, grade)
+    return chapters
+
+def cached_chapter_names(topic: str, grade: str, timeout: float = None) -> Tuple[List[str], bool]:
+    """(chapters, whether they came from the cache); concurrent requests for the same pair share one LLM call"""
+    return chapter_names_flight.do(
+        curriculum_key(topic, grade),
+        lambda: chapter_names_cache.get_or_generate(topic, grade, lambda: _generate_chapter_names(topic, grade, timeout))
+    )
+
+def generate_chapter_names_batch(pairs: List[Tuple[str, str]], max_workers: int = None, timeout: float = None,
+                                 batch_timeout: float = None) -> List[Dict]:
+    """Chapter outlines for many (topic, grade) pairs, in order.
+
+    Cached pairs are answered from the database; the rest are generated with at
+    most ``max_workers`` Gemini calls in flight, each abandoned after
+    ``timeout`` seconds. A failed or timed-out pair is reported in its own
+    result instead of failing the batch. Pairs not finished within
+    ``batch_timeout`` seconds of the start are reported as timed out too.
+    """
+    max_workers = max_workers or settings.CHAPTER_BATCH_MAX_WORKERS
+    batch_timeout = settings.CHAPTER_BATCH_TIMEOUT_SECONDS if batch_timeout is None else batch_timeout
+
+    def generate(pair):
+        topic, grade = pair
+        result = {"topic": topic, "grade": grade, "chapters": [], "cached": False}
+        try:
+            result["chapters"], result["cached"] = cached_chapter_names(topic, grade, timeout)
+            result["status"] = "ok" if result["chapters"] else "error"
+            if not result["chapters"]:
+                result["error"] = "No chapters could be parsed from the model output"
+        except DeadlineExceeded:
+            result["status"], result["error"] = "timeout", "Chapter generation timed out"
+        except Exception as e:
+            result["status"], result["error"] = "error", str(e)
+        finally:
+            connections.close_all()  # This pool thread's own connections
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pairs)) or 1)
+    futures = [executor.submit(generate, pair) for pair in pairs]
+    _, not_done = wait(futures, timeout=batch_timeout)
+    # Drop pairs that never started; calls already running finish in the background and their result is discarded
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for (topic, grade), future in zip(pairs, futures):
+        if future in not_done:
+            results.append({"topic": topic, "grade": grade, "chapters": [], "cached": False,
+                            "status": "timeout", "error": "Batch deadline passed before this topic was generated"})
+        else:
+            results.append(future.result())
+    return results
+
+def _generate_chapter_names(topic: str, grade: str, timeout: float = None) -> List[str]:
     prompt = f"""
         Generate exactly 10-12 comprehensive chapter names for studying {topic} 
         at {grade} level following these strict guidelines:
@@ -76,7 +143,9 @@ def generate_chapter_names(topic: str, grade: str) -> List[str]:
         10.
         """
     
-    response = model.generate_content(prompt)
+    response = model.generate_content(
+        prompt, request_options={"timeout": timeout or settings.CHAPTER_GENERATION_TIMEOUT_SECONDS}
+    )
     chapters = []
     
     for line in response.text.split('\n'):
@@ -91,6 +160,9 @@ def generate_chapter_names(topic: str, grade: str) -> List[str]:
 
 def get_video_resources(topic: str, grade: str, chapter_name: str) -> List[VideoResource]:
     query = f"{topic} {chapter_name} tutorial for {grade} grade"
+    return resource_cache.get_or_fetch("videos", query, lambda: _search_video_resources(query))
+
+def _search_video_resources(query: str) -> List[VideoResource]:
     results = YoutubeSearch(query, max_results=20).to_dict()  # Get more results to filter from
     
     videos = []
@@ -136,6 +208,9 @@ def get_video_resources(topic: str, grade: str, chapter_name: str) -> List[Video
 
 def get_web_resources(topic: str, grade: str, chapter_name: str) -> List[WebResource]:
     query = f"{topic} {chapter_name} tutorial OR guide for {grade} grade"
+    return resource_cache.get_or_fetch("websites", query, lambda: _search_web_resources(query))
+
+def _search_web_resources(query: str) -> List[WebResource]:
     search_results = tavily.search(query=query, include_raw_content=False, max_results=5)
     
     resources = []
@@ -148,6 +223,45 @@ def get_web_resources(topic: str, grade: str, chapter_name: str) -> List[WebReso
     
     return resources
 
+# Shared by all requests in this worker, so concurrent resource pages can't open unbounded upstream calls
+resource_fetch_pool = ThreadPoolExecutor(max_workers=settings.RESOURCE_FETCH_MAX_WORKERS, thread_name_prefix="resource-fetch")
+
+RESOURCE_FETCHERS = {"videos": get_video_resources, "websites": get_web_resources}
+
+def _fetch_resource(kind: str, topic: str, grade: str, chapter_name: str) -> List:
+    try:
+        return RESOURCE_FETCHERS[kind](topic, grade, chapter_name)
+    finally:
+        connections.close_all()  # The resource cache queries from this pool thread's own connections
+
+def fetch_chapter_resources(topic: str, grade: str, wanted: List[Tuple[str, str]],
+                            timeout: float = None) -> Dict[Tuple[str, str], Optional[List]]:
+    """Resources for (kind, chapter name) pairs, kind being "videos" or "websites", fetched concurrently.
+
+    Every search is submitted to the shared pool at once and the results that
+    arrive within ``timeout`` seconds are returned; a search that failed or is
+    still running maps to None, so the caller can serve partial results. A
+    late search keeps running in the background but its result is dropped.
+    """
+    timeout = settings.RESOURCE_FETCH_TIMEOUT_SECONDS if timeout is None else timeout
+    futures = {
+        resource_fetch_pool.submit(_fetch_resource, kind, topic, grade, chapter_name): (kind, chapter_name)
+        for kind, chapter_name in wanted
+    }
+    done, not_done = wait(futures, timeout=timeout)
+
+    results = {}
+    for future, (kind, chapter_name) in futures.items():
+        results[(kind, chapter_name)] = None
+        if future in not_done:
+            print(f"Timed out fetching {kind} for chapter '{chapter_name}' after {timeout}s")
+            future.cancel()  # Only stops it if it never started
+        elif future.exception() is not None:
+            print(f"Error fetching {kind} for chapter '{chapter_name}': {future.exception()}")
+        else:
+            results[(kind, chapter_name)] = future.result()
+    return results
+
 def display_chapters(chapter_names: List[str]):
     print("\nGenerated Chapters:")
     for i, name in enumerate(chapter_names, 1):
@@ -170,12 +284,12 @@ def display_single_chapter_resources(chapter: ChapterOutput):
 
 def get_video_id(video_url: str) -> str:
     """Extract video ID from a YouTube URL using YouTubeProcessor"""
-    return yt_processor.extract_video_id(video_url)
+    return get_youtube_processor().extract_video_id(video_url)
 
 def download_youtube_transcript(video_id: str, languages: list = ['en']) -> tuple:
     """Download transcript using YouTubeProcessor with proxy support"""
     try:
-        chunks = yt_processor.load_youtube_transcript(f"https://www.youtube.com/watch?v={video_id}")
+        chunks = get_youtube_processor().load_youtube_transcript(f"https://www.youtube.com/watch?v={video_id}")
         if not chunks:
             return None, None
             
@@ -227,8 +341,8 @@ def srt_time_to_seconds(time_str: str) -> float:
     hh, mm, ss = hh_mm_ss.split(':')
     return int(hh) * 3600 + int(mm) * 60 + int(ss) + int(mmm)/1000
 
-def generate_mcqs_from_transcript(transcript_chunks: list, video_id: str) -> tuple:
-    """Generate MCQ questions from transcript chunks using Gemini with YouTube links"""
+def mcq_prompt(transcript_chunks: list) -> str:
+    """Gemini prompt asking for timestamped MCQs on a transcript; links use a VIDEO_ID placeholder"""
     transcript_with_timestamps = "\n\n".join(
         f"[{chunk['time_range']} (or {int(chunk['start_seconds'])}s)] {chunk['text']}" 
         for chunk in transcript_chunks
@@ -264,49 +378,67 @@ def generate_mcqs_from_transcript(transcript_chunks: list, video_id: str) -> tup
     Transcript with timestamps:
     {transcript_with_timestamps}
     """
+    return prompt
+
+def parse_mcqs(output: str) -> list:
+    """Parse Gemini's numbered MCQ text into question dicts"""
+    # Parse the text into JSON
+    mcq_blocks = re.split(r"\n\d+\.\s", "\n" + output.strip())
+    mcq_list = []
+
+    for block in mcq_blocks[1:]:  # First is empty due to split
+        lines = block.strip().split('\n')
+        question = lines[0].strip()
+        options = {}
+        correct = ""
+        for line in lines:
+            match = re.match(r"([a-d])\)\s(.+?)(\*?)$", line.strip())
+            if match:
+                opt = match.group(1)
+                text = match.group(2).strip()
+                is_correct = match.group(3) == '*'
+                options[opt] = text
+                if is_correct:
+                    correct = opt
+
+
+        timestamp_line = [l for l in lines if "Timestamp" in l][0]
+        seconds_line = [l for l in lines if "Seconds" in l][0]
+        url_line = [l for l in lines if "Watch at" in l][0]
+
+        # Find explanation block (everything after "Watch at")
+        explanation_index = lines.index(url_line) + 1
+        explanation = "\n".join(lines[explanation_index:]).strip()
+
+        mcq_list.append({
+            "question": question,
+            "options": options,
+            "correct_answer": correct,
+            "timestamp": timestamp_line.split(":", 1)[1].strip(" []"),
+            "seconds": int(seconds_line.split(":")[1].strip()),
+            "youtube_url": url_line.split(":", 1)[1].strip(),
+            "explanation": explanation
+        })
+
+    return mcq_list
+
+def generate_mcqs_from_transcript(transcript_chunks: list, video_id: str) -> tuple:
+    """Generate MCQ questions from transcript chunks using Gemini with YouTube links"""
     try:
-        response = model.generate_content(prompt)
+        response = model.generate_content(mcq_prompt(transcript_chunks))
         output = response.text.replace("VIDEO_ID", video_id)
+        return output, parse_mcqs(output)
 
-        # Parse the text into JSON
-        mcq_blocks = re.split(r"\n\d+\.\s", "\n" + output.strip())
-        mcq_list = []
-
-        for block in mcq_blocks[1:]:  # First is empty due to split
-            lines = block.strip().split('\n')
-            question = lines[0].strip()
-            options = {}
-            correct = ""
-            for line in lines:
-                match = re.match(r"([a-d])\)\s(.+?)(\*?)$", line.strip())
-                if match:
-                    opt = match.group(1)
-                    text = match.group(2).strip()
-                    is_correct = match.group(3) == '*'
-                    options[opt] = text
-                    if is_correct:
-                        correct = opt
-
-
-            timestamp_line = [l for l in lines if "Timestamp" in l][0]
-            seconds_line = [l for l in lines if "Seconds" in l][0]
-            url_line = [l for l in lines if "Watch at" in l][0]
-
-            # Find explanation block (everything after "Watch at")
-            explanation_index = lines.index(url_line) + 1
-            explanation = "\n".join(lines[explanation_index:]).strip()
-
-            mcq_list.append({
-                "question": question,
-                "options": options,
-                "correct_answer": correct,
-                "timestamp": timestamp_line.split(":", 1)[1].strip(" []"),
-                "seconds": int(seconds_line.split(":")[1].strip()),
-                "youtube_url": url_line.split(":", 1)[1].strip(),
-                "explanation": explanation
-            })
+    except Exception as e:
+        print(f"Error generating MCQs: {str(e)}")
+        return None, None
 
-        return output, mcq_list
+async def generate_mcqs_from_transcript_async(transcript_chunks: list, video_id: str) -> tuple:
+    """generate_mcqs_from_transcript over Gemini's async client"""
+    try:
+        response = await model.generate_content_async(mcq_prompt(transcript_chunks))
+        output = response.text.replace("VIDEO_ID", video_id)
+        return output, parse_mcqs(output)
 
     except Exception as e:
         print(f"Error generating MCQs: {str(e)}")
@@ -315,6 +447,7 @@ def generate_mcqs_from_transcript(transcript_chunks: list, video_id: str) -> tup
 def get_transcript_chunks_from_youtube(video_url: str, languages: list = ['en', 'hi']) -> list:
     """Get transcript chunks using YouTubeProcessor with proxy support"""
     try:
+        yt_processor = get_youtube_processor()
         video_id = yt_processor.extract_video_id(video_url)
         chunks = yt_processor.load_youtube_transcript(video_url)
         
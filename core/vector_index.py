@@ -0,0 +1,382 @@
+import os
+import json
+import math
+import mmap
+import uuid
+import logging
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Union
+
+import faiss
+import numpy as np
+from django.conf import settings
+from langchain.schema import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from .lexical_index import BM25Index, attach_lexical_index, has_lexical_index, lexical_index_for
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.jsonl"
+DOCSTORE_OFFSETS_FILE = "docstore.offsets.npy"
+INDEX_PARAMS_FILE = "index_params.json"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+RERANK_VECTORS_FILE = "vectors.f16.npy"
+
+# index_factory code for each scalar-quantized compression mode
+SQ_CODES = {"fp16": "SQfp16", "sq8": "SQ8"}
+
+
+class PositionalIds(Mapping):
+    """index_to_docstore_id for stores whose docstore is laid out in index order"""
+
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, position):
+        position = int(position)
+        if not 0 <= position < self._size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self):
+        return iter(range(self._size))
+
+    def __len__(self):
+        return self._size
+
+
+class MmapDocstore(Docstore):
+    """Read-only docstore over an offset-indexed JSONL file.
+
+    Line ``i`` holds the chunk for FAISS vector ``i``; the offsets array (n + 1
+    entries) gives its byte range. Both files are memory-mapped, so only the
+    chunks actually returned by a search are read, and every worker process
+    serving the same store shares the pages through the OS page cache.
+    """
+
+    def __init__(self, store_path: str):
+        self._offsets = np.load(os.path.join(store_path, DOCSTORE_OFFSETS_FILE), mmap_mode="r")
+        self._mmap = None
+        if len(self) > 0:
+            with open(os.path.join(store_path, DOCSTORE_FILE), "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return max(len(self._offsets) - 1, 0)
+
+    def search(self, search) -> Union[str, Document]:
+        position = int(search)
+        if not 0 <= position < len(self):
+            return f"ID {search} not found."
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        record = json.loads(self._mmap[start:end])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+
+def write_docstore(docstore: Docstore, index_to_docstore_id, ntotal: int, store_path: str) -> None:
+    """Write the store's chunks as JSONL in index order, plus their byte offsets"""
+    offsets = [0]
+    docstore_path = os.path.join(store_path, DOCSTORE_FILE)
+    with open(docstore_path + ".tmp", "wb") as f:
+        for position in range(ntotal):
+            doc = docstore.search(index_to_docstore_id[position])
+            line = json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False
+            ).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    offsets_path = os.path.join(store_path, DOCSTORE_OFFSETS_FILE)
+    with open(offsets_path + ".tmp", "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.uint64))
+    os.replace(docstore_path + ".tmp", docstore_path)
+    os.replace(offsets_path + ".tmp", offsets_path)
+
+
+def choose_index_type(ntotal: int) -> str:
+    """Index type for a store of ``ntotal`` chunks according to VECTOR_INDEX_TYPE"""
+    if settings.VECTOR_INDEX_TYPE != "auto":
+        return settings.VECTOR_INDEX_TYPE
+    if ntotal < settings.VECTOR_INDEX_AUTO_THRESHOLD:
+        return "flat"
+    return settings.VECTOR_INDEX_LARGE_TYPE
+
+
+def _ivf_nlist(ntotal: int) -> int:
+    # ~sqrt(n) lists, keeping at least 39 training points per centroid
+    return max(1, min(int(math.sqrt(ntotal)), ntotal // 39))
+
+
+def _pq_code(dim: int, ntotal: int) -> Optional[str]:
+    """PQ spec with 8-dim subvectors and as many bits as the store can train, or None if too small"""
+    nbits = min(8, int(math.log2(max(ntotal // 39, 1))))
+    if dim % 8 or nbits < 4:
+        return None
+    return f"PQ{dim // 8}x{nbits}"
+
+
+def _unwrap_pretransform(index: faiss.Index) -> faiss.Index:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+class CompressedIndex:
+    """Quantized FAISS index with an exact re-ranking pass over its top candidates.
+
+    ``search`` fetches ``k * rerank_factor`` candidates from the compressed
+    codes, then re-scores them against float16 copies of the original vectors
+    (memory-mapped when loaded from disk, so only candidate rows are read).
+    Without re-rank vectors it is a plain pass-through to the quantized index.
+    Exposes the parts of the ``faiss.Index`` interface LangChain's FAISS uses
+    for searching: ``d``, ``ntotal``, ``search`` and ``reconstruct``.
+    """
+
+    def __init__(self, index: faiss.Index, compression: str, pca_dim: int = 0,
+                 rerank_factor: int = 0, vectors: Optional[np.ndarray] = None):
+        self.index = index
+        self.compression = compression
+        self.pca_dim = pca_dim
+        self.rerank_factor = rerank_factor if vectors is not None else 0
+        self.vectors = vectors
+
+    @property
+    def d(self) -> int:
+        return self.index.d
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def search(self, x: np.ndarray, k: int):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if self.rerank_factor <= 1:
+            return self.index.search(x, k)
+
+        _, candidates = self.index.search(x, max(k, min(self.ntotal, k * self.rerank_factor)))
+        # Same padding FAISS uses when fewer than k results exist
+        distances = np.full((len(x), k), np.finfo(np.float32).max, dtype=np.float32)
+        labels = np.full((len(x), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(x, candidates)):
+            ids = ids[ids >= 0]
+            exact = ((np.asarray(self.vectors[ids], dtype=np.float32) - query) ** 2).sum(axis=1)
+            order = np.argsort(exact, kind="stable")[:k]
+            distances[row, :len(order)] = exact[order]
+            labels[row, :len(order)] = ids[order]
+        return distances, labels
+
+    def reconstruct(self, key: int) -> np.ndarray:
+        if self.vectors is not None:
+            return np.asarray(self.vectors[key], dtype=np.float32)
+        return self.index.reconstruct(key)
+
+
+def create_compressed_index(vectors: np.ndarray, index_type: str, compression: str,
+                            pca_dim: int = 0, rerank_factor: int = 0) -> CompressedIndex:
+    """Build a quantized index (optionally PCA-reduced) of ``index_type`` over ``vectors``"""
+    ntotal, dim = vectors.shape
+    spec, code_dim = "", dim
+    if pca_dim and pca_dim < dim:
+        if ntotal > pca_dim:
+            spec, code_dim = f"PCA{pca_dim},", pca_dim
+        else:
+            logging.warning(f"Skipping PCA to {pca_dim} dims: only {ntotal} vectors to train on")
+    pca_dim = code_dim if spec else 0
+
+    if compression == "pq":
+        code = _pq_code(code_dim, ntotal)
+        if code is None:
+            logging.warning(f"Too few vectors ({ntotal}) to train product quantization; using sq8")
+            compression = "sq8"
+    if compression in SQ_CODES:
+        code = SQ_CODES[compression]
+    elif compression != "pq":
+        raise ValueError(f"Unknown vector index compression: {compression}")
+
+    if index_type == "flat":
+        spec += code
+    elif index_type == "ivf":
+        nlist = _ivf_nlist(ntotal)
+        spec += f"IVF{nlist},{code}"
+    elif index_type == "hnsw":
+        spec += f"HNSW{settings.VECTOR_INDEX_HNSW_M}_{code}"
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+
+    index = faiss.index_factory(dim, spec)
+    inner = _unwrap_pretransform(index)
+    if index_type == "hnsw":
+        inner.hnsw.efConstruction = settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION
+        inner.hnsw.efSearch = settings.VECTOR_INDEX_HNSW_EF_SEARCH
+    index.train(vectors)
+    index.add(vectors)
+    if index_type == "ivf":
+        inner.nprobe = min(nlist, settings.VECTOR_INDEX_IVF_NPROBE)
+        inner.make_direct_map()
+
+    # fp16 codes without PCA already rank almost exactly; re-ranking would only duplicate them
+    rerank_vectors = None
+    if rerank_factor > 1 and (compression != "fp16" or pca_dim):
+        rerank_vectors = vectors.astype(np.float16)
+    return CompressedIndex(index, compression, pca_dim, rerank_factor, rerank_vectors)
+
+
+def create_index(vectors: np.ndarray, index_type: Optional[str] = None,
+                 compression: Optional[str] = None) -> Union[faiss.Index, CompressedIndex]:
+    """Build (and train, if needed) an L2 index over ``vectors``"""
+    ntotal, dim = vectors.shape
+    index_type = index_type or choose_index_type(ntotal)
+    compression = compression or settings.VECTOR_INDEX_COMPRESSION
+    if compression != "none":
+        return create_compressed_index(
+            vectors, index_type, compression,
+            pca_dim=settings.VECTOR_INDEX_PCA_DIM,
+            rerank_factor=settings.VECTOR_INDEX_RERANK_FACTOR
+        )
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "ivf":
+        nlist = _ivf_nlist(ntotal)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = min(nlist, settings.VECTOR_INDEX_IVF_NPROBE)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, settings.VECTOR_INDEX_HNSW_M)
+        index.hnsw.efConstruction = settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = settings.VECTOR_INDEX_HNSW_EF_SEARCH
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+
+    index.add(vectors)
+    if index_type == "ivf":
+        # MMR reconstructs candidate vectors by id
+        index.make_direct_map()
+    return index
+
+
+def describe_index(index: Union[faiss.Index, CompressedIndex]) -> Dict:
+    """Type and search parameters of an index, as persisted in index_params.json"""
+    if isinstance(index, CompressedIndex):
+        params = describe_index(index.index)
+        params.update({
+            "compression": index.compression,
+            "pca_dim": index.pca_dim,
+            "rerank_factor": index.rerank_factor
+        })
+        return params
+    params = {"dim": index.d, "ntotal": index.ntotal, "metric": "l2"}
+    index = _unwrap_pretransform(index)
+    if isinstance(index, faiss.IndexIVF):
+        params.update({"type": "ivf", "nlist": index.nlist, "nprobe": index.nprobe})
+    elif isinstance(index, faiss.IndexHNSW):
+        params.update({
+            "type": "hnsw",
+            "m": index.hnsw.nb_neighbors(1),
+            "ef_construction": index.hnsw.efConstruction,
+            "ef_search": index.hnsw.efSearch
+        })
+    else:
+        params["type"] = "flat"
+    return params
+
+
+def read_index_params(store_path: str) -> Dict:
+    try:
+        with open(os.path.join(store_path, INDEX_PARAMS_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"type": "flat"}  # Stores built before index selection
+
+
+def build_vector_store(documents: List[Document], embeddings: Embeddings) -> FAISS:
+    """Embed documents and assemble a FAISS store on an index sized for them"""
+    if not documents:
+        raise ValueError("No chunks to index")
+    texts = [doc.page_content for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    index = create_index(vectors)
+
+    ids = [str(uuid.uuid4()) for _ in documents]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=doc.page_content, metadata=doc.metadata)
+        for doc_id, doc in zip(ids, documents)
+    })
+    vectorstore = FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+    attach_lexical_index(vectorstore, BM25Index.build(texts))
+    return vectorstore
+
+
+def save_store(vectorstore: FAISS, store_path: str) -> None:
+    """Persist the index, its parameters, an indexed docstore and the lexical index; no pickle is written"""
+    os.makedirs(store_path, exist_ok=True)
+    index = vectorstore.index
+    index_path = os.path.join(store_path, INDEX_FILE)
+    faiss.write_index(index.index if isinstance(index, CompressedIndex) else index, index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+    vectors_path = os.path.join(store_path, RERANK_VECTORS_FILE)
+    if isinstance(index, CompressedIndex) and index.vectors is not None:
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.asarray(index.vectors, dtype=np.float16))
+        os.replace(vectors_path + ".tmp", vectors_path)
+    elif os.path.exists(vectors_path):
+        os.remove(vectors_path)  # Left over from an earlier compressed build of this store
+    params_path = os.path.join(store_path, INDEX_PARAMS_FILE)
+    with open(params_path + ".tmp", "w") as f:
+        json.dump(describe_index(vectorstore.index), f)
+    os.replace(params_path + ".tmp", params_path)
+    write_docstore(vectorstore.docstore, vectorstore.index_to_docstore_id, vectorstore.index.ntotal, store_path)
+    lexical_index = lexical_index_for(vectorstore)
+    if lexical_index is not None:
+        lexical_index.save(store_path)
+
+
+def has_indexed_docstore(store_path: str) -> bool:
+    return os.path.exists(os.path.join(store_path, DOCSTORE_OFFSETS_FILE))
+
+
+def load_store(store_path: str, embeddings: Embeddings) -> FAISS:
+    """Open a store, memory-mapping the index when VECTOR_STORE_MMAP is on.
+
+    Compressed stores are wrapped in a ``CompressedIndex`` that re-ranks
+    against the store's float16 vectors, and a saved BM25 index is attached
+    for hybrid retrieval. Stores that have not been converted yet
+    (``manage.py convert_docstores``) fall back to unpickling ``index.pkl``.
+    """
+    if not has_indexed_docstore(store_path):
+        logging.warning(f"Vector store {store_path} uses a pickled docstore; run 'manage.py convert_docstores'.")
+        vectorstore = FAISS.load_local(store_path, embeddings, allow_dangerous_deserialization=True)
+    else:
+        vectorstore = _load_indexed_store(store_path, embeddings)
+    if has_lexical_index(store_path):
+        attach_lexical_index(vectorstore, BM25Index.load(store_path))
+    return vectorstore
+
+
+def _load_indexed_store(store_path: str, embeddings: Embeddings) -> FAISS:
+    params = read_index_params(store_path)
+    flags = 0
+    if settings.VECTOR_STORE_MMAP and params["type"] == "flat":
+        # FAISS can only map flat code arrays; IVF/HNSW are read into memory
+        flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    index = faiss.read_index(os.path.join(store_path, INDEX_FILE), flags)
+    if params["type"] == "ivf":
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", params["nprobe"])
+    elif params["type"] == "hnsw":
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", params["ef_search"])
+    if params.get("compression", "none") != "none":
+        vectors = None
+        if params.get("rerank_factor"):
+            vectors = np.load(
+                os.path.join(store_path, RERANK_VECTORS_FILE),
+                mmap_mode="r" if settings.VECTOR_STORE_MMAP else None
+            )
+        index = CompressedIndex(
+            index, params["compression"], params.get("pca_dim", 0), params.get("rerank_factor", 0), vectors
+        )
+    docstore = MmapDocstore(store_path)
+    return FAISS(embeddings, index, docstore, PositionalIds(len(docstore)))
@@ -1,13 +1,15 @@
 import os
 import re
+import asyncio
 import json
 import hashlib
 import logging
 import requests
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
 from dotenv import load_dotenv
 import random
 import time
+import uuid
 import isodate
 from bs4 import BeautifulSoup
 import html
@@ -23,6 +25,20 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
 import google.generativeai as genai
+from django.conf import settings
+
+from .store_cache import vector_store_cache, vector_store_path
+from .embedding_cache import CachedEmbeddings, embedding_cache
+from .query_cache import cached_expansion, normalize_question, query_embedding_cache
+from .embedding_pipeline import make_embedding_pipeline
+from .vector_index import build_vector_store, load_store, save_store
+from .retrieval import hybrid_search
+from .answer_cache import answer_cache
+from .answer_stream import GROQ_CHAT_URL, answer_question_async, chat_completion_async, stream_answer, stream_chat_completion
+from . import http_pool
+from .blocking_pool import run_blocking
+from .single_flight import answer_flight, video_processing_flight
+from .context_packing import PackedContext, pack_context, video_span
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -36,8 +52,15 @@ class YouTubeProcessor:
         self.groq_api_key = os.getenv("GROQ_API_KEY")
         self.groq_model = "llama3-70b-8192"
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-        self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        self.embedding_model = CachedEmbeddings(
+            make_embedding_pipeline(GoogleGenerativeAIEmbeddings(model="models/embedding-001")),
+            embedding_cache,
+            model_name="models/embedding-001",
+            query_cache=query_embedding_cache
+        )
         self.supported_languages = ['en', 'hi']
+        self.chunk_size = 800
+        self.chunk_overlap = 200
         self.max_retries = 2
         self.initial_delay = 1
         self.request_timeout = 25
@@ -66,7 +89,7 @@ class YouTubeProcessor:
             logging.warning("PROXY_CONFIG_WARNING: Webshare credentials not set.")
             self.ytt_api = YouTubeTranscriptApi()
 
-        self.no_proxy_ytt_api = YouTubeTranscriptApi(proxy_config=None)
+        self.no_proxy_ytt_api = YouTubeTranscriptApi(proxy_config=None, http_client=http_pool.new_session())
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
@@ -102,7 +125,9 @@ class YouTubeProcessor:
         for attempt in range(self.max_retries + 1):
             logging.info(f"Requesting {url[:80]}... (Attempt {attempt+1}, {proxy_msg})")
             try:
-                response = requests.get(url, proxies=proxies_to_use, headers=self.headers, timeout=self.request_timeout)
+                # This loop is the retry policy; the pooled session must not retry underneath it
+                response = http_pool.get(url, retry=False, proxies=proxies_to_use, headers=self.headers,
+                                         timeout=self.request_timeout)
                 response.raise_for_status()
                 return response
             except Exception as e:
@@ -111,19 +136,36 @@ class YouTubeProcessor:
                 else: time.sleep(self.initial_delay * (2 ** attempt))
         return None
 
-    def get_youtube_video_info(self, video_url: str) -> dict:
+    def _video_info_endpoint(self, video_url: str) -> Optional[str]:
         api_key = os.getenv("YOUTUBE_API_KEY")
-        if not api_key: return {}
-        
+        if not api_key: return None
         video_id = self.extract_video_id(video_url)
-        endpoint = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,contentDetails,statistics&id={video_id}&key={api_key}"
+        return f"https://www.googleapis.com/youtube/v3/videos?part=snippet,contentDetails,statistics&id={video_id}&key={api_key}"
+
+    def get_youtube_video_info(self, video_url: str) -> dict:
+        endpoint = self._video_info_endpoint(video_url)
+        if not endpoint: return {}
         
         response = self._make_request_with_retry(endpoint, use_proxy=True)
         if not response and self.has_proxies:
             response = self._make_request_with_retry(endpoint, use_proxy=False)
 
         if not response: return {}
+        return self._parse_video_info(response)
+
+    async def get_youtube_video_info_async(self, video_url: str) -> dict:
+        """get_youtube_video_info on the async client; the Data API is called directly, without the scraping proxy"""
+        endpoint = self._video_info_endpoint(video_url)
+        if not endpoint: return {}
+        try:
+            response = await http_pool.aget(endpoint, timeout=self.request_timeout)
+            response.raise_for_status()
+        except Exception as e:
+            logging.warning(f"Async video info request failed: {e}")
+            return {}
+        return self._parse_video_info(response)
 
+    def _parse_video_info(self, response) -> dict:
         try:
             data = response.json()
             if not data.get("items"): return {}
@@ -242,7 +284,7 @@ class YouTubeProcessor:
         full_text = " ".join([entry['text'] for entry in transcript])
         cleaned_full_text = self.clean_text(full_text)
         
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=200)
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
         text_chunks = text_splitter.split_text(cleaned_full_text)
         
         docs = []
@@ -290,42 +332,84 @@ class YouTubeProcessor:
 
     def create_vector_store(self, chunks: List[Document], store_name: str) -> FAISS:
         logging.info("Creating embeddings and vector store...")
-        vectorstore = FAISS.from_documents(chunks, self.embedding_model)
+        vectorstore = build_vector_store(chunks, self.embedding_model)
         logging.info(f"Vector store created with {vectorstore.index.ntotal} embeddings")
         
-        store_path = os.path.join("vectorstores", store_name)
+        store_path = vector_store_path(store_name)
         os.makedirs(os.path.dirname(store_path), exist_ok=True)
-        vectorstore.save_local(store_path)
+        save_store(vectorstore, store_path)
+        vector_store_cache.invalidate(store_name)
+        answer_cache.invalidate(store_name)
         logging.info(f"Vector store saved at {store_path}")
         return vectorstore
     
     def load_vector_store(self, store_name: str) -> FAISS:
-        store_path = os.path.join("vectorstores", store_name)
-        return FAISS.load_local(
-            store_path, self.embedding_model, allow_dangerous_deserialization=True
+        return vector_store_cache.get(
+            store_name, lambda store_path: load_store(store_path, self.embedding_model)
         )
 
+    def _groq_payload(self, prompt: str, language: str = 'en') -> Dict:
+        system_message = {"en": "You are a helpful AI assistant. Answer using the provided context."}.get(language, "en")
+        return {"model": self.groq_model, "messages": [{"role": "system", "content": system_message}, {"role": "user", "content": prompt}]}
+
     def call_groq_llm(self, prompt: str, language: str = 'en') -> str:
         headers = {"Authorization": f"Bearer {self.groq_api_key}", "Content-Type": "application/json"}
-        system_message = {"en": "You are a helpful AI assistant. Answer using the provided context."}.get(language, "en")
-        payload = {"model": self.groq_model, "messages": [{"role": "system", "content": system_message}, {"role": "user", "content": prompt}]}
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", json=payload, headers=headers, timeout=30)
+        payload = self._groq_payload(prompt, language)
+        response = http_pool.post(GROQ_CHAT_URL, json=payload, headers=headers, timeout=30)
         response.raise_for_status()
         return response.json()["choices"][0]["message"]["content"]
 
+    def stream_groq_llm(self, prompt: str, language: str = 'en') -> Iterator[str]:
+        return stream_chat_completion(self.groq_api_key, self._groq_payload(prompt, language), timeout=30)
+
+    async def call_groq_llm_async(self, prompt: str, language: str = 'en') -> str:
+        return await chat_completion_async(self.groq_api_key, self._groq_payload(prompt, language), timeout=30)
+
     def expand_query_with_llm(self, query: str, language: str = 'en') -> str:
         prompt = f"""Expand the following user query for better semantic search results, preserving the original intent. Query: {query}"""
-        return self.call_groq_llm(prompt, language)
+        return cached_expansion("youtube", language, query, lambda: self.call_groq_llm(prompt, language))
+
+    def answer_question(self, vectorstore: FAISS, question: str, store_name: Optional[str] = None) -> Dict:
+        """Answer from the semantic answer cache when the store is named, generating on a miss"""
+        if store_name is None:
+            return self.generate_answer(vectorstore, question)
+        return answer_flight.do(
+            (store_name, normalize_question(question)),
+            lambda: answer_cache.get_or_answer(
+                store_name, question, self.embedding_model,
+                lambda embedding: self.generate_answer(vectorstore, question, embedding)
+            )
+        )
 
-    def answer_question(self, vectorstore: FAISS, question: str) -> Dict:
+    async def answer_question_async(self, vectorstore: FAISS, question: str, store_name: Optional[str] = None) -> Dict:
+        """answer_question without holding a thread while Groq generates"""
+        return await answer_question_async(self, vectorstore, question, store_name)
+
+    def stream_answer(self, vectorstore: FAISS, question: str, store_name: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        """Yield (event, data) pairs: references first, then thinking/answer text as it streams"""
+        return stream_answer(self, vectorstore, question, store_name)
+
+    def retrieve_context(self, vectorstore: FAISS, question: str,
+                         embedding: Optional[Sequence[float]] = None) -> Tuple[str, List[Document]]:
         question_lang = 'hi' if any('\u0900' <= char <= '\u097F' for char in question) else 'en'
-        expanded_query = self.expand_query_with_llm(question, question_lang)
-        logging.info(f"Expanded query: '{expanded_query}'")
+        expanded_query = question
+        if settings.RETRIEVAL_QUERY_EXPANSION:
+            expanded_query = self.expand_query_with_llm(question, question_lang)
+            logging.info(f"Expanded query: '{expanded_query}'")
         
-        similar_docs = vectorstore.max_marginal_relevance_search(query=expanded_query, k=5, fetch_k=25)
-        if not similar_docs: return {"answer": "No relevant context found.", "references": [], "thinking_process": ""}
-
-        full_context = "\n\n".join([doc.page_content for doc in similar_docs])
+        # The question's embedding only fits the search when the query was not expanded
+        embedding = embedding if expanded_query == question else None
+        return expanded_query, hybrid_search(vectorstore, expanded_query, k=5, fetch_k=25, embedding=embedding)
+
+    def build_context(self, similar_docs: List[Document]) -> PackedContext:
+        """Overlapping transcript chunks merged by timestamp range, within the prompt token budget"""
+        context = pack_context(similar_docs, settings.CONTEXT_TOKEN_BUDGET, span=video_span)
+        logging.info(f"Context: {context.chunks} chunks -> {context.segments} passages, "
+                     f"{context.tokens}/{context.raw_tokens} tokens ({context.tokens_saved} saved)")
+        return context
+
+    def answer_prompt(self, question: str, context: PackedContext) -> str:
+        full_context = context.text
         prompt_template = """Analyze the question and provide:
 1.  Your thinking process in <thinking> tags.
 2.  A detailed answer in English based strictly on the context, citing timestamps.
@@ -336,40 +420,99 @@ Context:
 {context}
 
 Format: <thinking>Your analysis</thinking><answer>Your answer</answer>"""
-        
-        llm_response = self.call_groq_llm(prompt_template.format(question=question, context=full_context), 'en')
-        
+        return prompt_template.format(question=question, context=full_context)
+
+    def format_references(self, similar_docs: List[Document]) -> List[Dict]:
+        return [
+            {
+                "source": doc.metadata["source"], "thumbnail": doc.metadata["thumbnail"],
+                "chunk_id": doc.metadata["chunk_id"], "timestamp": doc.metadata["timestamp"],
+                "text": doc.page_content, "preview": doc.metadata["preview"],
+                "video_title": doc.metadata.get("video_title", "Unknown"),
+                "language": doc.metadata.get("language", "en")
+            } for doc in similar_docs
+        ]
+
+    def build_answer(self, question: str, expanded_query: str, similar_docs: List[Document], llm_response: str,
+                     context: Optional[PackedContext] = None) -> Dict:
         try:
             thinking = llm_response.split("<thinking>")[1].split("</thinking>")[0].strip()
             answer = llm_response.split("<answer>")[1].split("</answer>")[0].strip()
         except IndexError:
             thinking, answer = "Model did not follow formatting.", llm_response
 
-        return {
+        full_context = "\n\n".join([doc.page_content for doc in similar_docs])
+        response = {
             "question": question, "expanded_query": expanded_query, "thinking_process": thinking, "answer": answer,
-            "references": [
-                {
-                    "source": doc.metadata["source"], "thumbnail": doc.metadata["thumbnail"],
-                    "chunk_id": doc.metadata["chunk_id"], "timestamp": doc.metadata["timestamp"],
-                    "text": doc.page_content, "preview": doc.metadata["preview"],
-                    "video_title": doc.metadata.get("video_title", "Unknown"),
-                    "language": doc.metadata.get("language", "en")
-                } for doc in similar_docs
-            ],
+            "references": self.format_references(similar_docs),
             "context_hash": self.generate_text_hash(full_context), "language": "en"
         }
+        if context is not None: response["context_tokens"] = context.report()
+        return response
 
-    def process_video(self, video_url: str, store_name: str) -> Dict:
+    def generate_answer(self, vectorstore: FAISS, question: str, embedding: Optional[Sequence[float]] = None) -> Dict:
+        expanded_query, similar_docs = self.retrieve_context(vectorstore, question, embedding)
+        if not similar_docs: return {"answer": "No relevant context found.", "references": [], "thinking_process": ""}
+
+        context = self.build_context(similar_docs)
+        llm_response = self.call_groq_llm(self.answer_prompt(question, context), 'en')
+        return self.build_answer(question, expanded_query, similar_docs, llm_response, context)
+
+    def shared_store_name(self, video_id: str, language: str) -> str:
+        """Store name for one build of a video, transcript language and chunking settings.
+
+        The per-build suffix keeps concurrent builds (and a rebuild racing a
+        delete) out of each other's directory; users share a build through
+        its YouTubeVectorStore row, not the name.
+        """
+        return f"yt_{video_id}_{language}_{self.chunk_size}_{self.chunk_overlap}_{uuid.uuid4().hex[:8]}"
+
+    def processing_key(self, video_url: str, store_name: Optional[str] = None) -> Tuple:
+        """Identity of the work process_video does; concurrent calls with equal keys share one run"""
+        return (self.extract_video_id(video_url), store_name, tuple(self.supported_languages), self.chunk_size, self.chunk_overlap)
+
+    def process_video(self, video_url: str, store_name: Optional[str] = None) -> Dict:
         """Full processing pipeline for a YouTube video"""
-        chunks = self.load_youtube_transcript(video_url)
-        vectorstore = self.create_vector_store(chunks, store_name)
+        return video_processing_flight.do(
+            self.processing_key(video_url, store_name), lambda: self._process_video(video_url, store_name)
+        )
+
+    def _process_video(self, video_url: str, store_name: Optional[str] = None) -> Dict:
+        vectorstore, chunks, store_name, language = self._build_video_store(video_url, store_name)
         video_info = self.get_youtube_video_info(video_url)
         
         return {
             "vectorstore": vectorstore,
             "video_info": video_info,
             "chunks": chunks,
-            "store_name": store_name
+            "store_name": store_name,
+            "language": language
+        }
+
+    def _build_video_store(self, video_url: str, store_name: Optional[str] = None) -> Tuple[FAISS, List[Document], str, str]:
+        chunks = self.load_youtube_transcript(video_url)
+        language = chunks[0].metadata["language"] if chunks else self.supported_languages[0]
+        if store_name is None:
+            store_name = self.shared_store_name(self.extract_video_id(video_url), language)
+        return self.create_vector_store(chunks, store_name), chunks, store_name, language
+
+    async def process_video_async(self, video_url: str, store_name: Optional[str] = None) -> Dict:
+        """process_video for async views: the Data API lookup runs while the transcript is fetched and embedded"""
+        return await video_processing_flight.do_async(
+            self.processing_key(video_url, store_name), lambda: self._process_video_async(video_url, store_name)
+        )
+
+    async def _process_video_async(self, video_url: str, store_name: Optional[str] = None) -> Dict:
+        (vectorstore, chunks, store_name, language), video_info = await asyncio.gather(
+            run_blocking(self._build_video_store, video_url, store_name),
+            self.get_youtube_video_info_async(video_url)
+        )
+        return {
+            "vectorstore": vectorstore,
+            "video_info": video_info,
+            "chunks": chunks,
+            "store_name": store_name,
+            "language": language
         }
 
 
@@ -3,6 +3,11 @@ ASGI config for decentral_tutor project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The ``/async/`` API endpoints only release their worker while waiting on
+upstream calls when served from here, e.g.::
+
+    gunicorn decentral_tutor.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 """
@@ -187,6 +187,96 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'uploads')
 VECTORSTORES_DIR = os.path.join(BASE_DIR, 'vectorstores')
 os.makedirs(VECTORSTORES_DIR, exist_ok=True)
 
+# In-process cache of loaded vector stores (bounded by on-disk store size)
+VECTOR_STORE_CACHE_MAX_BYTES = int(os.getenv('VECTOR_STORE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+VECTOR_STORE_CACHE_MAX_ENTRIES = int(os.getenv('VECTOR_STORE_CACHE_MAX_ENTRIES', 64))
+# Memory-map index and docstore files so workers share pages through the OS page cache
+VECTOR_STORE_MMAP = os.getenv('VECTOR_STORE_MMAP', 'true').lower() == 'true'
+
+# FAISS index type: 'auto' uses a flat index below the threshold and VECTOR_INDEX_LARGE_TYPE above it
+VECTOR_INDEX_TYPE = os.getenv('VECTOR_INDEX_TYPE', 'auto')  # auto | flat | ivf | hnsw
+VECTOR_INDEX_AUTO_THRESHOLD = int(os.getenv('VECTOR_INDEX_AUTO_THRESHOLD', 10000))
+VECTOR_INDEX_LARGE_TYPE = os.getenv('VECTOR_INDEX_LARGE_TYPE', 'hnsw')
+VECTOR_INDEX_IVF_NPROBE = int(os.getenv('VECTOR_INDEX_IVF_NPROBE', 16))
+VECTOR_INDEX_HNSW_M = int(os.getenv('VECTOR_INDEX_HNSW_M', 32))
+VECTOR_INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv('VECTOR_INDEX_HNSW_EF_CONSTRUCTION', 80))
+VECTOR_INDEX_HNSW_EF_SEARCH = int(os.getenv('VECTOR_INDEX_HNSW_EF_SEARCH', 64))
+# Opt-in compressed codes for new stores, optionally PCA-reduced first (0 keeps all dims);
+# searches re-rank k * VECTOR_INDEX_RERANK_FACTOR candidates on float16 vectors (0 disables)
+VECTOR_INDEX_COMPRESSION = os.getenv('VECTOR_INDEX_COMPRESSION', 'none')  # none | fp16 | sq8 | pq
+VECTOR_INDEX_PCA_DIM = int(os.getenv('VECTOR_INDEX_PCA_DIM', 0))
+VECTOR_INDEX_RERANK_FACTOR = int(os.getenv('VECTOR_INDEX_RERANK_FACTOR', 4))
+
+# Retrieval fuses vector and BM25 rankings (reciprocal-rank fusion constant k);
+# LLM query expansion costs one extra Groq call per question and is off by default
+RETRIEVAL_RRF_K = int(os.getenv('RETRIEVAL_RRF_K', 60))
+RETRIEVAL_QUERY_EXPANSION = os.getenv('RETRIEVAL_QUERY_EXPANSION', 'false').lower() == 'true'
+
+# Prompt context: overlapping retrieved chunks are merged, then passages are kept within this many tokens (0 = no cap)
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 3000))
+
+# In-process LRUs for LLM query expansions and query embeddings
+QUERY_EXPANSION_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_EXPANSION_CACHE_MAX_ENTRIES', 2048))
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_EMBEDDING_CACHE_MAX_ENTRIES', 4096))
+
+# Semantic answer cache: reuse an answer when a new question on the same store is this similar (cosine)
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.95))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv('ANSWER_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+ANSWER_CACHE_MAX_ENTRIES_PER_STORE = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES_PER_STORE', 200))
+
+# Outbound HTTP: keep-alive pools per upstream host (e.g. "api.groq.com=20,api.tavily.com=8"),
+# default (connect, read) timeouts in seconds, and retries for failed connects and idempotent 502/503/504s
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HTTP_POOL_MAXSIZE_BY_HOST = {
+    host.strip(): int(size)
+    for host, size in (item.split('=', 1) for item in os.getenv('HTTP_POOL_MAXSIZE_BY_HOST', '').split(',') if '=' in item)
+}
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 60))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.5))
+
+# Async views hand FAISS searches, ORM queries and sync SDK calls to a bounded thread pool per worker
+ASYNC_BLOCKING_POOL_WORKERS = int(os.getenv('ASYNC_BLOCKING_POOL_WORKERS', 16))
+
+# Generated chapter lists are reused per normalized (topic, grade) for this long (default 30 days);
+# each Gemini call gives up after the timeout, and batch requests run at most this many calls at once,
+# reporting topics not done within the batch timeout as timed out
+CHAPTER_CACHE_TTL_SECONDS = int(os.getenv('CHAPTER_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+CHAPTER_GENERATION_TIMEOUT_SECONDS = float(os.getenv('CHAPTER_GENERATION_TIMEOUT_SECONDS', 30))
+CHAPTER_BATCH_MAX_WORKERS = int(os.getenv('CHAPTER_BATCH_MAX_WORKERS', 8))
+CHAPTER_BATCH_MAX_ITEMS = int(os.getenv('CHAPTER_BATCH_MAX_ITEMS', 200))
+CHAPTER_BATCH_TIMEOUT_SECONDS = float(os.getenv('CHAPTER_BATCH_TIMEOUT_SECONDS', 120))
+
+# Chapter resource pages search YouTube and Tavily for every chapter at once on a pool of this size per worker;
+# searches not back within the timeout are left out of the response and retried on the next request
+RESOURCE_FETCH_MAX_WORKERS = int(os.getenv('RESOURCE_FETCH_MAX_WORKERS', 20))
+RESOURCE_FETCH_TIMEOUT_SECONDS = float(os.getenv('RESOURCE_FETCH_TIMEOUT_SECONDS', 20))
+# Look up chapter resources in a background thread as soon as chapters are generated
+RESOURCE_PREFETCH_ENABLED = os.getenv('RESOURCE_PREFETCH_ENABLED', 'true').lower() == 'true'
+
+# YouTube/Tavily search results are shared across users for the TTL (default 7 days), then served stale
+# for up to RESOURCE_CACHE_STALE_SECONDS more (default 30 days) while one worker refreshes them in the background
+RESOURCE_CACHE_TTL_SECONDS = int(os.getenv('RESOURCE_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+RESOURCE_CACHE_STALE_SECONDS = int(os.getenv('RESOURCE_CACHE_STALE_SECONDS', 30 * 24 * 3600))
+
+# History and list endpoints return pages of this many rows (clients may ask for up to the max with ?limit=)
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 200))
+
+# The synced_at returned for ?since= lags the server clock by this much, so rows committed late are not missed
+HISTORY_SYNC_MARGIN_SECONDS = float(os.getenv('HISTORY_SYNC_MARGIN_SECONDS', 5))
+
+# Persistent chunk-embedding cache shared by all workers on the host
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'embeddings.sqlite3'))
+
+# Embedding requests: texts per request, concurrent requests, per-worker rate limit (0 turns it off) and 429 retries
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 100))
+EMBEDDING_MAX_WORKERS = int(os.getenv('EMBEDDING_MAX_WORKERS', 4))
+EMBEDDING_REQUESTS_PER_MINUTE = float(os.getenv('EMBEDDING_REQUESTS_PER_MINUTE', 150))
+EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', 5))
+
 
 # Cloudinary Storage
 CLOUDINARY_STORAGE = {
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
-from core.api import FirebaseLoginAPI, DashboardAPI, ChapterAPI, VideoResourcesAPI, WebResourcesAPI, PDFQAAPI, QuestionAnswerAPI, UserPDFListAPI, DeletePDFAPI, PDFConversationHistoryAPI, YouTubeQuestionAPI, YouTubeVideoAPI, YouTubeVideoListAPI, YouTubeVideoDeleteAPI, ChapterGenerationHistoryAPI, ChapterResourcesAPI, DeleteChapterGenerationAPI
+from core.api import FirebaseLoginAPI, DashboardAPI, ChapterAPI, ChapterBatchAPI, VideoResourcesAPI, WebResourcesAPI, PDFQAAPI, QuestionAnswerAPI, QuestionAnswerStreamAPI, UserPDFListAPI, DeletePDFAPI, PDFConversationHistoryAPI, YouTubeQuestionAPI, YouTubeQuestionStreamAPI, YouTubeVideoAPI, YouTubeVideoListAPI, YouTubeVideoDeleteAPI, YouTubeConversationHistoryAPI, ChapterGenerationHistoryAPI, ChapterResourcesAPI, DeleteChapterGenerationAPI
 from django.views.generic import TemplateView
 from core.api import get_csrf_token
 from core.api import MultiVideoMCQAPI
+from core.async_api import AsyncQuestionAnswerAPI, AsyncYouTubeQuestionAPI, AsyncYouTubeVideoAPI, AsyncMultiVideoMCQAPI
 
 urlpatterns = [
     # Existing URLs
@@ -13,26 +14,34 @@ urlpatterns = [
     
     # Chapter-related URLs
     path('api/chapters/', ChapterAPI.as_view(), name='api_chapters'),
+    path('api/chapters/batch/', ChapterBatchAPI.as_view(), name='api_chapters_batch'),
     path('api/chapters/history/', ChapterGenerationHistoryAPI.as_view(), name='api_chapter_history'),
     path('api/chapters/<int:generation_id>/resources/', ChapterResourcesAPI.as_view(), name='api_chapter_resources'),
     path('api/videos/', VideoResourcesAPI.as_view(), name='api_videos'),
     path('api/websites/', WebResourcesAPI.as_view(), name='api_websites'),
     path('api/chapters/<int:generation_id>/', DeleteChapterGenerationAPI.as_view(), name='api_delete_chapter_generation'),
     path("api/generate-multi-mcqs/", MultiVideoMCQAPI.as_view(), name="generate_multi_mcqs"),
+    path("api/generate-multi-mcqs/async/", AsyncMultiVideoMCQAPI.as_view(), name="generate_multi_mcqs_async"),
 
     
     # PDF-related URLs
     path('api/process-pdf/', PDFQAAPI.as_view(), name='api_process_pdf'),
     path('api/answer-question/', QuestionAnswerAPI.as_view(), name='api_answer_question'),
+    path('api/answer-question/stream/', QuestionAnswerStreamAPI.as_view(), name='api_answer_question_stream'),
+    path('api/answer-question/async/', AsyncQuestionAnswerAPI.as_view(), name='api_answer_question_async'),
     path('api/user/pdfs/', UserPDFListAPI.as_view(), name='api_user_pdfs'),
     path('api/user/pdfs/<int:pdf_id>/', DeletePDFAPI.as_view(), name='api_delete_pdf'),
     path('api/user/pdfs/<int:pdf_id>/conversations/', PDFConversationHistoryAPI.as_view(), name='api_pdf_conversations'),
     
     # YouTube-related URLs
     path('api/process-youtube/', YouTubeVideoAPI.as_view(), name='api_process_youtube'),
+    path('api/process-youtube/async/', AsyncYouTubeVideoAPI.as_view(), name='api_process_youtube_async'),
     path('api/ask-youtube-question/', YouTubeQuestionAPI.as_view(), name='api_ask_youtube_question'),
+    path('api/ask-youtube-question/stream/', YouTubeQuestionStreamAPI.as_view(), name='api_ask_youtube_question_stream'),
+    path('api/ask-youtube-question/async/', AsyncYouTubeQuestionAPI.as_view(), name='api_ask_youtube_question_async'),
     path('api/user/youtube-videos/', YouTubeVideoListAPI.as_view(), name='api_user_youtube_videos'),
     path('api/user/youtube-videos/<int:video_id>/', YouTubeVideoDeleteAPI.as_view(), name='api_delete_youtube_video'),
+    path('api/user/youtube-videos/<int:video_id>/conversations/', YouTubeConversationHistoryAPI.as_view(), name='api_youtube_conversations'),
     
     # CSRF and frontend
     path('api/csrf/', get_csrf_token, name='api_csrf'),